@@ -2,16 +2,39 @@
 Agent Framework for DM Assistant
 Provides communication and coordination between different AI agents
 """
-from typing import Dict, Any, List, Optional, Callable, Union
-from dataclasses import dataclass, asdict
+from typing import Dict, Any, List, Optional, Callable, Union, Set
+from dataclasses import dataclass, asdict, replace
 from enum import Enum
+import asyncio
+import inspect
 import json
+import os
+import struct
 import threading
 import queue
 import time
 import uuid
+import heapq
+import itertools
+from collections import deque
+from itertools import islice
+from concurrent.futures import Future, CancelledError, TimeoutError as FutureTimeoutError
+from concurrent.futures import wait as wait_for_futures
 from abc import ABC, abstractmethod
 
+# Optional msgpack for the compact message codec
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+
+def _encode_default(value: Any) -> Any:
+    """Codec fallback for values JSON/msgpack can't encode: frozen game state thaws, the rest is str()"""
+    thaw = getattr(value, "thaw", None)
+    return thaw() if callable(thaw) else str(value)
+
 
 class MessageType(Enum):
     """Types of messages that can be sent between agents"""
@@ -22,9 +45,29 @@ class MessageType(Enum):
     ERROR = "error"
 
 
-@dataclass
+class DispatchMode(Enum):
+    """How the message bus hands messages to agents"""
+    SHARED = "shared"    # One bus thread delivers every message in turn
+    MAILBOX = "mailbox"  # Each agent drains its own queue on its own worker(s)
+
+
+class MessagePriority(Enum):
+    """Delivery priority - lower values are delivered first"""
+    INTERACTIVE = 0  # DM commands and other requests someone is waiting on
+    NORMAL = 1
+    BACKGROUND = 2   # Tick-generated traffic that can wait or be dropped
+
+
+class OverflowPolicy(Enum):
+    """What a bounded message queue does when a priority lane is full"""
+    DROP_OLDEST = "drop_oldest"  # Evict the oldest queued message in the lane
+    COALESCE = "coalesce"        # Replace a queued message with the same receiver and action
+    BLOCK = "block"              # Make the sender wait for room
+
+
+@dataclass(slots=True)
 class AgentMessage:
-    """Message passed between agents"""
+    """Message passed between agents - slotted, so no per-instance __dict__"""
     id: str
     sender_id: str
     receiver_id: str
@@ -33,6 +76,7 @@ class AgentMessage:
     data: Dict[str, Any]
     timestamp: float
     response_to: Optional[str] = None
+    priority: MessagePriority = MessagePriority.NORMAL
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert message to dictionary"""
@@ -44,7 +88,8 @@ class AgentMessage:
             "action": self.action,
             "data": self.data,
             "timestamp": self.timestamp,
-            "response_to": self.response_to
+            "response_to": self.response_to,
+            "priority": self.priority.value
         }
 
     @classmethod
@@ -58,20 +103,292 @@ class AgentMessage:
             action=data["action"],
             data=data["data"],
             timestamp=data["timestamp"],
-            response_to=data.get("response_to")
+            response_to=data.get("response_to"),
+            priority=MessagePriority(data.get("priority", MessagePriority.NORMAL.value))
+        )
+
+
+# Message ids: a random per-process prefix plus a monotonic counter - much cheaper than
+# uuid4 on every send, and still unique across agent worker processes
+_message_id_prefix = uuid.uuid4().hex[:8]
+_message_counter = itertools.count(1)
+
+
+def _reset_message_ids():
+    global _message_id_prefix, _message_counter
+    _message_id_prefix = uuid.uuid4().hex[:8]
+    _message_counter = itertools.count(1)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_message_ids)
+
+
+def new_message_id() -> str:
+    """Generate a process-unique, monotonically increasing message id"""
+    return f"{_message_id_prefix}-{next(_message_counter)}"
+
+
+class MessageCodec:
+    """Encodes messages as compact JSON of to_dict() - the portable baseline codec"""
+    
+    name = "json"
+    # Length prefix for each record in an encoded stream
+    RECORD_HEADER = struct.Struct("!I")
+    
+    def encode(self, message: AgentMessage) -> bytes:
+        return json.dumps(message.to_dict(), separators=(",", ":"), default=_encode_default).encode("utf-8")
+    
+    def decode(self, payload: bytes) -> AgentMessage:
+        return AgentMessage.from_dict(json.loads(bytes(payload)))
+    
+    def encode_stream(self, messages: List[AgentMessage]) -> bytes:
+        """Encode messages as length-prefixed records"""
+        parts = []
+        for message in messages:
+            record = self.encode(message)
+            parts.append(self.RECORD_HEADER.pack(len(record)))
+            parts.append(record)
+        return b"".join(parts)
+    
+    def decode_stream(self, payload: bytes) -> List[AgentMessage]:
+        """Decode length-prefixed records produced by encode_stream"""
+        messages = []
+        view = memoryview(payload)
+        offset = 0
+        while offset < len(view):
+            (length,) = self.RECORD_HEADER.unpack_from(view, offset)
+            offset += self.RECORD_HEADER.size
+            messages.append(self.decode(view[offset:offset + length]))
+            offset += length
+        return messages
+
+
+class CompactMessageCodec(MessageCodec):
+    """
+    Binary codec: a fixed struct header, length-prefixed strings and the data payload
+    as msgpack when it is installed (compact JSON otherwise)
+    """
+    
+    name = "compact"
+    # message type, priority, timestamp, then byte lengths of id/sender/receiver/action/response_to
+    HEADER = struct.Struct("!BBdHHHHH")
+    NO_RESPONSE_TO = 0xFFFF
+    MESSAGE_TYPES = list(MessageType)
+    
+    def __init__(self, use_msgpack: bool = True):
+        self.use_msgpack = use_msgpack and MSGPACK_AVAILABLE
+        if self.use_msgpack:
+            self.name = "compact-msgpack"
+    
+    def _encode_data(self, data: Dict[str, Any]) -> bytes:
+        if self.use_msgpack:
+            return msgpack.packb(data, use_bin_type=True, default=_encode_default)
+        return json.dumps(data, separators=(",", ":"), default=_encode_default).encode("utf-8")
+    
+    def _decode_data(self, payload) -> Dict[str, Any]:
+        if self.use_msgpack:
+            return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+        return json.loads(bytes(payload))
+    
+    def encode(self, message: AgentMessage) -> bytes:
+        strings = [message.id.encode("utf-8"), message.sender_id.encode("utf-8"),
+                   message.receiver_id.encode("utf-8"), message.action.encode("utf-8")]
+        response_to = message.response_to.encode("utf-8") if message.response_to is not None else b""
+        header = self.HEADER.pack(
+            self.MESSAGE_TYPES.index(message.message_type), message.priority.value, message.timestamp,
+            *(len(s) for s in strings),
+            len(response_to) if message.response_to is not None else self.NO_RESPONSE_TO
         )
+        return b"".join([header, *strings, response_to, self._encode_data(message.data)])
+    
+    def decode(self, payload: bytes) -> AgentMessage:
+        view = memoryview(payload)
+        (type_index, priority, timestamp, id_len, sender_len, receiver_len,
+         action_len, response_len) = self.HEADER.unpack_from(view)
+        offset = self.HEADER.size
+        fields = []
+        for length in (id_len, sender_len, receiver_len, action_len):
+            fields.append(str(view[offset:offset + length], "utf-8"))
+            offset += length
+        response_to = None
+        if response_len != self.NO_RESPONSE_TO:
+            response_to = str(view[offset:offset + response_len], "utf-8")
+            offset += response_len
+        return AgentMessage(
+            id=fields[0],
+            sender_id=fields[1],
+            receiver_id=fields[2],
+            message_type=self.MESSAGE_TYPES[type_index],
+            action=fields[3],
+            data=self._decode_data(view[offset:]),
+            timestamp=timestamp,
+            response_to=response_to,
+            priority=MessagePriority(priority)
+        )
+
+
+def get_default_codec() -> MessageCodec:
+    """Codec used by the bus for history export and cross-process transport"""
+    return CompactMessageCodec()
+
+
+def get_codec(name: str) -> MessageCodec:
+    """Look up a codec by its name attribute"""
+    if name == MessageCodec.name:
+        return MessageCodec()
+    if name == "compact":
+        return CompactMessageCodec(use_msgpack=False)
+    if name == "compact-msgpack":
+        if not MSGPACK_AVAILABLE:
+            raise ValueError("Codec 'compact-msgpack' needs the msgpack package")
+        return CompactMessageCodec()
+    raise ValueError(f"Unknown message codec: {name}")
+
+
+class MessageJournal:
+    """
+    Append-only on-disk log of bus messages: a header naming the codec, then length-prefixed
+    records. fsync is batched - every `fsync_every` records or `fsync_interval` seconds.
+    """
+    
+    MAGIC = b"DMJ1"
+    
+    def __init__(self, path: str, codec: Optional[MessageCodec] = None,
+                 fsync_every: int = 256, fsync_interval: float = 1.0):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.lock = threading.Lock()
+        self.records = 0
+        self.unsynced = 0
+        
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            # Keep appending in the codec the file was started with
+            with open(path, "rb") as f:
+                self.codec = self._read_header(f)
+            self.file = open(path, "ab")
+        else:
+            self.codec = codec or get_default_codec()
+            self.file = open(path, "ab")
+            name = self.codec.name.encode("utf-8")
+            self.file.write(self.MAGIC + bytes([len(name)]) + name)
+        
+        self.closed = threading.Event()
+        self.flusher = threading.Thread(target=self._flush_periodically,
+                                        name="message-journal-fsync", daemon=True)
+        self.flusher.start()
+    
+    @classmethod
+    def _read_header(cls, f) -> MessageCodec:
+        if f.read(len(cls.MAGIC)) != cls.MAGIC:
+            raise ValueError(f"{f.name} is not a message journal")
+        name_length = f.read(1)
+        return get_codec(f.read(name_length[0]).decode("utf-8"))
+    
+    def append(self, message: AgentMessage):
+        """Append one message; fsyncs once enough records have accumulated"""
+        record = self.codec.encode(message)
+        with self.lock:
+            if self.file.closed:
+                return
+            self.file.write(MessageCodec.RECORD_HEADER.pack(len(record)))
+            self.file.write(record)
+            self.records += 1
+            self.unsynced += 1
+            if self.unsynced >= self.fsync_every:
+                self._sync()
+    
+    def sync(self):
+        """Flush and fsync any buffered records"""
+        with self.lock:
+            if not self.file.closed and self.unsynced:
+                self._sync()
+    
+    def _sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+    
+    def _flush_periodically(self):
+        while not self.closed.wait(self.fsync_interval):
+            try:
+                self.sync()
+            except OSError as e:
+                print(f"Error syncing message journal {self.path}: {e}")
+    
+    def close(self):
+        """Sync and close the journal"""
+        self.closed.set()
+        with self.lock:
+            if not self.file.closed:
+                self._sync()
+                self.file.close()
+    
+    @classmethod
+    def read(cls, path: str):
+        """Yield the messages in a journal, stopping at a torn trailing record"""
+        with open(path, "rb") as f:
+            codec = cls._read_header(f)
+            header_size = MessageCodec.RECORD_HEADER.size
+            while True:
+                header = f.read(header_size)
+                if len(header) < header_size:
+                    return
+                (length,) = MessageCodec.RECORD_HEADER.unpack(header)
+                record = f.read(length)
+                if len(record) < length:
+                    return
+                yield codec.decode(record)
+
+
+# Action every agent accepts: data {"requests": [{"action", "data"}, ...]} runs each
+# sub-request in order and answers once with {"results": [...]}
+BATCH_ACTION = "batch"
+
+
+def batch_request_data(requests: List[tuple], stop_on_error: bool = False) -> Dict[str, Any]:
+    """Build the data of a batch message from (action, data) pairs"""
+    return {
+        "requests": [{"action": action, "data": data} for action, data in requests],
+        "stop_on_error": stop_on_error
+    }
+
+
+# Broadcast sent after a state-changing request succeeds: data {"agent_id", "action", "tags"}.
+# Caches drop every entry depending on one of the tags (by default the agent id)
+STATE_CHANGED_ACTION = "state_changed"
+
+
+def is_success(result: Any) -> bool:
+    """Whether a handler result reports success"""
+    return isinstance(result, dict) and "error" not in result and result.get("success") is not False
 
 
 class BaseAgent(ABC):
     """Base class for all agents in the framework"""
     
+    # Seconds between process_tick calls: None uses the orchestrator tick_interval,
+    # 0 means the agent only reacts to messages and timers
+    tick_period: Optional[float] = None
+    # Request actions where a newer queued request supersedes an older undelivered one
+    coalesce_actions: Set[str] = frozenset()
+    # Read-only request actions whose results stay valid until this agent publishes a state change
+    cacheable_actions: Set[str] = frozenset()
+    # Request actions that change agent state - each success publishes STATE_CHANGED_ACTION
+    mutating_actions: Set[str] = frozenset()
+    
     def __init__(self, agent_id: str, agent_type: str):
         self.agent_id = agent_id
         self.agent_type = agent_type
         self.message_bus: Optional['MessageBus'] = None
+        self.scheduler: Optional['AgentScheduler'] = None
+        # Broadcast actions this agent wants beyond the ones it has handlers for
+        self.subscriptions: Set[str] = set()
         self.running = False
         self.message_handlers: Dict[str, Callable] = {}
         self._setup_handlers()
+        self.message_handlers.setdefault(BATCH_ACTION, self._handle_batch)
     
     @abstractmethod
     def _setup_handlers(self):
@@ -81,21 +398,52 @@ class BaseAgent(ABC):
     def register_handler(self, action: str, handler: Callable):
         """Register a message handler for a specific action"""
         self.message_handlers[action] = handler
+        if self.message_bus:
+            self.message_bus.subscribe(self.agent_id, action)
+    
+    def subscribe(self, action: str):
+        """Receive broadcasts for an action without registering a handler ("*" for all)"""
+        self.subscriptions.add(action)
+        if self.message_bus:
+            self.message_bus.subscribe(self.agent_id, action)
+    
+    def unsubscribe(self, action: str):
+        """Stop receiving broadcasts for an action subscribed with subscribe()"""
+        self.subscriptions.discard(action)
+        if self.message_bus and action not in self.message_handlers:
+            self.message_bus.unsubscribe(self.agent_id, action)
+    
+    def has_subscribers(self, action: str) -> bool:
+        """Check whether broadcasting an action would reach any other agent"""
+        return bool(self.message_bus and self.message_bus.has_subscribers(action, exclude=self.agent_id))
+    
+    def schedule_timer(self, delay: float, callback: Callable[[], Any]) -> int:
+        """Run callback on the orchestrator loop after delay seconds; returns a timer id"""
+        if not self.scheduler:
+            raise RuntimeError("Agent not connected to a scheduler")
+        return self.scheduler.schedule_timer(delay, callback, owner=self.agent_id)
+    
+    def cancel_timer(self, timer_id: int):
+        """Cancel a timer created with schedule_timer"""
+        if self.scheduler:
+            self.scheduler.cancel_timer(timer_id)
     
     def send_message(self, receiver_id: str, action: str, data: Dict[str, Any], 
-                    message_type: MessageType = MessageType.REQUEST) -> str:
+                    message_type: MessageType = MessageType.REQUEST,
+                    priority: MessagePriority = MessagePriority.NORMAL) -> str:
         """Send a message to another agent"""
         if not self.message_bus:
             raise RuntimeError("Agent not connected to message bus")
         
         message = AgentMessage(
-            id=str(uuid.uuid4()),
+            id=new_message_id(),
             sender_id=self.agent_id,
             receiver_id=receiver_id,
             message_type=message_type,
             action=action,
             data=data,
-            timestamp=time.time()
+            timestamp=time.time(),
+            priority=priority
         )
         
         self.message_bus.send_message(message)
@@ -104,46 +452,107 @@ class BaseAgent(ABC):
     def send_response(self, original_message: AgentMessage, data: Dict[str, Any]):
         """Send a response to a received message"""
         response = AgentMessage(
-            id=str(uuid.uuid4()),
+            id=new_message_id(),
             sender_id=self.agent_id,
             receiver_id=original_message.sender_id,
             message_type=MessageType.RESPONSE,
             action=f"{original_message.action}_response",
             data=data,
             timestamp=time.time(),
-            response_to=original_message.id
+            response_to=original_message.id,
+            priority=original_message.priority
         )
         
         if self.message_bus:
             self.message_bus.send_message(response)
     
-    def broadcast_event(self, action: str, data: Dict[str, Any]):
-        """Broadcast an event to all agents"""
-        if not self.message_bus:
+    def broadcast_event(self, action: str, data: Dict[str, Any],
+                        priority: MessagePriority = MessagePriority.NORMAL):
+        """Broadcast an event to all agents subscribed to the action"""
+        if not self.has_subscribers(action):
             return
         
         message = AgentMessage(
-            id=str(uuid.uuid4()),
+            id=new_message_id(),
             sender_id=self.agent_id,
             receiver_id="broadcast",
             message_type=MessageType.BROADCAST,
             action=action,
             data=data,
-            timestamp=time.time()
+            timestamp=time.time(),
+            priority=priority
         )
         
         self.message_bus.send_message(message)
     
+    def state_tags(self, action: str) -> List[str]:
+        """Cache dependency tags invalidated when a mutating action succeeds"""
+        return [self.agent_id]
+    
+    def publish_state_change(self, action: str, tags: Optional[List[str]] = None):
+        """Tell caches that results depending on this agent's state (or the given tags) are stale.
+        Sent before the request's response so a caller never reads a stale cached answer."""
+        if not self.message_bus:
+            return
+        message = AgentMessage(
+            id=new_message_id(),
+            sender_id=self.agent_id,
+            receiver_id="broadcast",
+            message_type=MessageType.BROADCAST,
+            action=STATE_CHANGED_ACTION,
+            data={"agent_id": self.agent_id, "action": action, "tags": tags or self.state_tags(action)},
+            timestamp=time.time(),
+            priority=MessagePriority.INTERACTIVE
+        )
+        self.message_bus.send_message(message)
+    
+    def _performance_monitor(self) -> Optional['PerformanceMonitor']:
+        monitor = self.message_bus.performance if self.message_bus else None
+        return monitor if monitor and monitor.enabled else None
+    
+    def _wait_for(self, awaitable) -> Any:
+        """Result of a coroutine handler called from synchronous code"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            if inspect.iscoroutine(awaitable):
+                awaitable.close()
+            raise RuntimeError("Coroutine handler called synchronously on a running event loop - "
+                               "use handle_message_async")
+        
+        async def wait():
+            return await awaitable
+        
+        loop = getattr(self.message_bus, "loop", None)
+        if loop and loop.is_running():
+            # Worker thread of an async bus - run it on the bus loop it was written for
+            return asyncio.run_coroutine_threadsafe(wait(), loop).result()
+        return asyncio.run(wait())
+    
     def handle_message(self, message: AgentMessage) -> Optional[Dict[str, Any]]:
         """Handle an incoming message"""
         handler = self.message_handlers.get(message.action)
         if handler:
+            monitor = self._performance_monitor()
+            if monitor:
+                monitor.record("queue_wait", self.agent_id, message.action, time.time() - message.timestamp)
+                started = time.perf_counter()
             try:
                 result = handler(message)
+                if inspect.isawaitable(result):
+                    result = self._wait_for(result)
+                if monitor:
+                    monitor.record("handler", self.agent_id, message.action, time.perf_counter() - started)
+                if message.action in self.mutating_actions and is_success(result):
+                    self.publish_state_change(message.action)
                 if message.message_type == MessageType.REQUEST and result:
                     self.send_response(message, result)
                 return result
             except Exception as e:
+                if monitor:
+                    monitor.record("handler", self.agent_id, message.action, time.perf_counter() - started)
                 error_data = {"error": str(e), "action": message.action}
                 self.send_response(message, error_data)
                 return None
@@ -153,6 +562,64 @@ class BaseAgent(ABC):
                 error_data = {"error": f"Unknown action: {message.action}"}
                 self.send_response(message, error_data)
     
+    async def handle_message_async(self, message: AgentMessage) -> Optional[Dict[str, Any]]:
+        """Handle an incoming message, awaiting the handler if it is a coroutine"""
+        handler = self.message_handlers.get(message.action)
+        if not handler:
+            return self.handle_message(message)
+        
+        monitor = self._performance_monitor()
+        if monitor:
+            monitor.record("queue_wait", self.agent_id, message.action, time.time() - message.timestamp)
+        started = time.perf_counter()
+        try:
+            result = handler(message)
+            if inspect.isawaitable(result):
+                result = await result
+            if monitor:
+                monitor.record("handler", self.agent_id, message.action, time.perf_counter() - started)
+            if message.action in self.mutating_actions and is_success(result):
+                self.publish_state_change(message.action)
+            if message.message_type == MessageType.REQUEST and result:
+                self.send_response(message, result)
+            return result
+        except Exception as e:
+            if monitor:
+                monitor.record("handler", self.agent_id, message.action, time.perf_counter() - started)
+            error_data = {"error": str(e), "action": message.action}
+            self.send_response(message, error_data)
+            return None
+    
+    def _handle_batch(self, message: AgentMessage) -> Dict[str, Any]:
+        """Run each (action, data) sub-request of a batch in order and collect their results"""
+        stop_on_error = message.data.get("stop_on_error", False)
+        results = []
+        changed_tags: List[str] = []
+        for request in message.data.get("requests", []):
+            action = request.get("action")
+            handler = self.message_handlers.get(action)
+            if not handler or action == BATCH_ACTION:
+                result = {"error": f"Unknown action: {action}"}
+            else:
+                try:
+                    result = handler(replace(message, action=action, data=request.get("data", {})))
+                    if inspect.isawaitable(result):
+                        result = self._wait_for(result)
+                except Exception as e:
+                    result = {"error": str(e), "action": action}
+            results.append(result)
+            
+            succeeded = is_success(result)
+            if succeeded and action in self.mutating_actions:
+                changed_tags.extend(tag for tag in self.state_tags(action) if tag not in changed_tags)
+            if stop_on_error and not succeeded:
+                break
+        
+        # One invalidation for the whole batch, still ahead of the batch response
+        if changed_tags:
+            self.publish_state_change(BATCH_ACTION, changed_tags)
+        return {"success": True, "results": results}
+    
     def start(self):
         """Start the agent"""
         self.running = True
@@ -167,42 +634,625 @@ class BaseAgent(ABC):
         pass
 
 
+class PriorityMessageQueue:
+    """
+    Bounded message queue with one FIFO lane per MessagePriority.
+    Lanes hold one-element slots so a queued message can be replaced in place.
+    """
+    
+    def __init__(self, max_size: int = 1000,
+                 overflow_policy: Union[OverflowPolicy, str] = OverflowPolicy.DROP_OLDEST,
+                 block_timeout: float = 5.0):
+        self.max_size = max_size  # per priority lane
+        self.overflow_policy = OverflowPolicy(overflow_policy)
+        self.block_timeout = block_timeout
+        self.lanes: Dict[MessagePriority, deque] = {priority: deque() for priority in MessagePriority}
+        self.condition = threading.Condition()
+        # Called with each message that is evicted or replaced without being delivered
+        self.on_discard: Optional[Callable[[AgentMessage], None]] = None
+        # (receiver_id, action) pairs that always coalesce, shared with the owning bus
+        self.coalesce_keys: Set[tuple] = set()
+        # (sender_id, receiver_id, action, priority) -> slot of the queued request for coalesced keys
+        self.pending_slots: Dict[tuple, list] = {}
+        self.metrics = {"enqueued": 0, "dequeued": 0, "dropped": 0,
+                        "coalesced": 0, "blocked": 0, "max_depth": 0}
+    
+    def put(self, message: AgentMessage, block: bool = True):
+        """Queue a message, coalescing or applying the overflow policy as needed"""
+        discarded, replaced = None, False
+        key = self._pending_key(message)
+        with self.condition:
+            lane = self.lanes[message.priority]
+            coalesce = (message.message_type == MessageType.REQUEST
+                        and (message.receiver_id, message.action) in self.coalesce_keys)
+            if coalesce and key in self.pending_slots:
+                # Newer request from the same sender supersedes the queued one, keeping its place in line
+                slot = self.pending_slots[key]
+                discarded, slot[0] = slot[0], message
+                replaced = True
+                self.metrics["coalesced"] += 1
+            # Responses complete requests already admitted, so they are never refused
+            elif len(lane) >= self.max_size and message.message_type != MessageType.RESPONSE:
+                discarded, replaced = self._handle_overflow(lane, message, block)
+            if not replaced:
+                slot = [message]
+                lane.append(slot)
+                if coalesce:
+                    self.pending_slots[key] = slot
+                self.metrics["enqueued"] += 1
+                self.metrics["max_depth"] = max(self.metrics["max_depth"], self._size())
+            self.condition.notify_all()
+        
+        if discarded is not None and self.on_discard:
+            self.on_discard(discarded)
+    
+    def get(self, timeout: Optional[float] = None) -> AgentMessage:
+        """Take the next message from the highest-priority non-empty lane"""
+        with self.condition:
+            if not self.condition.wait_for(self._size, timeout=timeout):
+                raise queue.Empty
+            for priority in MessagePriority:
+                lane = self.lanes[priority]
+                if lane:
+                    message = self._pop_slot(lane)
+                    self.metrics["dequeued"] += 1
+                    self.condition.notify_all()
+                    return message
+    
+    def qsize(self) -> int:
+        """Number of queued messages across all lanes"""
+        with self.condition:
+            return self._size()
+    
+    def depths(self) -> Dict[str, int]:
+        """Number of queued messages per priority lane"""
+        with self.condition:
+            return {priority.name.lower(): len(lane) for priority, lane in self.lanes.items()}
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Counters plus current depth per lane"""
+        with self.condition:
+            metrics = dict(self.metrics)
+            metrics["depth"] = {priority.name.lower(): len(lane) for priority, lane in self.lanes.items()}
+            return metrics
+    
+    def _size(self) -> int:
+        return sum(len(lane) for lane in self.lanes.values())
+    
+    @staticmethod
+    def _pending_key(message: AgentMessage) -> tuple:
+        """Requests only coalesce with one from the same sender in the same lane"""
+        return message.sender_id, message.receiver_id, message.action, message.priority
+    
+    def _pop_slot(self, lane: deque, index: int = 0) -> AgentMessage:
+        """Remove the slot at index (default the oldest) and forget it in the coalescing index"""
+        slot = lane[index]
+        del lane[index]
+        message = slot[0]
+        key = self._pending_key(message)
+        if self.pending_slots.get(key) is slot:
+            del self.pending_slots[key]
+        return message
+    
+    def _handle_overflow(self, lane: deque, message: AgentMessage, block: bool):
+        """Make room in a full lane - caller holds the condition.
+        Returns (discarded message or None, whether `message` must not be appended to the lane)."""
+        if self.overflow_policy == OverflowPolicy.COALESCE:
+            for slot in lane:
+                queued = slot[0]
+                if (queued.sender_id == message.sender_id and queued.receiver_id == message.receiver_id
+                        and queued.action == message.action and queued.message_type == message.message_type):
+                    slot[0] = message
+                    self.metrics["coalesced"] += 1
+                    return queued, True
+        
+        if self.overflow_policy == OverflowPolicy.BLOCK and block:
+            self.metrics["blocked"] += 1
+            if self.condition.wait_for(lambda: len(lane) < self.max_size, timeout=self.block_timeout):
+                return None, False
+            raise queue.Full(f"Message queue full for {message.priority.name.lower()} priority")
+        
+        self.metrics["dropped"] += 1
+        # Responses complete requests already admitted, so evict the oldest other message
+        for index, slot in enumerate(lane):
+            if slot[0].message_type != MessageType.RESPONSE:
+                return self._pop_slot(lane, index), False
+        # Nothing but responses queued - refuse the incoming message instead
+        return message, True
+
+
+class AgentMailbox:
+    """Per-agent message queue drained by dedicated worker threads"""
+    
+    def __init__(self, agent: BaseAgent, worker_count: int = 1,
+                 message_queue: Optional[PriorityMessageQueue] = None):
+        self.agent = agent
+        self.queue = message_queue or PriorityMessageQueue()
+        self.worker_count = max(1, worker_count)
+        self.workers: List[threading.Thread] = []
+        self.running = False
+    
+    def put(self, message: AgentMessage):
+        """Queue a message for this agent - a worker never blocks on its own mailbox"""
+        self.queue.put(message, block=threading.current_thread() not in self.workers)
+    
+    def start(self):
+        """Start the worker threads"""
+        if self.running:
+            return
+        
+        self.running = True
+        for i in range(self.worker_count):
+            worker = threading.Thread(target=self._drain,
+                                      name=f"mailbox-{self.agent.agent_id}-{i}",
+                                      daemon=True)
+            worker.start()
+            self.workers.append(worker)
+    
+    def stop(self, timeout: float = 1.0):
+        """Stop the worker threads"""
+        self.running = False
+        for worker in self.workers:
+            worker.join(timeout=timeout)
+        self.workers = []
+    
+    def _drain(self):
+        """Worker loop - deliver queued messages to the agent"""
+        while self.running:
+            try:
+                message = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            try:
+                self.agent.handle_message(message)
+            except Exception as e:
+                print(f"Error in agent {self.agent.agent_id} handling {message.action}: {e}")
+
+
+class MessageHistory:
+    """
+    Fixed-capacity ring buffer of messages with secondary indexes.
+    Each message is stored once; indexes hold sequence numbers so eviction
+    of the oldest message is O(1) per index.
+    """
+    
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self.buffer: List[Optional[AgentMessage]] = [None] * capacity
+        self.next_seq = 0
+        self.by_agent: Dict[str, deque] = {}
+        self.by_action: Dict[str, deque] = {}
+        self.by_response_to: Dict[str, int] = {}
+        self.lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return min(self.next_seq, self.capacity)
+    
+    def append(self, message: AgentMessage):
+        """Store a message, evicting the oldest one when full"""
+        with self.lock:
+            seq = self.next_seq
+            slot = seq % self.capacity
+            evicted = self.buffer[slot]
+            if evicted is not None:
+                self._unindex(evicted, seq - self.capacity)
+            
+            self.buffer[slot] = message
+            self.next_seq += 1
+            
+            for agent_id in self._agent_keys(message):
+                self.by_agent.setdefault(agent_id, deque()).append(seq)
+            self.by_action.setdefault(message.action, deque()).append(seq)
+            if message.response_to:
+                self.by_response_to[message.response_to] = seq
+    
+    def recent(self, limit: int = 100, agent_id: Optional[str] = None,
+               action: Optional[str] = None) -> List[AgentMessage]:
+        """Get the most recent messages (oldest first), optionally for one agent or action"""
+        with self.lock:
+            if agent_id is not None:
+                seqs = self._tail(self.by_agent.get(agent_id), limit)
+            elif action is not None:
+                seqs = self._tail(self.by_action.get(action), limit)
+            else:
+                start = max(self.next_seq - min(limit, len(self)), 0)
+                seqs = range(start, self.next_seq)
+            return [self.buffer[seq % self.capacity] for seq in seqs]
+    
+    def find_response(self, message_id: str) -> Optional[AgentMessage]:
+        """Get the response to a message if it is still in history"""
+        with self.lock:
+            seq = self.by_response_to.get(message_id)
+            return self.buffer[seq % self.capacity] if seq is not None else None
+    
+    def _unindex(self, message: AgentMessage, seq: int):
+        """Drop an evicted message from the indexes - it is always the oldest entry"""
+        for agent_id in self._agent_keys(message):
+            self._pop_oldest(self.by_agent, agent_id, seq)
+        self._pop_oldest(self.by_action, message.action, seq)
+        if message.response_to and self.by_response_to.get(message.response_to) == seq:
+            del self.by_response_to[message.response_to]
+    
+    @staticmethod
+    def _pop_oldest(index: Dict[str, deque], key: str, seq: int):
+        seqs = index.get(key)
+        if seqs and seqs[0] == seq:
+            seqs.popleft()
+            if not seqs:
+                del index[key]
+    
+    @staticmethod
+    def _agent_keys(message: AgentMessage) -> List[str]:
+        if message.sender_id == message.receiver_id:
+            return [message.sender_id]
+        return [message.sender_id, message.receiver_id]
+    
+    @staticmethod
+    def _tail(seqs: Optional[deque], limit: int) -> List[int]:
+        if not seqs:
+            return []
+        # Walk from the right so the cost is limit, not the length of the index
+        tail = list(islice(reversed(seqs), max(limit, 0)))
+        tail.reverse()
+        return tail
+
+
+class LatencyHistogram:
+    """
+    HDR-style log-linear histogram of latencies in microseconds.
+    Every power-of-two range is split into 16 linear buckets, so any recorded value
+    is reproduced within ~6% while memory stays proportional to the value range.
+    """
+    
+    SUB_BUCKET_BITS = 5
+    SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+    HALF_BUCKETS = SUB_BUCKETS // 2
+    
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max = 0
+    
+    @classmethod
+    def _bucket_index(cls, value: int) -> int:
+        if value < cls.SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - cls.SUB_BUCKET_BITS
+        return cls.SUB_BUCKETS + (shift - 1) * cls.HALF_BUCKETS + (value >> shift) - cls.HALF_BUCKETS
+    
+    @classmethod
+    def _bucket_upper_bound(cls, index: int) -> int:
+        if index < cls.SUB_BUCKETS:
+            return index
+        shift = (index - cls.SUB_BUCKETS) // cls.HALF_BUCKETS + 1
+        mantissa = (index - cls.SUB_BUCKETS) % cls.HALF_BUCKETS + cls.HALF_BUCKETS
+        return ((mantissa + 1) << shift) - 1
+    
+    def record(self, seconds: float):
+        """Record one latency sample"""
+        value = max(int(seconds * 1_000_000), 0)
+        index = self._bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.min = value if self.min is None else min(self.min, value)
+    
+    def percentile(self, percent: float) -> float:
+        """Latency in milliseconds at or below which `percent` of samples fall"""
+        if not self.count:
+            return 0.0
+        threshold = max(1, int(round(self.count * percent / 100.0)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= threshold:
+                return min(self._bucket_upper_bound(index), self.max) / 1000.0
+        return self.max / 1000.0
+    
+    def summary(self) -> Dict[str, float]:
+        """Count, mean, percentiles and max in milliseconds"""
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count / 1000.0 if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max / 1000.0,
+            "total_ms": self.total / 1000.0
+        }
+
+
+class PerformanceMonitor:
+    """Latency histograms per (receiver_id, action) for queue wait, handler time and end-to-end requests"""
+    
+    METRICS = ("queue_wait", "handler", "end_to_end")
+    
+    def __init__(self):
+        self.enabled = True
+        self.histograms: Dict[tuple, LatencyHistogram] = {}
+        self.lock = threading.Lock()
+        # Optional callback(metric, receiver_id, action, seconds) for live tracing
+        self.trace_hook: Optional[Callable[[str, str, str, float], None]] = None
+    
+    def record(self, metric: str, receiver_id: str, action: str, seconds: float):
+        """Record one latency sample for an agent/action"""
+        if not self.enabled:
+            return
+        key = (receiver_id, action, metric)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = LatencyHistogram()
+            histogram.record(seconds)
+        if self.trace_hook:
+            self.trace_hook(metric, receiver_id, action, seconds)
+    
+    def get_report(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Summaries keyed by "receiver_id.action", then by metric"""
+        with self.lock:
+            items = [(key, histogram.summary()) for key, histogram in self.histograms.items()]
+        report: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for (receiver_id, action, metric), summary in sorted(items):
+            report.setdefault(f"{receiver_id}.{action}", {})[metric] = summary
+        return report
+    
+    def get_bottlenecks(self, metric: str = "handler", limit: int = 5) -> List[tuple]:
+        """(receiver_id.action, summary) pairs with the most total time spent in a metric"""
+        with self.lock:
+            items = [(f"{receiver_id}.{action}", histogram.summary())
+                     for (receiver_id, action, key_metric), histogram in self.histograms.items()
+                     if key_metric == metric]
+        return sorted(items, key=lambda item: item[1]["total_ms"], reverse=True)[:limit]
+    
+    def reset(self):
+        """Clear all histograms"""
+        with self.lock:
+            self.histograms = {}
+
+
+class RoutingTable:
+    """
+    Immutable snapshot of registered agents, mailboxes and broadcast subscriptions.
+    The bus never mutates a published table - writers build a new one and swap it in,
+    so delivery reads routes without taking the bus lock.
+    """
+    
+    __slots__ = ("agents", "mailboxes", "subscriptions")
+    
+    def __init__(self, agents: Optional[Dict[str, BaseAgent]] = None,
+                 mailboxes: Optional[Dict[str, 'AgentMailbox']] = None,
+                 subscriptions: Optional[Dict[str, frozenset]] = None):
+        self.agents: Dict[str, BaseAgent] = agents or {}
+        self.mailboxes: Dict[str, AgentMailbox] = mailboxes or {}
+        # Broadcast action -> subscribed agent ids ("*" subscribes to everything)
+        self.subscriptions: Dict[str, frozenset] = subscriptions or {}
+    
+    def replace(self, **changes) -> 'RoutingTable':
+        """Copy of this table with some fields replaced"""
+        fields = {name: getattr(self, name) for name in self.__slots__}
+        fields.update(changes)
+        return RoutingTable(**fields)
+    
+    def with_subscriber(self, actions, agent_id: str) -> 'RoutingTable':
+        """Copy of this table with agent_id subscribed to each action"""
+        subscriptions = dict(self.subscriptions)
+        for action in actions:
+            subscriptions[action] = subscriptions.get(action, frozenset()) | {agent_id}
+        return self.replace(subscriptions=subscriptions)
+    
+    def without_subscriber(self, actions, agent_id: str) -> 'RoutingTable':
+        """Copy of this table with agent_id unsubscribed from each action"""
+        subscriptions = dict(self.subscriptions)
+        for action in actions:
+            remaining = subscriptions.get(action, frozenset()) - {agent_id}
+            if remaining:
+                subscriptions[action] = remaining
+            else:
+                subscriptions.pop(action, None)
+        return self.replace(subscriptions=subscriptions)
+    
+    def target_ids(self, message: AgentMessage) -> List[str]:
+        """Resolve the agent ids a message should be delivered to"""
+        if message.receiver_id == "broadcast":
+            subscribers = (self.subscriptions.get(message.action, frozenset())
+                           | self.subscriptions.get("*", frozenset()))
+            return [agent_id for agent_id in subscribers if agent_id != message.sender_id]
+        return [message.receiver_id]
+    
+    def has_subscribers(self, action: str, exclude: Optional[str] = None) -> bool:
+        """Check whether any agent (other than `exclude`) would receive a broadcast of an action"""
+        for key in (action, "*"):
+            if any(agent_id != exclude for agent_id in self.subscriptions.get(key, ())):
+                return True
+        return False
+
+
 class MessageBus:
     """Central message bus for agent communication"""
     
-    def __init__(self):
-        self.agents: Dict[str, BaseAgent] = {}
-        self.message_queue = queue.Queue()
+    def __init__(self, dispatch_mode: Union[DispatchMode, str] = DispatchMode.SHARED,
+                 worker_pools: Optional[Dict[str, int]] = None,
+                 max_queue_size: int = 1000,
+                 overflow_policy: Union[OverflowPolicy, str] = OverflowPolicy.DROP_OLDEST,
+                 block_timeout: float = 5.0,
+                 codec: Optional[MessageCodec] = None):
+        # Copy-on-write routes - replaced as a whole under self.lock, read without it
+        self.routing = RoutingTable()
+        # Wire format for history export and cross-process transport
+        self.codec = codec or get_default_codec()
+        self.dispatch_mode = DispatchMode(dispatch_mode)
+        # Worker count per agent type in mailbox mode (default 1)
+        self.worker_pools = worker_pools or {}
+        # Bounded per-priority queues for the bus and every mailbox
+        self.max_queue_size = max_queue_size
+        self.overflow_policy = OverflowPolicy(overflow_policy)
+        self.block_timeout = block_timeout
+        # (receiver_id, action) pairs declared coalescible by receiving agents
+        self.coalesce_keys: Set[tuple] = set()
+        self.message_queue = self._create_queue()
         self.running = False
         self.processor_thread: Optional[threading.Thread] = None
+        # Serialises routing-table writers only; delivery never takes it
         self.lock = threading.RLock()
-        self.message_history: List[AgentMessage] = []
         self.max_history = 1000
+        self.message_history = MessageHistory(self.max_history)
+        # Futures for outstanding requests, keyed by request message id
+        self.pending_responses: Dict[str, Future] = {}
+        # request id -> (receiver_id, action, perf_counter at send) for end-to-end latency
+        self.pending_started: Dict[str, tuple] = {}
+        self.pending_lock = threading.Lock()
+        self.performance = PerformanceMonitor()
+        # Optional on-disk record of every message, for replaying sessions
+        self.journal: Optional[MessageJournal] = None
+        # Called synchronously with every STATE_CHANGED_ACTION message (e.g. to invalidate caches)
+        self.state_listeners: List[Callable[[AgentMessage], None]] = []
+    
+    @property
+    def agents(self) -> Dict[str, BaseAgent]:
+        """Registered agents (read-only snapshot)"""
+        return self.routing.agents
+    
+    @property
+    def mailboxes(self) -> Dict[str, 'AgentMailbox']:
+        """Agent mailboxes in mailbox mode (read-only snapshot)"""
+        return self.routing.mailboxes
+    
+    @property
+    def subscriptions(self) -> Dict[str, frozenset]:
+        """Broadcast subscriptions (read-only snapshot)"""
+        return self.routing.subscriptions
     
     def register_agent(self, agent: BaseAgent):
         """Register an agent with the message bus"""
         with self.lock:
-            self.agents[agent.agent_id] = agent
             agent.message_bus = self
+            routing = self.routing.with_subscriber(set(agent.message_handlers) | agent.subscriptions,
+                                                   agent.agent_id)
+            agents = dict(routing.agents)
+            agents[agent.agent_id] = agent
+            mailboxes = routing.mailboxes
+            mailbox = None
+            if self.dispatch_mode == DispatchMode.MAILBOX:
+                mailbox = AgentMailbox(agent, self.worker_pools.get(agent.agent_type, 1),
+                                       self._create_queue())
+                mailboxes = dict(mailboxes)
+                mailboxes[agent.agent_id] = mailbox
+            for action in agent.coalesce_actions:
+                self.coalesce_keys.add((agent.agent_id, action))
+            self.routing = routing.replace(agents=agents, mailboxes=mailboxes)
+            if mailbox and self.running:
+                mailbox.start()
     
     def unregister_agent(self, agent_id: str):
         """Unregister an agent from the message bus"""
         with self.lock:
-            if agent_id in self.agents:
-                del self.agents[agent_id]
+            routing = self.routing.without_subscriber(list(self.routing.subscriptions), agent_id)
+            agents = {k: v for k, v in routing.agents.items() if k != agent_id}
+            mailboxes = {k: v for k, v in routing.mailboxes.items() if k != agent_id}
+            mailbox = routing.mailboxes.get(agent_id)
+            self.coalesce_keys.difference_update([key for key in self.coalesce_keys if key[0] == agent_id])
+            self.routing = routing.replace(agents=agents, mailboxes=mailboxes)
+        if mailbox:
+            mailbox.stop()
+    
+    def subscribe(self, agent_id: str, action: str):
+        """Subscribe an agent to broadcasts of an action"""
+        with self.lock:
+            self.routing = self.routing.with_subscriber([action], agent_id)
+    
+    def unsubscribe(self, agent_id: str, action: str):
+        """Unsubscribe an agent from broadcasts of an action"""
+        with self.lock:
+            self.routing = self.routing.without_subscriber([action], agent_id)
+    
+    def has_subscribers(self, action: str, exclude: Optional[str] = None) -> bool:
+        """Check whether any agent (other than `exclude`) would receive a broadcast of an action"""
+        return self.routing.has_subscribers(action, exclude)
+    
+    def _create_queue(self) -> PriorityMessageQueue:
+        """Create a bounded queue using the bus overflow settings"""
+        message_queue = PriorityMessageQueue(self.max_queue_size, self.overflow_policy, self.block_timeout)
+        message_queue.on_discard = self._discard_message
+        message_queue.coalesce_keys = self.coalesce_keys
+        return message_queue
+    
+    def add_coalesced_action(self, receiver_id: str, action: str):
+        """Let a newer queued request for (receiver, action) replace an older undelivered one"""
+        with self.lock:
+            self.coalesce_keys.add((receiver_id, action))
+    
+    def _discard_message(self, message: AgentMessage):
+        """A queued message was dropped or coalesced - release anyone waiting on it"""
+        if message.message_type == MessageType.REQUEST:
+            self.cancel_request(message.id)
+    
+    def add_state_listener(self, listener: Callable[[AgentMessage], None]):
+        """Call listener(message) for every state change published by an agent, before its response"""
+        self.state_listeners = self.state_listeners + [listener]
+    
+    def remove_state_listener(self, listener: Callable[[AgentMessage], None]):
+        self.state_listeners = [l for l in self.state_listeners if l is not listener]
+    
+    def _notify_state_listeners(self, message: AgentMessage):
+        for listener in self.state_listeners:
+            try:
+                listener(message)
+            except Exception as e:
+                print(f"Error in state listener for {message.sender_id}: {e}")
     
     def send_message(self, message: AgentMessage):
         """Send a message through the bus"""
         # Store message immediately for synchronous access
         self._store_message(message)
-        self.message_queue.put(message)
+        if message.action == STATE_CHANGED_ACTION:
+            self._notify_state_listeners(message)
+        if self.dispatch_mode == DispatchMode.MAILBOX:
+            # Route straight into the target mailbox(es) so backpressure applies per agent
+            self._deliver_message(message)
+        else:
+            # The bus thread cannot wait for room in the queue it drains itself
+            self.message_queue.put(message, block=threading.current_thread() is not self.processor_thread)
+    
+    def send_request(self, message: AgentMessage) -> Future:
+        """Send a request and return a future completed when its response is delivered"""
+        future = Future()
+        with self.pending_lock:
+            self.pending_responses[message.id] = future
+            self.pending_started[message.id] = (message.receiver_id, message.action, time.perf_counter())
+        self.send_message(message)
+        return future
+    
+    def send_and_wait(self, message: AgentMessage, timeout: float = 5.0) -> Optional[AgentMessage]:
+        """Send a request and block until its response arrives or the timeout expires"""
+        future = self.send_request(message)
+        try:
+            return future.result(timeout=timeout)
+        except (FutureTimeoutError, CancelledError):
+            # Timed out, or the request was dropped/coalesced before delivery
+            return None
+        finally:
+            self.cancel_request(message.id)
+    
+    def cancel_request(self, message_id: str):
+        """Stop waiting for the response to a request"""
+        with self.pending_lock:
+            future = self.pending_responses.pop(message_id, None)
+            self.pending_started.pop(message_id, None)
+        if future and not future.done():
+            future.cancel()
     
     def start(self):
         """Start the message bus processor"""
         if self.running:
             return
         
-        self.running = True
+        with self.lock:
+            self.running = True
+            for mailbox in self.routing.mailboxes.values():
+                mailbox.start()
         self.processor_thread = threading.Thread(target=self._process_messages, daemon=True)
         self.processor_thread.start()
     
@@ -211,6 +1261,10 @@ class MessageBus:
         self.running = False
         if self.processor_thread:
             self.processor_thread.join(timeout=1.0)
+        for mailbox in self.routing.mailboxes.values():
+            mailbox.stop()
+        if self.journal:
+            self.journal.sync()
     
     def _process_messages(self):
         """Process messages in the queue"""
@@ -218,7 +1272,6 @@ class MessageBus:
             try:
                 message = self.message_queue.get(timeout=0.1)
                 self._deliver_message(message)
-                self._store_message(message)
             except queue.Empty:
                 continue
             except Exception as e:
@@ -226,48 +1279,522 @@ class MessageBus:
     
     def _deliver_message(self, message: AgentMessage):
         """Deliver a message to its target agent(s)"""
-        with self.lock:
-            if message.receiver_id == "broadcast":
-                # Broadcast to all agents except sender
-                for agent_id, agent in self.agents.items():
-                    if agent_id != message.sender_id:
-                        agent.handle_message(message)
-            else:
-                # Send to specific agent
-                target_agent = self.agents.get(message.receiver_id)
-                if target_agent:
-                    target_agent.handle_message(message)
+        if message.response_to:
+            self._complete_request(message)
+        
+        if self.dispatch_mode == DispatchMode.MAILBOX:
+            self._route_to_mailboxes(message)
+            return
+        
+        # Handlers run outside the lock against one routing snapshot, so a slow handler
+        # never holds up registration. Broadcasts only reach subscribers, never the sender
+        routing = self.routing
+        for agent_id in routing.target_ids(message):
+            target_agent = routing.agents.get(agent_id)
+            if target_agent:
+                target_agent.handle_message(message)
+    
+    def _route_to_mailboxes(self, message: AgentMessage):
+        """Hand a message to the mailbox(es) of its target agent(s) without running handlers"""
+        routing = self.routing
+        targets = [routing.mailboxes[agent_id] for agent_id in routing.target_ids(message)
+                   if agent_id in routing.mailboxes]
+        
+        for mailbox in targets:
+            mailbox.put(message)
+    
+    def get_queue_metrics(self) -> Dict[str, Any]:
+        """Depth and dropped/coalesced/blocked counters for the bus queue and each mailbox"""
+        mailboxes = self.routing.mailboxes
+        return {
+            "main": self.message_queue.get_metrics(),
+            "mailboxes": {agent_id: mailbox.queue.get_metrics() for agent_id, mailbox in mailboxes.items()}
+        }
+    
+    def get_mailbox_sizes(self) -> Dict[str, int]:
+        """Get the number of queued messages per agent mailbox"""
+        return {agent_id: mailbox.queue.qsize() for agent_id, mailbox in self.routing.mailboxes.items()}
+    
+    def _complete_request(self, response: AgentMessage):
+        """Wake up the caller waiting on the request this message responds to"""
+        with self.pending_lock:
+            future = self.pending_responses.pop(response.response_to, None)
+            started = self.pending_started.pop(response.response_to, None)
+        if started:
+            receiver_id, action, sent_at = started
+            self.performance.record("end_to_end", receiver_id, action, time.perf_counter() - sent_at)
+        if future and not future.done():
+            future.set_result(response)
     
     def _store_message(self, message: AgentMessage):
-        """Store message in history"""
+        """Store message in history (and the journal, if one is open)"""
         self.message_history.append(message)
-        if len(self.message_history) > self.max_history:
-            self.message_history.pop(0)
+        journal = self.journal
+        if journal:
+            journal.append(message)
+    
+    def start_journal(self, path: str, **journal_options) -> MessageJournal:
+        """Start recording every message sent through the bus to an append-only journal"""
+        self.stop_journal()
+        journal_options.setdefault("codec", self.codec)
+        self.journal = MessageJournal(path, **journal_options)
+        return self.journal
+    
+    def stop_journal(self):
+        """Stop recording and close the journal"""
+        journal, self.journal = self.journal, None
+        if journal:
+            journal.close()
     
     def get_message_history(self, agent_id: Optional[str] = None, 
-                          limit: int = 100) -> List[Dict[str, Any]]:
-        """Get message history, optionally filtered by agent"""
-        messages = self.message_history[-limit:]
-        if agent_id:
-            messages = [m for m in messages 
-                       if m.sender_id == agent_id or m.receiver_id == agent_id]
+                          limit: int = 100, action: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get the last `limit` messages, optionally only those sent to/from an agent or for an action"""
+        messages = self.message_history.recent(limit=limit, agent_id=agent_id, action=action)
         return [m.to_dict() for m in messages]
+    
+    def find_response(self, message_id: str) -> Optional[AgentMessage]:
+        """Look up the response to a message in history"""
+        return self.message_history.find_response(message_id)
+    
+    def export_history(self, agent_id: Optional[str] = None, limit: int = 1000,
+                       action: Optional[str] = None) -> bytes:
+        """Export recent history as length-prefixed records in the bus codec"""
+        messages = self.message_history.recent(limit=limit, agent_id=agent_id, action=action)
+        return self.codec.encode_stream(messages)
+
+
+class AsyncMessageBus(MessageBus):
+    """
+    Message bus built on an asyncio event loop, sharing the threaded bus's priority lanes,
+    coalescing and overflow policy. Coroutine handlers run directly on the loop and deliveries
+    proceed concurrently (at most max_in_flight at a time, so a backlog stays in the lanes);
+    plain handlers run in the loop's default executor, one at a time per agent.
+    """
+    
+    def __init__(self, max_queue_size: int = 1000,
+                 overflow_policy: Union[OverflowPolicy, str] = OverflowPolicy.DROP_OLDEST,
+                 block_timeout: float = 5.0,
+                 codec: Optional[MessageCodec] = None,
+                 max_in_flight: int = 64):
+        super().__init__(max_queue_size=max_queue_size, overflow_policy=overflow_policy,
+                         block_timeout=block_timeout, codec=codec)
+        self.max_in_flight = max_in_flight
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.processor_task: Optional[asyncio.Task] = None
+        self.delivery_tasks: Set[asyncio.Task] = set()
+        self.delivery_slots: Optional[asyncio.Semaphore] = None
+        self.agent_locks: Dict[str, asyncio.Lock] = {}
+    
+    def send_message(self, message: AgentMessage):
+        """Send a message through the bus - safe to call from any thread, and before start()"""
+        self._store_message(message)
+        if message.action == STATE_CHANGED_ACTION:
+            self._notify_state_listeners(message)
+        # The loop cannot wait for room in the queue it drains itself
+        self.message_queue.put(message, block=not self._on_loop())
+    
+    def _on_loop(self) -> bool:
+        try:
+            return self.loop is not None and asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+    
+    async def start(self):
+        """Start the message bus on the running event loop"""
+        if self.running:
+            return
+        
+        self.loop = asyncio.get_running_loop()
+        self.delivery_slots = asyncio.Semaphore(self.max_in_flight)
+        self.running = True
+        self.processor_task = asyncio.create_task(self._process_messages())
+    
+    async def stop(self):
+        """Stop the message bus and cancel in-flight deliveries"""
+        self.running = False
+        if self.processor_task:
+            # Let the current queue wait time out rather than lose a message it is taking
+            await asyncio.gather(self.processor_task, return_exceptions=True)
+            self.processor_task = None
+        tasks = list(self.delivery_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.journal:
+            self.journal.sync()
+    
+    async def send_and_wait(self, message: AgentMessage, timeout: float = 5.0) -> Optional[AgentMessage]:
+        """Send a request and await its response, or None on timeout or if it was dropped/coalesced"""
+        bus_future = self.send_request(message)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(bus_future), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        except asyncio.CancelledError:
+            # The request was dropped/coalesced on the bus, not this task cancelled
+            if bus_future.cancelled():
+                return None
+            raise
+        finally:
+            self.cancel_request(message.id)
+    
+    async def _process_messages(self):
+        """Take messages off the priority queue and deliver each one in its own task"""
+        while self.running:
+            await self.delivery_slots.acquire()
+            message = await self.loop.run_in_executor(None, self._next_message)
+            if message is None:
+                self.delivery_slots.release()
+                continue
+            task = asyncio.create_task(self._deliver_message(message))
+            self.delivery_tasks.add(task)
+            task.add_done_callback(self._delivery_done)
+    
+    def _next_message(self) -> Optional[AgentMessage]:
+        try:
+            return self.message_queue.get(timeout=0.1)
+        except queue.Empty:
+            return None
+    
+    def _delivery_done(self, task: asyncio.Task):
+        self.delivery_tasks.discard(task)
+        self.delivery_slots.release()
+    
+    async def _deliver_message(self, message: AgentMessage):
+        """Deliver a message to its target agent(s)"""
+        if message.response_to:
+            self._complete_request(message)
+        
+        routing = self.routing
+        targets = [routing.agents[agent_id] for agent_id in routing.target_ids(message)
+                   if agent_id in routing.agents]
+        
+        await asyncio.gather(*(self._deliver_to_agent(agent, message) for agent in targets))
+    
+    async def _deliver_to_agent(self, agent: BaseAgent, message: AgentMessage):
+        """Run an agent's handler for a message without blocking the loop"""
+        try:
+            handler = agent.message_handlers.get(message.action)
+            if handler and inspect.iscoroutinefunction(handler):
+                await agent.handle_message_async(message)
+            else:
+                lock = self.agent_locks.setdefault(agent.agent_id, asyncio.Lock())
+                async with lock:
+                    await self.loop.run_in_executor(None, agent.handle_message, message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error processing message: {e}")
+
+
+class AgentScheduler:
+    """
+    Deadline scheduler for agent ticks and one-shot timers, kept as a min-heap.
+    The orchestrator sleeps until time_until_next() instead of sweeping every agent.
+    """
+    
+    def __init__(self):
+        self.heap: List[tuple] = []
+        self.sequence = itertools.count()
+        # agent_id -> sequence number of its live tick entry; older entries are stale
+        self.tick_entries: Dict[str, int] = {}
+        # Timers still in the heap; only these can be cancelled
+        self.pending_timers: Set[int] = set()
+        self.cancelled_timers: Set[int] = set()
+        self.lock = threading.Lock()
+        # Called whenever a new deadline is added, so a sleeping loop can wake up
+        self.on_change: Optional[Callable[[], None]] = None
+    
+    def schedule_ticks(self, agent: BaseAgent, period: Optional[float]):
+        """(Re)schedule periodic process_tick calls for an agent; a period <= 0 stops them"""
+        with self.lock:
+            self.tick_entries.pop(agent.agent_id, None)
+            if not period or period <= 0:
+                return
+            seq = next(self.sequence)
+            self.tick_entries[agent.agent_id] = seq
+            heapq.heappush(self.heap, (time.monotonic(), seq, agent, period, None, agent.agent_id))
+        self._notify()
+    
+    def unschedule_ticks(self, agent_id: str):
+        """Stop periodic ticks for an agent"""
+        with self.lock:
+            self.tick_entries.pop(agent_id, None)
+    
+    def schedule_timer(self, delay: float, callback: Callable[[], Any], owner: str = "") -> int:
+        """Run callback once after delay seconds; returns a timer id"""
+        with self.lock:
+            seq = next(self.sequence)
+            heapq.heappush(self.heap, (time.monotonic() + delay, seq, None, None, callback, owner))
+            self.pending_timers.add(seq)
+        self._notify()
+        return seq
+    
+    def cancel_timer(self, timer_id: int):
+        """Cancel a pending timer; ids of timers that already fired are ignored"""
+        with self.lock:
+            if timer_id in self.pending_timers:
+                self.cancelled_timers.add(timer_id)
+    
+    def pop_due(self) -> List[tuple]:
+        """Remove and return (owner, job) pairs for every tick and timer that is due"""
+        due_jobs = []
+        with self.lock:
+            now = time.monotonic()
+            while self.heap and self.heap[0][0] <= now:
+                due, seq, agent, period, callback, owner = heapq.heappop(self.heap)
+                if agent is not None:
+                    if self.tick_entries.get(agent.agent_id) != seq:
+                        continue
+                    # Keep the cadence, but don't burst to catch up after a slow tick
+                    next_due = due + period if due + period > now else now + period
+                    next_seq = next(self.sequence)
+                    self.tick_entries[agent.agent_id] = next_seq
+                    heapq.heappush(self.heap, (next_due, next_seq, agent, period, None, owner))
+                    if agent.running:
+                        due_jobs.append((owner, agent.process_tick))
+                else:
+                    self.pending_timers.discard(seq)
+                    if seq in self.cancelled_timers:
+                        self.cancelled_timers.discard(seq)
+                    else:
+                        due_jobs.append((owner, callback))
+        return due_jobs
+    
+    def time_until_next(self) -> Optional[float]:
+        """Seconds until the next deadline, or None if nothing is scheduled"""
+        with self.lock:
+            if not self.heap:
+                return None
+            return max(self.heap[0][0] - time.monotonic(), 0.0)
+    
+    def _notify(self):
+        if self.on_change:
+            self.on_change()
+
+
+class AgentPlacement(Enum):
+    """Where the orchestrator runs an agent"""
+    LOCAL = "local"      # In the orchestrator's own process
+    PROCESS = "process"  # In a dedicated worker process, messages travel over a pipe
+
+
+# One-byte frame kinds on an agent worker pipe
+_FRAME_MESSAGE = b"M"
+_FRAME_SUBSCRIBE = b"S"
+_FRAME_UNSUBSCRIBE = b"U"
+_FRAME_STOP = b"X"
+
+
+class PipeMessageBus:
+    """Stand-in message bus inside an agent worker process - forwards traffic to the parent over a pipe"""
+    
+    # Latency is measured on the parent bus (end-to-end) only
+    performance = None
+    
+    def __init__(self, conn, codec: MessageCodec):
+        self.conn = conn
+        self.codec = codec
+    
+    def send_message(self, message: AgentMessage):
+        self.conn.send_bytes(_FRAME_MESSAGE + self.codec.encode(message))
+    
+    def subscribe(self, agent_id: str, action: str):
+        self.conn.send_bytes(_FRAME_SUBSCRIBE + action.encode("utf-8"))
+    
+    def unsubscribe(self, agent_id: str, action: str):
+        self.conn.send_bytes(_FRAME_UNSUBSCRIBE + action.encode("utf-8"))
+    
+    def has_subscribers(self, action: str, exclude: Optional[str] = None) -> bool:
+        # The parent bus filters broadcasts by subscription
+        return True
+
+
+def _run_agent_process(agent: BaseAgent, conn, tick_period: Optional[float], codec: MessageCodec):
+    """Worker process entry point: deliver piped messages to the agent and run its ticks and timers"""
+    agent.message_bus = PipeMessageBus(conn, codec)
+    agent.scheduler = AgentScheduler()
+    agent.scheduler.schedule_ticks(agent, tick_period)
+    agent.start()
+    
+    try:
+        while agent.running:
+            delay = agent.scheduler.time_until_next()
+            if conn.poll(1.0 if delay is None else delay):
+                frame = conn.recv_bytes()
+                if frame[:1] == _FRAME_STOP:
+                    break
+                try:
+                    agent.handle_message(codec.decode(memoryview(frame)[1:]))
+                except Exception as e:
+                    print(f"Error in agent {agent.agent_id}: {e}")
+            
+            for owner, job in agent.scheduler.pop_due():
+                try:
+                    job()
+                except Exception as e:
+                    print(f"Error in agent {owner}: {e}")
+    except (EOFError, OSError, KeyboardInterrupt):
+        pass  # Parent went away
+    finally:
+        agent.stop()
+        conn.close()
+
+
+class RemoteAgentProxy(BaseAgent):
+    """
+    Parent-side stand-in for an agent hosted in a worker process.
+    Messages are forwarded encoded with the bus codec, so message data must be codec-serialisable.
+    The wrapped agent object stays in the parent only as the template the worker starts from.
+    """
+    
+    # The worker process runs the agent's own ticks and timers
+    tick_period = 0
+    
+    def __init__(self, agent: BaseAgent, tick_period: Optional[float] = None,
+                 codec: Optional[MessageCodec] = None):
+        self.remote_agent = agent
+        self.remote_tick_period = tick_period
+        self.codec = codec or get_default_codec()
+        super().__init__(agent.agent_id, agent.agent_type)
+        self.subscriptions = set(agent.subscriptions)
+        self.coalesce_actions = agent.coalesce_actions
+        self.process = None
+        self.conn = None
+        self.send_lock = threading.Lock()
+        self.reader_thread: Optional[threading.Thread] = None
+    
+    def _setup_handlers(self):
+        # Mirror the remote handler names so routing and status reports see them
+        for action in self.remote_agent.message_handlers:
+            self.message_handlers[action] = self.handle_message
+        # The worker publishes its own state changes; callers still need to know what is cacheable
+        self.cacheable_actions = self.remote_agent.cacheable_actions
+        self.mutating_actions = self.remote_agent.mutating_actions
+    
+    def handle_message(self, message: AgentMessage) -> Optional[Dict[str, Any]]:
+        """Forward a message to the worker process; any response arrives through the bus"""
+        if not self.conn:
+            print(f"Agent {self.agent_id} worker process is not running")
+            return None
+        try:
+            with self.send_lock:
+                self.conn.send_bytes(_FRAME_MESSAGE + self.codec.encode(message))
+        except (OSError, ValueError) as e:
+            print(f"Error forwarding message to agent {self.agent_id}: {e}")
+        return None
+    
+    def start(self):
+        """Start the worker process hosting the agent"""
+        if self.running:
+            return
+        super().start()
+        
+        import multiprocessing
+        # fork lets agents holding locks or clients start without being pickled
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+        else:
+            context = multiprocessing.get_context()
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_run_agent_process,
+                                       args=(self.remote_agent, child_conn, self.remote_tick_period,
+                                             self.codec),
+                                       name=f"agent-{self.agent_id}", daemon=True)
+        self.process.start()
+        child_conn.close()
+        
+        self.reader_thread = threading.Thread(target=self._read_from_worker,
+                                              name=f"agent-reader-{self.agent_id}", daemon=True)
+        self.reader_thread.start()
+    
+    def stop(self, timeout: float = 2.0):
+        """Ask the worker process to stop, terminating it if it doesn't exit in time"""
+        if not self.running:
+            return
+        super().stop()
+        
+        try:
+            with self.send_lock:
+                self.conn.send_bytes(_FRAME_STOP)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=timeout)
+        if self.reader_thread:
+            self.reader_thread.join(timeout=timeout)
+        self.conn.close()
+        self.conn = None
+    
+    def _read_from_worker(self):
+        """Inject messages and subscription changes from the worker into the parent bus"""
+        while self.running:
+            try:
+                if not self.conn.poll(0.1):
+                    continue
+                frame = self.conn.recv_bytes()
+            except (EOFError, OSError):
+                break
+            
+            if not self.message_bus:
+                continue
+            kind, payload = frame[:1], memoryview(frame)[1:]
+            if kind == _FRAME_MESSAGE:
+                self.message_bus.send_message(self.codec.decode(payload))
+            elif kind == _FRAME_SUBSCRIBE:
+                self.message_bus.subscribe(self.agent_id, str(payload, "utf-8"))
+            elif kind == _FRAME_UNSUBSCRIBE:
+                self.message_bus.unsubscribe(self.agent_id, str(payload, "utf-8"))
+    
+    def process_tick(self):
+        pass
 
 
 class AgentOrchestrator:
     """Orchestrator for managing multiple agents and their interactions"""
     
-    def __init__(self):
-        self.message_bus = MessageBus()
+    def __init__(self, dispatch_mode: Union[DispatchMode, str] = DispatchMode.SHARED,
+                 worker_pools: Optional[Dict[str, int]] = None,
+                 max_queue_size: int = 1000,
+                 overflow_policy: Union[OverflowPolicy, str] = OverflowPolicy.DROP_OLDEST,
+                 placement: Optional[Dict[str, Union[AgentPlacement, str]]] = None,
+                 codec: Optional[MessageCodec] = None):
+        self.message_bus = self._create_bus(dispatch_mode=dispatch_mode, worker_pools=worker_pools,
+                                            max_queue_size=max_queue_size, overflow_policy=overflow_policy,
+                                            codec=codec)
         self.agents: Dict[str, BaseAgent] = {}
-        self.tick_interval = 0.1  # seconds
+        # agent_id -> placement; agents not listed run locally
+        self.placement: Dict[str, AgentPlacement] = {
+            agent_id: AgentPlacement(where) for agent_id, where in (placement or {}).items()
+        }
+        self.tick_interval = 0.1  # seconds, for agents that don't declare a tick_period
+        self.max_idle_wait = 1.0  # seconds to sleep when nothing is scheduled
         self.running = False
         self.orchestrator_thread: Optional[threading.Thread] = None
+        self.scheduler = AgentScheduler()
+        self.wakeup = threading.Event()
+        self.scheduler.on_change = self.wakeup.set
+    
+    def _create_bus(self, **bus_options) -> MessageBus:
+        return MessageBus(**bus_options)
     
     def register_agent(self, agent: BaseAgent):
-        """Register an agent with the orchestrator"""
+        """Register an agent with the orchestrator, hosting it in a worker process if placed there"""
+        if self.placement.get(agent.agent_id) == AgentPlacement.PROCESS:
+            period = agent.tick_period if agent.tick_period is not None else self.tick_interval
+            agent = RemoteAgentProxy(agent, tick_period=period, codec=self.message_bus.codec)
         self.agents[agent.agent_id] = agent
         self.message_bus.register_agent(agent)
+        agent.scheduler = self.scheduler
+        if self.running:
+            self._schedule_agent_ticks(agent)
+    
+    def _schedule_agent_ticks(self, agent: BaseAgent):
+        """Schedule an agent's process_tick according to its declared tick_period"""
+        period = agent.tick_period if agent.tick_period is not None else self.tick_interval
+        self.scheduler.schedule_ticks(agent, period)
     
     def start(self):
         """Start the orchestrator and all agents"""
@@ -275,12 +1802,15 @@ class AgentOrchestrator:
             return
         
         self.running = True
-        self.message_bus.start()
         
-        # Start all agents
+        # Start agents before the bus threads so worker processes fork from a quiet parent
         for agent in self.agents.values():
             agent.start()
         
+        self.message_bus.start()
+        for agent in self.agents.values():
+            self._schedule_agent_ticks(agent)
+        
         # Start orchestrator loop
         self.orchestrator_thread = threading.Thread(target=self._orchestrator_loop, daemon=True)
         self.orchestrator_thread.start()
@@ -297,41 +1827,63 @@ class AgentOrchestrator:
         self.message_bus.stop()
         
         # Wait for orchestrator thread
+        self.wakeup.set()
         if self.orchestrator_thread:
             self.orchestrator_thread.join(timeout=1.0)
     
     def _orchestrator_loop(self):
-        """Main orchestrator loop"""
+        """Main orchestrator loop - sleeps until the next agent tick or timer is due"""
         while self.running:
-            # Give each agent a chance to process
-            for agent in self.agents.values():
-                if agent.running:
-                    try:
-                        agent.process_tick()
-                    except Exception as e:
-                        print(f"Error in agent {agent.agent_id}: {e}")
+            self.wakeup.clear()
+            for owner, job in self.scheduler.pop_due():
+                try:
+                    job()
+                except Exception as e:
+                    print(f"Error in agent {owner}: {e}")
             
-            time.sleep(self.tick_interval)
+            delay = self.scheduler.time_until_next()
+            self.wakeup.wait(timeout=self.max_idle_wait if delay is None else delay)
     
     def send_message_to_agent(self, receiver_id: str, action: str, data: Dict[str, Any]) -> str:
         """Send a message to a specific agent from the orchestrator"""
         message = AgentMessage(
-            id=str(uuid.uuid4()),
+            id=new_message_id(),
             sender_id="orchestrator",
             receiver_id=receiver_id,
             message_type=MessageType.REQUEST,
             action=action,
             data=data,
-            timestamp=time.time()
+            timestamp=time.time(),
+            priority=MessagePriority.INTERACTIVE
         )
         
         self.message_bus.send_message(message)
         return message.id
     
+    def send_and_wait(self, receiver_id: str, action: str, data: Dict[str, Any],
+                      timeout: float = 5.0) -> Optional[Dict[str, Any]]:
+        """Send a request to an agent and return the response data, or None on timeout"""
+        message = AgentMessage(
+            id=new_message_id(),
+            sender_id="orchestrator",
+            receiver_id=receiver_id,
+            message_type=MessageType.REQUEST,
+            action=action,
+            data=data,
+            timestamp=time.time(),
+            priority=MessagePriority.INTERACTIVE
+        )
+        
+        response = self.message_bus.send_and_wait(message, timeout=timeout)
+        return response.data if response else None
+    
     def broadcast_event(self, action: str, data: Dict[str, Any]):
-        """Broadcast an event to all agents"""
+        """Broadcast an event to all agents subscribed to the action"""
+        if not self.message_bus.has_subscribers(action):
+            return
+        
         message = AgentMessage(
-            id=str(uuid.uuid4()),
+            id=new_message_id(),
             sender_id="orchestrator",
             receiver_id="broadcast",
             message_type=MessageType.BROADCAST,
@@ -346,17 +1898,170 @@ class AgentOrchestrator:
         """Get status of all registered agents"""
         status = {}
         for agent_id, agent in self.agents.items():
+            if isinstance(agent, RemoteAgentProxy):
+                tick_period = agent.remote_tick_period
+            else:
+                tick_period = agent.tick_period if agent.tick_period is not None else self.tick_interval
             status[agent_id] = {
                 "agent_type": agent.agent_type,
                 "running": agent.running,
+                "tick_period": tick_period,
+                "placement": self.placement.get(agent_id, AgentPlacement.LOCAL).value,
                 "handlers": list(agent.message_handlers.keys())
             }
         return status
     
+    def scatter_gather(self, requests: List[tuple], timeout: float = 5.0) -> List[Optional[Dict[str, Any]]]:
+        """Send (receiver_id, action, data) requests to several agents at once and wait until all
+        have replied or the shared deadline passes; returns response data in order (None if missing)"""
+        futures = []
+        for receiver_id, action, data in requests:
+            message = AgentMessage(
+                id=new_message_id(),
+                sender_id="orchestrator",
+                receiver_id=receiver_id,
+                message_type=MessageType.REQUEST,
+                action=action,
+                data=data,
+                timestamp=time.time(),
+                priority=MessagePriority.INTERACTIVE
+            )
+            futures.append((message.id, self.message_bus.send_request(message)))
+        
+        wait_for_futures([future for _, future in futures], timeout=timeout)
+        
+        results = []
+        for message_id, future in futures:
+            if future.done() and not future.cancelled():
+                results.append(future.result().data)
+            else:
+                self.message_bus.cancel_request(message_id)
+                results.append(None)
+        return results
+    
+    def send_batch_and_wait(self, receiver_id: str, requests: List[tuple], timeout: float = 5.0,
+                            stop_on_error: bool = False) -> Optional[List[Optional[Dict[str, Any]]]]:
+        """Send several (action, data) requests to one agent as a single batch message;
+        returns their results in order, or None on timeout"""
+        response = self.send_and_wait(receiver_id, BATCH_ACTION,
+                                      batch_request_data(requests, stop_on_error), timeout=timeout)
+        return response.get("results") if response else None
+    
+    def get_performance_report(self, limit: int = 5) -> Dict[str, Any]:
+        """Latency histograms per agent/action plus the agents/actions with the most handler time"""
+        monitor = self.message_bus.performance
+        return {
+            "latency": monitor.get_report(),
+            "bottlenecks": [{"target": target, **summary}
+                            for target, summary in monitor.get_bottlenecks("handler", limit)]
+        }
+    
     def get_message_statistics(self) -> Dict[str, Any]:
         """Get message bus statistics"""
-        return {
+        stats = {
             "total_messages": len(self.message_bus.message_history),
             "queue_size": self.message_bus.message_queue.qsize(),
-            "registered_agents": len(self.agents)
-        }
\ No newline at end of file
+            "registered_agents": len(self.agents),
+            "dispatch_mode": self.message_bus.dispatch_mode.value,
+            "queue_metrics": self.message_bus.get_queue_metrics()
+        }
+        if self.message_bus.dispatch_mode == DispatchMode.MAILBOX:
+            stats["mailbox_sizes"] = self.message_bus.get_mailbox_sizes()
+        return stats
+
+
+class AsyncAgentOrchestrator(AgentOrchestrator):
+    """Orchestrator that runs the message bus and agent ticks on an asyncio event loop"""
+    
+    def __init__(self, max_queue_size: int = 1000,
+                 overflow_policy: Union[OverflowPolicy, str] = OverflowPolicy.DROP_OLDEST,
+                 codec: Optional[MessageCodec] = None):
+        super().__init__(max_queue_size=max_queue_size, overflow_policy=overflow_policy, codec=codec)
+        self.orchestrator_task: Optional[asyncio.Task] = None
+        self.async_wakeup: Optional[asyncio.Event] = None
+    
+    def _create_bus(self, **bus_options) -> AsyncMessageBus:
+        # Agents share the loop, so there are no mailboxes or worker pools
+        return AsyncMessageBus(max_queue_size=bus_options["max_queue_size"],
+                               overflow_policy=bus_options["overflow_policy"], codec=bus_options["codec"])
+    
+    async def start(self):
+        """Start the orchestrator and all agents on the running event loop"""
+        if self.running:
+            return
+        
+        self.running = True
+        await self.message_bus.start()
+        
+        loop = asyncio.get_running_loop()
+        self.async_wakeup = asyncio.Event()
+        self.scheduler.on_change = lambda: loop.call_soon_threadsafe(self.async_wakeup.set)
+        
+        for agent in self.agents.values():
+            agent.start()
+            self._schedule_agent_ticks(agent)
+        
+        self.orchestrator_task = asyncio.create_task(self._orchestrator_loop())
+    
+    async def stop(self):
+        """Stop the orchestrator and all agents"""
+        self.running = False
+        
+        for agent in self.agents.values():
+            agent.stop()
+        
+        if self.orchestrator_task:
+            self.orchestrator_task.cancel()
+            await asyncio.gather(self.orchestrator_task, return_exceptions=True)
+            self.orchestrator_task = None
+        self.scheduler.on_change = None
+        
+        await self.message_bus.stop()
+    
+    async def _orchestrator_loop(self):
+        """Main orchestrator loop - process_tick and timer callbacks may be coroutines"""
+        while self.running:
+            self.async_wakeup.clear()
+            for owner, job in self.scheduler.pop_due():
+                try:
+                    result = job()
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception as e:
+                    print(f"Error in agent {owner}: {e}")
+            
+            delay = self.scheduler.time_until_next()
+            try:
+                await asyncio.wait_for(self.async_wakeup.wait(),
+                                       timeout=self.max_idle_wait if delay is None else delay)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def send_and_wait(self, receiver_id: str, action: str, data: Dict[str, Any],
+                            timeout: float = 5.0) -> Optional[Dict[str, Any]]:
+        """Send a request to an agent and await the response data, or None on timeout"""
+        message = AgentMessage(
+            id=new_message_id(),
+            sender_id="orchestrator",
+            receiver_id=receiver_id,
+            message_type=MessageType.REQUEST,
+            action=action,
+            data=data,
+            timestamp=time.time(),
+            priority=MessagePriority.INTERACTIVE
+        )
+        
+        response = await self.message_bus.send_and_wait(message, timeout=timeout)
+        return response.data if response else None
+    
+    async def scatter_gather(self, requests: List[tuple], timeout: float = 5.0) -> List[Optional[Dict[str, Any]]]:
+        """Awaitable scatter-gather - see AgentOrchestrator.scatter_gather"""
+        return list(await asyncio.gather(*(self.send_and_wait(receiver_id, action, data, timeout=timeout)
+                                           for receiver_id, action, data in requests)))
+    
+    async def send_batch_and_wait(self, receiver_id: str, requests: List[tuple], timeout: float = 5.0,
+                                  stop_on_error: bool = False) -> Optional[List[Optional[Dict[str, Any]]]]:
+        """Awaitable batch request - see AgentOrchestrator.send_batch_and_wait"""
+        response = await self.send_and_wait(receiver_id, BATCH_ACTION,
+                                            batch_request_data(requests, stop_on_error), timeout=timeout)
+        return response.get("results") if response else None
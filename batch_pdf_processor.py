@@ -14,6 +14,8 @@ from haystack_integrations.document_stores.qdrant import QdrantDocumentStore
 from qdrant_client import QdrantClient
 from qdrant_client.models import Distance, VectorParams
 
+from response_cache import bump_ingestion_version
+
 
 def clear_qdrant_collection(collection_name: str, host: str = "localhost", port: int = 6333):
     """Clear all documents from a Qdrant collection"""
@@ -348,6 +350,8 @@ def process_all_documents(root_folder, use_qdrant=True, collection_name="dnd_doc
         print(f"✓ Total document chunks: {len(all_documents)}")
         # print(f"✓ Text output saved: {output_filename}")
         if document_store:
+            # Lets persistent response caches know their RAG answers are stale
+            bump_ingestion_version(collection_name)
             print(f"✓ Documents stored in Qdrant collection: {collection_name}")
         else:
             print(f"⚠️  Vector storage skipped (Qdrant not available)")
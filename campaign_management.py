@@ -472,6 +472,12 @@ class CampaignLoader:
 class CampaignManagerAgent(BaseAgent):
     """Campaign Manager agent for handling campaign and player operations"""
     
+    # Purely reactive - no periodic process_tick needed
+    tick_period = 0
+    cacheable_actions = {"list_campaigns", "get_campaign_info", "list_players", "get_player_info",
+                         "get_campaign_context"}
+    mutating_actions = {"select_campaign", "add_player_to_game"}
+    
     def __init__(self, campaigns_dir: str = "docs/current_campaign", players_dir: str = "docs/players"):
         super().__init__("campaign_manager", "CampaignManager")
         self.campaigns_dir = Path(campaigns_dir)
@@ -11,6 +11,11 @@ from agent_framework import BaseAgent
 class CharacterManagerAgent(BaseAgent):
     """Agent for managing D&D character creation, progression, and stats"""
     
+    # Purely reactive - no periodic process_tick needed
+    tick_period = 0
+    cacheable_actions = {"get_character", "list_characters", "get_character_stats", "calculate_modifier"}
+    mutating_actions = {"create_character", "update_character", "level_up_character", "update_ability_scores"}
+    
     def __init__(self, characters_dir: str = "docs/characters", verbose: bool = False):
         super().__init__("character_manager", "character_manager")
         self.characters_dir = characters_dir
@@ -517,6 +517,12 @@ class CombatEngine:
 class CombatEngineAgent(BaseAgent):
     """Combat Engine Agent that provides combat services to other agents"""
     
+    # Purely reactive - no periodic process_tick needed
+    tick_period = 0
+    cacheable_actions = {"get_combat_status"}
+    mutating_actions = {"add_combatant", "start_combat", "make_attack", "cast_spell", "next_turn", "end_turn",
+                        "end_combat", "apply_damage", "apply_healing", "add_condition", "remove_condition"}
+    
     def __init__(self, dice_roller: Optional[DiceRoller] = None):
         super().__init__("combat_engine", "CombatEngine")
         self.combat_engine = CombatEngine(dice_roller)
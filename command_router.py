@@ -0,0 +1,144 @@
+"""
+Command Router for DM Assistant
+Finds every command pattern in DM input with one Aho-Corasick pass and picks a route by precedence
+"""
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional, Set
+
+
+@dataclass
+class Route:
+    """Where matching input is sent. A pattern route matches when its pattern occurs in the input;
+    a keyword route matches when any_of (and all of all_of, and none of none_of) occur"""
+    target: Any
+    priority: int
+    pattern: Optional[str] = None
+    any_of: FrozenSet[str] = field(default_factory=frozenset)
+    all_of: FrozenSet[str] = field(default_factory=frozenset)
+    none_of: FrozenSet[str] = field(default_factory=frozenset)
+
+    def matches(self, found: Set[str]) -> bool:
+        if self.pattern is not None:
+            return self.pattern in found
+        return (not self.any_of.isdisjoint(found) and self.all_of <= found
+                and self.none_of.isdisjoint(found))
+
+
+class CommandRouter:
+    """
+    Routes text to the highest-precedence route whose patterns occur in it.
+    Lower priority values win; routes added without a priority rank in the order added,
+    so overlapping patterns always resolve the same way.
+    """
+
+    def __init__(self):
+        self.routes: List[Route] = []
+        self._compiled = False
+        # Aho-Corasick automaton: per-state transitions, failure links and matched patterns
+        self._goto: List[Dict[str, int]] = []
+        self._fail: List[int] = []
+        self._output: List[FrozenSet[str]] = []
+        self._ordered: List[Route] = []
+        # pattern -> position in _ordered of the best route it triggers
+        self._pattern_rank: Dict[str, int] = {}
+        self._keyword_routes: List[tuple] = []
+
+    def add_route(self, pattern: str, target: Any, priority: Optional[int] = None):
+        """Route input containing pattern (a plain substring) to target"""
+        self._add(Route(target, self._next_priority(priority), pattern=pattern))
+
+    def add_routes(self, mapping: Dict[str, Any]):
+        """Add substring patterns; earlier entries take precedence over later ones"""
+        for pattern, target in mapping.items():
+            self.add_route(pattern, target)
+
+    def add_keyword_route(self, target: Any, any_of: List[str], all_of: List[str] = (),
+                          none_of: List[str] = (), priority: Optional[int] = None):
+        """Route input containing any of any_of, all of all_of and none of none_of to target"""
+        self._add(Route(target, self._next_priority(priority), any_of=frozenset(any_of),
+                        all_of=frozenset(all_of), none_of=frozenset(none_of)))
+
+    def _next_priority(self, priority: Optional[int]) -> int:
+        return len(self.routes) if priority is None else priority
+
+    def _add(self, route: Route):
+        self.routes.append(route)
+        self._compiled = False
+
+    def compile(self):
+        """Build the automaton - called automatically on the first match after a change"""
+        # Stable sort keeps insertion order among equal priorities
+        self._ordered = sorted(self.routes, key=lambda route: route.priority)
+        self._pattern_rank = {}
+        self._keyword_routes = []
+        for rank, route in enumerate(self._ordered):
+            if route.pattern is not None:
+                self._pattern_rank.setdefault(route.pattern, rank)
+            else:
+                self._keyword_routes.append((rank, route))
+
+        patterns = set()
+        for route in self.routes:
+            if route.pattern is not None:
+                patterns.add(route.pattern)
+            patterns |= route.any_of | route.all_of | route.none_of
+
+        goto: List[Dict[str, int]] = [{}]
+        output: List[Set[str]] = [set()]
+        for pattern in patterns:
+            state = 0
+            for char in pattern:
+                if char not in goto[state]:
+                    goto.append({})
+                    output.append(set())
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            output[state].add(pattern)
+
+        # Breadth-first failure links; each state also reports its failure state's patterns
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())  # depth-1 states fail to the root
+        while queue:
+            state = queue.popleft()
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(char, 0)
+                output[next_state] |= output[fail[next_state]]
+
+        self._goto = goto
+        self._fail = fail
+        self._output = [frozenset(patterns_here) for patterns_here in output]
+        self._compiled = True
+
+    def find_patterns(self, text: str) -> Set[str]:
+        """Every registered pattern or keyword occurring in text, in a single pass"""
+        if not self._compiled:
+            self.compile()
+        goto, fail, output = self._goto, self._fail, self._output
+        found: Set[str] = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+    def match(self, text: str) -> Optional[Route]:
+        """Return the highest-precedence route matching text, or None"""
+        found = self.find_patterns(text)
+        if not found:
+            return None
+        ranks = [self._pattern_rank[pattern] for pattern in found if pattern in self._pattern_rank]
+        best = min(ranks) if ranks else len(self._ordered)
+        for rank, route in self._keyword_routes:
+            if rank >= best:
+                break
+            if route.matches(found):
+                return route
+        return self._ordered[best] if ranks else None
@@ -278,6 +278,9 @@ class DiceRoller:
 class DiceSystemAgent(BaseAgent):
     """Dice System Agent that provides dice rolling services to other agents"""
     
+    # Purely reactive - no periodic process_tick needed
+    tick_period = 0
+    
     def __init__(self, seed: Optional[int] = None):
         super().__init__("dice_system", "DiceSystem")
         self.dice_roller = DiceRoller(seed)
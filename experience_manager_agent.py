@@ -10,6 +10,13 @@ from agent_framework import BaseAgent
 class ExperienceManagerAgent(BaseAgent):
     """Agent for managing D&D experience and character advancement"""
     
+    # Level-up notifications don't need sub-second latency
+    tick_period = 1.0
+    cacheable_actions = {"get_xp_status", "get_xp_to_next_level", "get_level_progression",
+                         "calculate_encounter_xp"}
+    mutating_actions = {"add_xp", "level_up", "award_milestone", "initialize_character_xp",
+                        "set_milestone_progression", "bulk_level_party", "reset_xp"}
+    
     def __init__(self, xp_dir: str = "docs/experience", verbose: bool = False):
         super().__init__("experience_manager", "experience_manager")
         self.xp_dir = xp_dir
@@ -44,6 +51,7 @@ class ExperienceManagerAgent(BaseAgent):
     def process_tick(self):
         """Process one tick/cycle of the agent's main loop"""
         # Check for automatic level-up notifications
+        changed = False
         for character_name, char_data in self.character_xp.items():
             current_xp = char_data.get("current_xp", 0)
             current_level = char_data.get("current_level", 1)
@@ -53,8 +61,11 @@ class ExperienceManagerAgent(BaseAgent):
                 next_level_xp = self.xp_thresholds.get(current_level + 1, float('inf'))
                 if current_xp >= next_level_xp and not char_data.get("level_up_pending", False):
                     char_data["level_up_pending"] = True
+                    changed = True
                     if self.verbose:
                         print(f"🎉 {character_name} is ready to level up to level {current_level + 1}!")
+        if changed:
+            self.publish_state_change("level_up_pending")
     
     def handle_message(self, message):
         """Handle message - supports both AgentMessage objects and dict for testing"""
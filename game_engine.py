@@ -2,63 +2,323 @@
 Game Engine for DM Assistant
 Manages game state, action processing, and real-time game loop
 """
+import copy
+import heapq
 import json
+import queue
 import threading
 import time
 import os
+from collections import deque
 from typing import Dict, List, Any, Optional
 from pathlib import Path
 
-from agent_framework import BaseAgent, MessageType, AgentMessage
+from agent_framework import BaseAgent, MessageType, AgentMessage, MessagePriority
+from game_state import EMPTY_VECTOR, FrozenMap, GameState, PersistentVector, thaw
+from history_archive import HistoryArchive
+from state_patch import apply_patch, diff_state
 
 
 class JSONPersister:
-    """File-based JSON persistence for game state"""
+    """
+    Crash-safe JSON checkpointing of game state.
+    save() diffs the state against the last saved copy and hands only the changes to a writer
+    thread, which appends them to a write-ahead log (<path>.wal) and every snapshot_every deltas
+    compacts everything into a snapshot at <path>, replaced atomically (temp file + rename).
+    load() returns the snapshot with the log replayed on top.
+    """
     
-    def __init__(self, path: str = "./game_state_checkpoint.json"):
+    SNAPSHOT_FORMAT = "dm-checkpoint-1"
+    
+    def __init__(self, path: str = "./game_state_checkpoint.json", snapshot_every: int = 200,
+                 background: bool = True):
         self.path = path
+        self.wal_path = f"{path}.wal"
+        self.snapshot_every = snapshot_every
+        # False writes on the caller's thread (tests, short-lived tools)
+        self.background = background
+        
+        # Caller-side copy of the last saved state - what the next save() diffs against
+        self.shadow: Optional[Dict[str, Any]] = None
+        self.seq = 0
+        # Writer-side copy of what the snapshot + log on disk add up to
+        self.disk_state: Optional[Dict[str, Any]] = None
+        self.has_snapshot = False
+        self.snapshot_seq = 0
+        self.deltas_since_snapshot = 0
+        self.last_error: Optional[str] = None
+        
+        self.write_queue: "queue.Queue" = queue.Queue()
+        self.writer_thread: Optional[threading.Thread] = None
+        self.writer_lock = threading.Lock()
 
-    def save(self, game_state: Dict[str, Any]):
-        """Save game state to JSON file"""
-        try:
-            with open(self.path, "w", encoding="utf-8") as f:
-                json.dump(game_state, f, indent=2)
-        except Exception:
-            pass
+    def save(self, game_state: Dict[str, Any]) -> bool:
+        """Queue the changes since the last save; returns False if nothing changed"""
+        previous = self.shadow if self.shadow is not None else {}
+        ops = diff_state(previous, game_state)
+        if not ops:
+            return False
+        
+        # Encoding once both copies the values out of the live state and produces the log record
+        encoded = json.dumps(ops, separators=(",", ":"), default=thaw)
+        if isinstance(game_state, FrozenMap):
+            # Immutable - keeping the snapshot lets the next diff skip every shared subtree
+            self.shadow = game_state
+        else:
+            self.shadow = apply_patch(previous, json.loads(encoded))
+        self.seq += 1
+        if self.background:
+            self._ensure_writer()
+            self.write_queue.put((self.seq, encoded))
+        else:
+            self._write(self.seq, encoded)
+        return True
 
     def load(self) -> Optional[Dict[str, Any]]:
-        """Load game state from JSON file"""
-        if not os.path.exists(self.path):
+        """Load the snapshot and replay the write-ahead log written after it"""
+        state, seq = None, 0
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception as e:
+                print(f"⚠️ Could not read checkpoint {self.path}: {e}")
+                data = None
+            if isinstance(data, dict) and data.get("format") == self.SNAPSHOT_FORMAT:
+                state, seq = data["state"], data["seq"]
+                self.has_snapshot = True
+            elif isinstance(data, dict):
+                state = data  # Plain state written before the checkpoint engine
+        self.snapshot_seq = seq
+        
+        replayed = 0
+        for record in self._read_wal():
+            if record["seq"] <= seq:
+                continue  # Already compacted into the snapshot
+            state = apply_patch(state if state is not None else {}, record["ops"])
+            seq = record["seq"]
+            replayed += 1
+        
+        if state is None:
             return None
+        self.seq = seq
+        self.deltas_since_snapshot = replayed
+        self.disk_state = copy.deepcopy(state)
+        self.shadow = copy.deepcopy(state)
+        return state
+
+    def _read_wal(self) -> List[Dict[str, Any]]:
+        """Read complete log records, cutting off a torn tail left by a crash mid-append"""
+        if not os.path.exists(self.wal_path):
+            return []
+        with open(self.wal_path, "rb") as f:
+            content = f.read()
+        
+        records = []
+        good_bytes = 0
+        for line in content.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+            good_bytes += len(line)
+        
+        if good_bytes < len(content):
+            with open(self.wal_path, "r+b") as f:
+                f.truncate(good_bytes)
+        return records
+
+    def _ensure_writer(self):
+        if self.writer_thread is None or not self.writer_thread.is_alive():
+            self.writer_thread = threading.Thread(target=self._writer_loop, name="checkpoint-writer",
+                                                  daemon=True)
+            self.writer_thread.start()
+
+    def _writer_loop(self):
+        while True:
+            item = self.write_queue.get()
+            try:
+                if item is None:
+                    return
+                self._write(*item)
+            finally:
+                self.write_queue.task_done()
+
+    def _write(self, seq: int, encoded: str):
+        """Apply a delta to the on-disk state: append it to the log, or compact into a snapshot"""
+        with self.writer_lock:
+            try:
+                self.disk_state = apply_patch(self.disk_state if self.disk_state is not None else {},
+                                              json.loads(encoded))
+                if not self.has_snapshot or self.deltas_since_snapshot + 1 >= self.snapshot_every:
+                    self._write_snapshot(seq)
+                else:
+                    with open(self.wal_path, "a", encoding="utf-8") as f:
+                        f.write(f'{{"seq":{seq},"ops":{encoded}}}\n')
+                        f.flush()
+                        os.fsync(f.fileno())
+                    self.deltas_since_snapshot += 1
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"⚠️ Checkpoint write failed: {e}")
+
+    def _write_snapshot(self, seq: int):
+        """Atomically replace the snapshot, then empty the log it now covers"""
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"format": self.SNAPSHOT_FORMAT, "seq": seq, "state": self.disk_state}, f,
+                      separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        # A crash before this truncate is harmless - load() skips records up to the snapshot seq
+        open(self.wal_path, "w").close()
+        self.has_snapshot = True
+        self.snapshot_seq = seq
+        self.deltas_since_snapshot = 0
+
+    def flush(self, timeout: Optional[float] = None):
+        """Wait until every queued delta is on disk"""
+        if self.writer_thread and self.writer_thread.is_alive():
+            if timeout is None:
+                self.write_queue.join()
+                return
+            deadline = time.time() + timeout
+            while self.write_queue.unfinished_tasks and time.time() < deadline:
+                time.sleep(0.01)
+
+    def close(self):
+        """Flush, stop the writer and compact the log into the snapshot"""
+        self.flush()
+        if self.writer_thread and self.writer_thread.is_alive():
+            self.write_queue.put(None)
+            self.writer_thread.join()
+        self.writer_thread = None
+        with self.writer_lock:
+            if self.deltas_since_snapshot and self.disk_state is not None:
+                try:
+                    self._write_snapshot(self.seq)
+                except Exception as e:
+                    print(f"⚠️ Checkpoint compaction failed: {e}")
+
+
+class ActionQueue:
+    """
+    Pending player and NPC actions, outside the game state so they are never checkpointed or synced.
+    Each actor's actions run in the order they were queued; across actors the head action with
+    the highest "initiative" goes first, ties in arrival order.
+    """
+    
+    def __init__(self):
+        # actor -> deque of (priority key, arrival seq, action)
+        self.actor_queues: Dict[Any, deque] = {}
+        # One (priority key, arrival seq, actor) entry per actor with pending actions
+        self.heads: List[tuple] = []
+        self.seq = 0
+        self.size = 0
+        self.lock = threading.Lock()
+    
+    @staticmethod
+    def _priority(action: Dict[str, Any]) -> float:
         try:
-            with open(self.path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return None
+            return -float(action.get("initiative") or 0)
+        except (TypeError, ValueError):
+            return 0.0
+    
+    def push(self, action: Dict[str, Any]):
+        with self.lock:
+            self.seq += 1
+            actor = action.get("actor")
+            entry = (self._priority(action), self.seq, action)
+            queue = self.actor_queues.get(actor)
+            if queue:
+                queue.append(entry)
+            else:
+                self.actor_queues[actor] = deque([entry])
+                heapq.heappush(self.heads, (entry[0], entry[1], actor))
+            self.size += 1
+    
+    def pop_batch(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Remove and return up to limit actions in processing order"""
+        with self.lock:
+            batch = []
+            while self.heads and (limit is None or len(batch) < limit):
+                _, _, actor = heapq.heappop(self.heads)
+                queue = self.actor_queues[actor]
+                batch.append(queue.popleft()[2])
+                if queue:
+                    heapq.heappush(self.heads, (queue[0][0], queue[0][1], actor))
+                else:
+                    del self.actor_queues[actor]
+            self.size -= len(batch)
+            return batch
+    
+    def pending_by_actor(self) -> Dict[Any, int]:
+        with self.lock:
+            return {actor: len(queue) for actor, queue in self.actor_queues.items()}
+    
+    def __len__(self) -> int:
+        return self.size
 
 
 class GameEngineAgent(BaseAgent):
     """Game Engine as an agent that manages game state and processes actions"""
     
     DEFAULT_TICK_SECONDS = 0.8
+    # Recent snapshots kept for get_game_state_since; older versions get the full state instead
+    STATE_HISTORY_SIZE = 128
+    # History streams kept in game state: stream name -> path of its list
+    HISTORY_PATHS = {"scenes": ("scene_history",), "events": ("session", "events")}
     
     def __init__(self, 
                  initial_state: Optional[Dict[str, Any]] = None,
                  persister: Optional[JSONPersister] = None,
-                 tick_seconds: float = None):
+                 tick_seconds: float = None,
+                 archive: Optional[HistoryArchive] = None,
+                 hot_scenes: int = 50,
+                 hot_events: int = 200,
+                 archive_batch: int = 50,
+                 max_actions_per_tick: int = 50):
         super().__init__("game_engine", "GameEngine")
         
         self.tick_seconds = tick_seconds or self.DEFAULT_TICK_SECONDS
+        # The orchestrator scheduler calls process_tick once per game tick
+        self.tick_period = self.tick_seconds
         self.persister = persister or JSONPersister()
         
+        # Only the newest hot_scenes/hot_events entries stay in game state; older ones move to the
+        # archive archive_batch at a time, so tick, sync and checkpoint cost don't grow with the session
+        self.archive = archive or HistoryArchive(os.path.splitext(self.persister.path)[0] + "_history")
+        self.hot_limits = {"scenes": hot_scenes, "events": hot_events}
+        self.archive_batch = archive_batch
+        
+        # Actions beyond the per-tick budget wait for the next tick, so a flood can't stall the loop
+        self.action_queue = ActionQueue()
+        self.max_actions_per_tick = max_actions_per_tick
+        
         # Initialize game state
-        self.game_state = initial_state or self._build_default_state()
+        state = dict(initial_state or self._build_default_state())
         
         # Try to load existing state
         if self.persister:
             saved_state = self.persister.load()
             if saved_state:
-                self.game_state.update(saved_state)
+                state.update(saved_state)
+        self._adopt_queued_actions(state)
+        
+        # Immutable snapshot, replaced (never mutated) under the lock on every change - readers
+        # and messages take the current reference, and its version tells them if it moved on
+        self.state_history: deque = deque(maxlen=self.STATE_HISTORY_SIZE)
+        self.game_state = GameState(state)
+        # Version last handed to the persister; process_tick only checkpoints newer versions
+        self.saved_version: Optional[int] = None
+        # Snapshot the last game_state_updated delta was computed against
+        self.broadcast_state: Optional[GameState] = None
+        # Version last sent to each receiver of per-tick work; unchanged state isn't resent
+        self.sent_versions: Dict[str, int] = {}
         
         self.lock = threading.RLock()
         self.last_tick = time.time()
@@ -67,10 +327,28 @@ class GameEngineAgent(BaseAgent):
         """Setup message handlers for game engine"""
         self.register_handler("enqueue_action", self._handle_enqueue_action)
         self.register_handler("get_game_state", self._handle_get_game_state)
+        self.register_handler("get_game_state_since", self._handle_get_game_state_since)
         self.register_handler("update_game_state", self._handle_update_game_state)
         self.register_handler("process_player_action", self._handle_process_player_action)
         self.register_handler("should_generate_scene", self._handle_should_generate_scene)
         self.register_handler("add_scene_to_history", self._handle_add_scene_to_history)
+        self.register_handler("get_history", self._handle_get_history)
+        self.register_handler("get_action_queue_status", self._handle_get_action_queue_status)
+    
+    @property
+    def game_state(self) -> GameState:
+        return self._game_state
+    
+    @game_state.setter
+    def game_state(self, state: GameState):
+        self._game_state = state
+        self.state_history.append(state)
+    
+    def stop(self):
+        """Stop the agent and wait for pending checkpoint writes"""
+        super().stop()
+        if self.persister:
+            self.persister.flush(timeout=5.0)
     
     def _build_default_state(self) -> Dict[str, Any]:
         """Build default game state"""
@@ -83,13 +361,18 @@ class GameEngineAgent(BaseAgent):
             "current_scenario": "",
             "current_options": "",
             "session": {"location": "unknown", "time": "", "events": []},
-            "action_queue": []
+            # Entries of each history stream already moved to the archive
+            "archived": {"scenes": 0, "events": 0}
         }
     
     def enqueue_action(self, action: Dict[str, Any]):
         """Enqueue an action for processing"""
-        with self.lock:
-            self.game_state["action_queue"].append(action)
+        self.action_queue.push(action)
+    
+    def _adopt_queued_actions(self, state: Dict[str, Any]):
+        """Move an "action_queue" list (older checkpoints and saves) from state into the queue"""
+        for action in state.pop("action_queue", None) or []:
+            self.action_queue.push(action)
     
     def _handle_enqueue_action(self, message: AgentMessage) -> Dict[str, Any]:
         """Handle action enqueue request"""
@@ -99,17 +382,49 @@ class GameEngineAgent(BaseAgent):
             return {"success": True, "message": "Action enqueued"}
         return {"success": False, "error": "No action provided"}
     
+    def _handle_get_action_queue_status(self, message: AgentMessage) -> Dict[str, Any]:
+        """Handle action queue status request"""
+        return {
+            "success": True,
+            "pending": len(self.action_queue),
+            "pending_by_actor": self.action_queue.pending_by_actor(),
+            "max_actions_per_tick": self.max_actions_per_tick
+        }
+    
     def _handle_get_game_state(self, message: AgentMessage) -> Dict[str, Any]:
         """Handle game state request"""
+        state = self.game_state
+        return {"game_state": state, "version": state.version}
+    
+    def _handle_get_game_state_since(self, message: AgentMessage) -> Dict[str, Any]:
+        """Handle a delta sync request: the JSON patch from the caller's version to the current one"""
+        return self.get_state_since(message.data.get("version"))
+    
+    def get_state_since(self, version: Optional[int]) -> Dict[str, Any]:
+        """Patch from version to now, or the full state if version is unknown or too old"""
         with self.lock:
-            return {"game_state": self.game_state.copy()}
+            state = self.game_state
+            history = list(self.state_history)
+        
+        if version == state.version:
+            return {"success": True, "version": version, "base_version": version, "patch": []}
+        if isinstance(version, int):
+            for snapshot in reversed(history):
+                if snapshot.version == version:
+                    return {"success": True, "version": state.version, "base_version": version,
+                            "patch": diff_state(snapshot, state)}
+                if snapshot.version < version:
+                    break
+        return {"success": True, "version": state.version, "full": True, "game_state": state}
     
     def _handle_update_game_state(self, message: AgentMessage) -> Dict[str, Any]:
         """Handle game state update request"""
         updates = message.data.get("updates")
         if updates:
+            updates = dict(updates)
+            self._adopt_queued_actions(updates)
             with self.lock:
-                self.game_state.update(updates)
+                self.game_state = self.game_state.merge(updates)
             return {"success": True, "message": "Game state updated"}
         return {"success": False, "error": "No updates provided"}
     
@@ -133,11 +448,11 @@ class GameEngineAgent(BaseAgent):
         
         if scene_data:
             with self.lock:
-                self.game_state["scene_history"].append(scene_data)
-                self.game_state["current_scenario"] = scene_data
+                state = self.game_state.append_in(("scene_history",), scene_data)
+                state = state.set("current_scenario", scene_data)
                 if options_text:
-                    self.game_state["current_options"] = options_text
-                self.game_state["session"]["events"].append("New scene generated")
+                    state = state.set("current_options", options_text)
+                self.game_state = state.append_in(("session", "events"), "New scene generated")
             return {"success": True, "message": "Scene added to history"}
         return {"success": False, "error": "No scene data provided"}
     
@@ -151,15 +466,15 @@ class GameEngineAgent(BaseAgent):
             if action_type == "move":
                 new_loc = args.get("to")
                 if actor in self.game_state["players"]:
-                    self.game_state["players"][actor]["location"] = new_loc
-                    self.game_state["session"]["events"].append(f"{actor} moved to {new_loc}")
+                    state = self.game_state.set_in(("players", actor, "location"), new_loc)
+                    self.game_state = state.append_in(("session", "events"), f"{actor} moved to {new_loc}")
                     return {"success": True, "message": f"{actor} moved to {new_loc}"}
             
             elif action_type == "choose_option":
                 choice = args.get("choice")
                 # Notify scenario generator about player choice
                 self.send_message("scenario_generator", "apply_player_choice", {
-                    "game_state": self.game_state.copy(),
+                    "game_state": self.game_state,
                     "player": actor,
                     "choice": choice
                 })
@@ -168,14 +483,68 @@ class GameEngineAgent(BaseAgent):
             elif action_type == "raw_event":
                 event = args.get("text")
                 if event:
-                    self.game_state["session"]["events"].append(event)
+                    self.game_state = self.game_state.append_in(("session", "events"), event)
                     return {"success": True, "message": f"Event added: {event}"}
             
             else:
                 error_msg = f"Unhandled action type: {action_type}"
-                self.game_state["session"]["events"].append(error_msg)
+                self.game_state = self.game_state.append_in(("session", "events"), error_msg)
                 return {"success": False, "error": error_msg}
     
+    def _archive_history(self):
+        """Move the oldest entries of over-full history lists to the archive"""
+        state = self.game_state
+        for stream, path in self.HISTORY_PATHS.items():
+            entries = state.get_in(path) or EMPTY_VECTOR
+            if len(entries) <= self.hot_limits[stream] + self.archive_batch:
+                continue
+            overflow = len(entries) - self.hot_limits[stream]
+            archived = state.get_in(("archived", stream), 0)
+            try:
+                self.archive.append(stream, archived, [thaw(entry) for entry in entries[:overflow]])
+            except Exception as e:
+                # Keep the entries in memory and retry on a later tick
+                print(f"⚠️ Failed to archive {stream} history: {e}")
+                continue
+            state = state.set_in(path, PersistentVector(entries[overflow:]))
+            state = state.set_in(("archived", stream), archived + overflow)
+        if state is not self.game_state:
+            self.game_state = state
+    
+    def _handle_get_history(self, message: AgentMessage) -> Dict[str, Any]:
+        """Handle a history lookup: entries start <= index < end of "scenes" or "events" """
+        stream = message.data.get("stream", "scenes")
+        if stream not in self.HISTORY_PATHS:
+            return {"success": False, "error": f"Unknown history stream: {stream}"}
+        try:
+            start = int(message.data.get("start", 0))
+            end = message.data.get("end")
+            end = int(end) if end is not None else None
+        except (TypeError, ValueError):
+            return {"success": False, "error": "start and end must be integers"}
+        
+        entries, total = self.get_history(stream, start, end)
+        return {"success": True, "stream": stream, "start": start, "entries": entries, "total": total}
+    
+    def get_history(self, stream: str, start: int = 0, end: Optional[int] = None):
+        """(entries start <= index < end, total entries) counting archived and in-memory history.
+        Indexes are absolute - they don't shift when entries are archived."""
+        state = self.game_state
+        hot = state.get_in(self.HISTORY_PATHS[stream]) or EMPTY_VECTOR
+        archived = state.get_in(("archived", stream), 0)
+        total = archived + len(hot)
+        end = total if end is None else min(end, total)
+        start = max(start, 0)
+        if start >= end:
+            return [], total
+        
+        entries = []
+        if start < archived:
+            entries = self.archive.get_range(stream, start, min(end, archived))
+        if end > archived:
+            entries.extend(thaw(entry) for entry in hot[max(start - archived, 0):end - archived])
+        return entries, total
+    
     def _should_generate_scene(self) -> bool:
         """Check if a new scene should be generated"""
         if not self.game_state.get("current_scenario"):
@@ -185,49 +554,56 @@ class GameEngineAgent(BaseAgent):
         return any("chose" in e.lower() or "new scene requested" in e.lower() 
                   for e in recent_events)
     
+    def _send_state_once(self, receiver_id: str, action: str, state: GameState):
+        """Send state to receiver_id unless it already got this version"""
+        if self.sent_versions.get(receiver_id) == state.version:
+            return
+        self.send_message(receiver_id, action, {"game_state": state}, priority=MessagePriority.BACKGROUND)
+        self.sent_versions[receiver_id] = state.version
+    
     def process_tick(self):
-        """Process one game engine tick"""
+        """Process one game engine tick - scheduled every tick_period seconds by the orchestrator"""
         current_time = time.time()
-        
-        # Only process if enough time has passed
-        if current_time - self.last_tick < self.tick_seconds:
-            return
-        
         self.last_tick = current_time
         
         with self.lock:
-            # Process action queue FIFO
-            while self.game_state.get("action_queue"):
-                action = self.game_state["action_queue"].pop(0)
+            # Process queued actions, at most max_actions_per_tick of them
+            for action in self.action_queue.pop_batch(self.max_actions_per_tick):
                 try:
                     self._process_player_action(action)
                 except Exception as e:
-                    self.game_state["session"]["events"].append(f"Error processing action: {e}")
+                    self.game_state = self.game_state.append_in(("session", "events"),
+                                                                f"Error processing action: {e}")
+            self._archive_history()
+            state = self.game_state
             
             # Check if NPCs need to make decisions
-            if self.game_state.get("npcs"):
-                self.send_message("npc_controller", "make_decisions", {
-                    "game_state": self.game_state.copy()
-                })
+            if state.get("npcs"):
+                self._send_state_once("npc_controller", "make_decisions", state)
             
             # Check if scenario generation is needed
             if self._should_generate_scene():
-                self.send_message("scenario_generator", "generate_scenario", {
-                    "game_state": self.game_state.copy()
-                })
+                self._send_state_once("scenario_generator", "generate_scenario", state)
             
-            # Persist game state
-            if self.persister:
+            # Checkpoint only when something changed; the persister writes on its own thread
+            if self.persister and state.version != self.saved_version:
                 try:
-                    self.persister.save(self.game_state)
-                except Exception:
-                    pass
+                    self.persister.save(state)
+                    self.saved_version = state.version
+                except Exception as e:
+                    print(f"⚠️ Failed to checkpoint game state: {e}")
             
-            # Broadcast game state update
-            self.broadcast_event("game_state_updated", {
-                "game_state": self.game_state.copy(),
-                "timestamp": current_time
-            })
+            # Broadcast what changed since the last broadcast - skip it if nobody listens.
+            # base_version None means the patch rebuilds the whole state from {}
+            if self.has_subscribers("game_state_updated") and state is not self.broadcast_state:
+                previous = self.broadcast_state
+                self.broadcast_event("game_state_updated", {
+                    "version": state.version,
+                    "base_version": previous.version if previous is not None else None,
+                    "patch": diff_state(previous if previous is not None else {}, state),
+                    "timestamp": current_time
+                }, priority=MessagePriority.BACKGROUND)
+                self.broadcast_state = state
 
 
 class GameEngine:
@@ -0,0 +1,352 @@
+"""
+Immutable Game State for DM Assistant
+Persistent maps and vectors with structural sharing, so a game-state snapshot is O(1) to take,
+safe to hand to other threads, and carries a version number
+"""
+import threading
+from collections.abc import Mapping, Sequence
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence as SequenceType
+
+from state_patch import apply_patch
+
+# Vector trie fan-out: 32 children per node, 5 index bits per level
+BITS = 5
+WIDTH = 1 << BITS
+MASK = WIDTH - 1
+
+
+class PersistentVector(Sequence):
+    """
+    Immutable list backed by a 32-way trie with a tail buffer.
+    append() and set() copy only the path to the changed leaf, so versions share everything else.
+    """
+
+    __slots__ = ("_count", "_shift", "_root", "_tail")
+
+    def __init__(self, items: Iterable[Any] = ()):
+        self._count = 0
+        self._shift = BITS
+        self._root: tuple = ()
+        self._tail: tuple = ()
+        items = [freeze(item) for item in items]
+        # Push full leaves straight into the trie instead of appending item by item
+        full = len(items) - (len(items) % WIDTH or (WIDTH if items else 0))
+        for start in range(0, full, WIDTH):
+            self._tail = tuple(items[start:start + WIDTH])
+            self._count = start + WIDTH
+            self._root, self._shift = self._with_tail_pushed()
+            self._tail = ()
+        self._tail = tuple(items[full:])
+        self._count = len(items)
+
+    @classmethod
+    def _make(cls, count: int, shift: int, root: tuple, tail: tuple) -> "PersistentVector":
+        vector = cls.__new__(cls)
+        vector._count, vector._shift, vector._root, vector._tail = count, shift, root, tail
+        return vector
+
+    def _tail_offset(self) -> int:
+        return 0 if self._count < WIDTH else ((self._count - 1) >> BITS) << BITS
+
+    def _leaf_for(self, index: int) -> tuple:
+        if index >= self._tail_offset():
+            return self._tail
+        node = self._root
+        level = self._shift
+        while level > 0:
+            node = node[(index >> level) & MASK]
+            level -= BITS
+        return node
+
+    def _with_tail_pushed(self):
+        """(root, shift) after moving the full tail into the trie"""
+        if (self._count >> BITS) > (1 << self._shift):
+            # Root is full - grow the trie by one level
+            return (self._root, self._new_path(self._shift, self._tail)), self._shift + BITS
+        return self._push_tail(self._shift, self._root, self._tail), self._shift
+
+    def _push_tail(self, level: int, parent: tuple, tail: tuple) -> tuple:
+        sub_index = ((self._count - 1) >> level) & MASK
+        if level == BITS:
+            child = tail
+        elif sub_index < len(parent):
+            child = self._push_tail(level - BITS, parent[sub_index], tail)
+        else:
+            child = self._new_path(level - BITS, tail)
+        if sub_index < len(parent):
+            return parent[:sub_index] + (child,) + parent[sub_index + 1:]
+        return parent + (child,)
+
+    @staticmethod
+    def _new_path(level: int, node: tuple) -> tuple:
+        while level > 0:
+            node = (node,)
+            level -= BITS
+        return node
+
+    def append(self, value: Any) -> "PersistentVector":
+        """New vector with value added at the end"""
+        value = freeze(value)
+        if self._count - self._tail_offset() < WIDTH:
+            return self._make(self._count + 1, self._shift, self._root, self._tail + (value,))
+        root, shift = self._with_tail_pushed()
+        return self._make(self._count + 1, shift, root, (value,))
+
+    def extend(self, values: Iterable[Any]) -> "PersistentVector":
+        vector = self
+        for value in values:
+            vector = vector.append(value)
+        return vector
+
+    def set(self, index: int, value: Any) -> "PersistentVector":
+        """New vector with the item at index replaced"""
+        index = self._normalise_index(index)
+        value = freeze(value)
+        if index >= self._tail_offset():
+            position = index & MASK
+            tail = self._tail[:position] + (value,) + self._tail[position + 1:]
+            return self._make(self._count, self._shift, self._root, tail)
+        return self._make(self._count, self._shift, self._assoc(self._shift, self._root, index, value),
+                          self._tail)
+
+    def _assoc(self, level: int, node: tuple, index: int, value: Any) -> tuple:
+        position = (index >> level) & MASK
+        child = value if level == 0 else self._assoc(level - BITS, node[position], index, value)
+        return node[:position] + (child,) + node[position + 1:]
+
+    def _normalise_index(self, index: int) -> int:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("vector index out of range")
+        return index
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            # Slices are plain lists - cheap for the short tails ([-4:]) callers take
+            return [self._leaf_for(i)[i & MASK] for i in range(*index.indices(self._count))]
+        index = self._normalise_index(index)
+        return self._leaf_for(index)[index & MASK]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Any]:
+        for start in range(0, self._tail_offset(), WIDTH):
+            yield from self._leaf_for(start)
+        yield from self._tail
+
+    def __reversed__(self) -> Iterator[Any]:
+        for index in range(self._count - 1, -1, -1):
+            yield self[index]
+
+    def __contains__(self, value: Any) -> bool:
+        return any(item is value or item == value for item in self)
+
+    def __eq__(self, other: Any) -> bool:
+        if other is self:
+            return True
+        if isinstance(other, (PersistentVector, list, tuple)):
+            return len(other) == self._count and all(a is b or a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+    def index(self, value: Any) -> int:
+        for position, item in enumerate(self):
+            if item == value:
+                return position
+        raise ValueError(f"{value!r} is not in vector")
+
+    def count(self, value: Any) -> int:
+        return sum(1 for item in self if item == value)
+
+    def thaw(self) -> List[Any]:
+        """Deep copy as a plain list"""
+        return [thaw(item) for item in self]
+
+
+class FrozenMap(Mapping):
+    """
+    Immutable dict. set()/remove()/merge() return a new map that shares every unchanged value;
+    game-state nodes are small, so copying the one changed level is cheaper than a hash trie.
+    """
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: Mapping = None):
+        self._data: Dict[str, Any] = {key: freeze(value) for key, value in data.items()} if data else {}
+
+    def _derive(self, data: Dict[str, Any]) -> "FrozenMap":
+        """Wrap data (already copied) as a new map of the same kind"""
+        derived = FrozenMap.__new__(FrozenMap)
+        derived._data = data
+        return derived
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key) -> bool:
+        return key in self._data
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def __eq__(self, other: Any) -> bool:
+        if other is self:
+            return True
+        if isinstance(other, FrozenMap):
+            return self._data == other._data
+        if isinstance(other, Mapping):
+            return self._data == dict(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return repr(self._data)
+
+    def set(self, key, value) -> "FrozenMap":
+        if key in self._data and self._data[key] is value:
+            return self
+        data = dict(self._data)
+        data[key] = freeze(value)
+        return self._derive(data)
+
+    def remove(self, key) -> "FrozenMap":
+        if key not in self._data:
+            return self
+        data = dict(self._data)
+        del data[key]
+        return self._derive(data)
+
+    def merge(self, updates: Mapping) -> "FrozenMap":
+        """New map with every key in updates set (like dict.update)"""
+        if not updates:
+            return self
+        data = dict(self._data)
+        for key, value in updates.items():
+            data[key] = freeze(value)
+        return self._derive(data)
+
+    def get_in(self, path: SequenceType, default=None):
+        node = self
+        for key in path:
+            try:
+                node = node[key]
+            except (KeyError, IndexError, TypeError):
+                return default
+        return node
+
+    def set_in(self, path: SequenceType, value) -> "FrozenMap":
+        """New map with the value at path replaced, creating missing maps along the way"""
+        return self.update_in(path, lambda _: value)
+
+    def update_in(self, path: SequenceType, function: Callable[[Any], Any]) -> "FrozenMap":
+        """New map with the value at path replaced by function(current value or None)"""
+        key = path[0]
+        current = self._data.get(key)
+        if len(path) == 1:
+            return self.set(key, function(current))
+        if isinstance(current, PersistentVector):
+            index = path[1]
+            if len(path) == 2:
+                return self.set(key, current.set(index, function(current[index])))
+            return self.set(key, current.set(index, current[index].update_in(path[2:], function)))
+        child = current if isinstance(current, FrozenMap) else FrozenMap()
+        return self.set(key, child.update_in(path[1:], function))
+
+    def append_in(self, path: SequenceType, value) -> "FrozenMap":
+        """New map with value appended to the vector at path"""
+        return self.update_in(path, lambda vector: (vector or EMPTY_VECTOR).append(value))
+
+    def thaw(self) -> Dict[str, Any]:
+        """Deep copy as plain dicts and lists - for JSON or callers that mutate"""
+        return {key: thaw(value) for key, value in self._data.items()}
+
+
+class GameState(FrozenMap):
+    """
+    Versioned game-state snapshot. Every change returns a new GameState with version + 1,
+    so consumers holding an older snapshot can tell at a glance that it is stale.
+    """
+
+    __slots__ = ("version",)
+
+    def __init__(self, data: Mapping = None, version: int = 0):
+        super().__init__(data)
+        self.version = version
+
+    def _derive(self, data: Dict[str, Any]) -> "GameState":
+        derived = GameState.__new__(GameState)
+        derived._data = data
+        derived.version = self.version + 1
+        return derived
+
+
+class GameStateMirror:
+    """
+    Plain-dict copy of the engine's game state kept current from get_game_state_since responses
+    and game_state_updated deltas, so only what changed crosses the message bus
+    """
+
+    def __init__(self):
+        self.state: Dict[str, Any] = {}
+        self.version: Optional[int] = None
+        self.lock = threading.Lock()
+
+    def apply(self, update: Dict[str, Any]) -> bool:
+        """Apply a sync response or delta event; False if it doesn't follow this mirror's version"""
+        if not update or update.get("version") is None:
+            return False
+        with self.lock:
+            if update.get("full"):
+                self.state = thaw(update.get("game_state")) or {}
+            elif update.get("base_version") is None and "patch" in update:
+                self.state = apply_patch({}, thaw_patch(update["patch"]))
+            elif update.get("base_version") == self.version:
+                self.state = apply_patch(self.state, thaw_patch(update.get("patch", [])))
+            else:
+                return False
+            self.version = update["version"]
+            return True
+
+    def reset(self):
+        with self.lock:
+            self.state = {}
+            self.version = None
+
+
+EMPTY_VECTOR = PersistentVector()
+
+
+def freeze(value: Any) -> Any:
+    """Convert dicts and lists (recursively) to FrozenMap / PersistentVector"""
+    if isinstance(value, (FrozenMap, PersistentVector)):
+        return value
+    if isinstance(value, Mapping):
+        return FrozenMap(value)
+    if isinstance(value, (list, tuple)):
+        return PersistentVector(value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Convert frozen structures (recursively) back to plain dicts and lists"""
+    if isinstance(value, (FrozenMap, PersistentVector)):
+        return value.thaw()
+    return value
+
+
+def thaw_patch(ops: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Copy of patch operations with plain values, ready to apply to a mutable document"""
+    return [dict(op, value=thaw(op["value"])) if "value" in op else op for op in ops]
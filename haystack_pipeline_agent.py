@@ -19,11 +19,14 @@ from haystack.components.rankers import SentenceTransformersSimilarityRanker
 from haystack_integrations.document_stores.qdrant import QdrantDocumentStore
 
 from agent_framework import BaseAgent, MessageType, AgentMessage
+from response_cache import SemanticCache, read_ingestion_version
 
 # Configuration constants
 DEFAULT_TOP_K = 20
 DEFAULT_RANKER_TOP_K = 5
 DEFAULT_EMBEDDING_DIM = 384
+# Cosine similarity above which a previous RAG answer is reused for a new query
+DEFAULT_SEMANTIC_CACHE_THRESHOLD = 0.9
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 LLM_MODEL = "aws:anthropic.claude-sonnet-4-20250514-v1:0"
 
@@ -60,12 +63,18 @@ class StringToChatMessages:
 class HaystackPipelineAgent(BaseAgent):
     """Haystack Pipeline Agent that provides RAG services to other agents"""
     
+    # Purely reactive - no periodic process_tick needed
+    tick_period = 0
+    cacheable_actions = {"query_rag", "query_rules"}
+    
     def __init__(self,
                  collection_name: str = "dnd_documents",
                  host: str = "localhost",
                  port: int = 6333,
                  top_k: int = DEFAULT_TOP_K,
-                 verbose: bool = False):
+                 verbose: bool = False,
+                 semantic_cache_threshold: Optional[float] = DEFAULT_SEMANTIC_CACHE_THRESHOLD,
+                 semantic_cache_size: int = 512):
         super().__init__("haystack_pipeline", "HaystackPipeline")
         
         self.collection_name = collection_name
@@ -76,7 +85,15 @@ class HaystackPipelineAgent(BaseAgent):
         self.has_llm = CLAUDE_AVAILABLE
         
         self.document_store = None
+        # Client from the startup connection check, reused for collection lookups
+        self.qdrant_client = None
         self.pipeline = None
+        # Shared query embedder - run outside the pipelines so its output can key the semantic cache
+        self.text_embedder = None
+        self.semantic_cache = (SemanticCache(semantic_cache_threshold, semantic_cache_size)
+                               if semantic_cache_threshold is not None else None)
+        # Last corpus fingerprint seen; the semantic cache is cleared when it changes
+        self.collection_fingerprint: Optional[str] = None
         
         # Pipeline variants for different use cases
         self.scenario_pipeline = None
@@ -98,6 +115,7 @@ class HaystackPipelineAgent(BaseAgent):
         self.register_handler("query_rules", self._handle_query_rules)
         self.register_handler("get_pipeline_status", self._handle_get_pipeline_status)
         self.register_handler("get_collection_info", self._handle_get_collection_info)
+        self.register_handler("get_cache_stats", self._handle_get_cache_stats)
     
     def _setup_document_store(self):
         """Setup Qdrant document store connection"""
@@ -106,6 +124,7 @@ class HaystackPipelineAgent(BaseAgent):
             client = QdrantClient(host=self.host, port=self.port)
             collections = client.get_collections()
             collection_names = [col.name for col in collections.collections]
+            self.qdrant_client = client
             
             if self.collection_name not in collection_names:
                 if self.verbose:
@@ -230,7 +249,6 @@ Provide a clear, accurate answer with rule citations:"""
     def _setup_pipelines(self):
         """Setup various Haystack pipelines for different use cases"""
         # Core components
-        text_embedder = self._create_embedder()
         retriever = self._create_retriever()
         
         # Handle case where document store is not available
@@ -243,15 +261,14 @@ Provide a clear, accurate answer with rule citations:"""
             self.rules_pipeline = None
             return
         
+        self.text_embedder = self._create_embedder()
         ranker = self._create_ranker()
         
-        # General RAG pipeline
+        # General RAG pipeline - the query embedding is passed straight to the retriever
         self.pipeline = Pipeline()
-        self.pipeline.add_component("text_embedder", text_embedder)
         self.pipeline.add_component("retriever", retriever)
         self.pipeline.add_component("ranker", ranker)
         
-        self.pipeline.connect("text_embedder.embedding", "retriever.query_embedding")
         self.pipeline.connect("retriever.documents", "ranker.documents")
         
         if self.has_llm:
@@ -300,7 +317,6 @@ Provide a clear, accurate answer with rule citations:"""
         
         # NPC pipeline
         self.npc_pipeline = Pipeline()
-        self.npc_pipeline.add_component("text_embedder", self._create_embedder())
         self.npc_pipeline.add_component("retriever", self._create_retriever())
         self.npc_pipeline.add_component("ranker", self._create_ranker())
         self.npc_pipeline.add_component("prompt_builder", self._create_npc_prompt_builder())
@@ -310,7 +326,6 @@ Provide a clear, accurate answer with rule citations:"""
         ))
         
         # Connect NPC pipeline
-        self.npc_pipeline.connect("text_embedder.embedding", "retriever.query_embedding")
         self.npc_pipeline.connect("retriever.documents", "ranker.documents")
         self.npc_pipeline.connect("ranker.documents", "prompt_builder.documents")
         self.npc_pipeline.connect("prompt_builder.prompt", "string_to_chat.prompt")
@@ -318,7 +333,6 @@ Provide a clear, accurate answer with rule citations:"""
         
         # Rules pipeline
         self.rules_pipeline = Pipeline()
-        self.rules_pipeline.add_component("text_embedder", self._create_embedder())
         self.rules_pipeline.add_component("retriever", self._create_retriever())
         self.rules_pipeline.add_component("ranker", self._create_ranker())
         self.rules_pipeline.add_component("prompt_builder", self._create_rules_prompt_builder())
@@ -328,7 +342,6 @@ Provide a clear, accurate answer with rule citations:"""
         ))
         
         # Connect rules pipeline
-        self.rules_pipeline.connect("text_embedder.embedding", "retriever.query_embedding")
         self.rules_pipeline.connect("retriever.documents", "ranker.documents")
         self.rules_pipeline.connect("ranker.documents", "prompt_builder.documents")
         self.rules_pipeline.connect("prompt_builder.prompt", "string_to_chat.prompt")
@@ -385,7 +398,8 @@ Make it engaging, appropriate for D&D, and keep the story moving forward natural
             if self.scenario_pipeline:
                 result = self._run_scenario_pipeline(query, campaign_context, game_state)
             else:
-                result = self._run_pipeline(self.pipeline, query)
+                # Creative content - a paraphrase should get a fresh scenario
+                result = self._run_pipeline(self.pipeline, query, use_cache=False)
             return {"success": True, "result": result}
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -402,7 +416,7 @@ Make it engaging, appropriate for D&D, and keep the story moving forward natural
             if self.npc_pipeline:
                 result = self._run_npc_pipeline(query, game_state)
             else:
-                result = self._run_pipeline(self.pipeline, query)
+                result = self._run_pipeline(self.pipeline, query, use_cache=False)
             return {"success": True, "result": result}
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -432,9 +446,16 @@ Make it engaging, appropriate for D&D, and keep the story moving forward natural
                 "scenario": self.scenario_pipeline is not None,
                 "npc": self.npc_pipeline is not None,
                 "rules": self.rules_pipeline is not None
-            }
+            },
+            "semantic_cache": self.semantic_cache.get_stats() if self.semantic_cache else None
         }
     
+    def _handle_get_cache_stats(self, message: AgentMessage) -> Dict[str, Any]:
+        """Handle semantic cache hit-rate report request"""
+        if not self.semantic_cache:
+            return {"success": False, "error": "Semantic cache disabled"}
+        return {"success": True, "stats": self.semantic_cache.get_stats()}
+    
     def _handle_get_collection_info(self, message: AgentMessage) -> Dict[str, Any]:
         """Handle collection info request"""
         try:
@@ -445,23 +466,67 @@ Make it engaging, appropriate for D&D, and keep the story moving forward natural
                 "success": True,
                 "collection_name": self.collection_name,
                 "total_documents": collection_info.points_count,
+                "ingestion_version": read_ingestion_version(self.collection_name),
                 "vector_size": collection_info.config.params.vectors.size,
                 "distance_metric": collection_info.config.params.vectors.distance.name
             }
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def _run_pipeline(self, pipeline: Pipeline, query: str) -> Dict[str, Any]:
-        """Run a pipeline with the given query"""
+    def get_collection_fingerprint(self) -> Optional[str]:
+        """Identifies the indexed corpus - changes when points are added/removed or documents re-ingested.
+        Returns the last known fingerprint (None if there is none) while the point count can't be read."""
+        if self.qdrant_client is None:
+            return self.collection_fingerprint
+        try:
+            points_count = self.qdrant_client.get_collection(self.collection_name).points_count
+        except Exception:
+            # An outage is not a corpus change
+            return self.collection_fingerprint
+        fingerprint = f"{self.collection_name}:{points_count}:{read_ingestion_version(self.collection_name)}"
+        if fingerprint != self.collection_fingerprint:
+            if self.collection_fingerprint is not None and self.semantic_cache:
+                # Answers were built from the old corpus
+                self.semantic_cache.clear()
+                if self.verbose:
+                    print("🗑️ Document collection changed - semantic cache cleared")
+            self.collection_fingerprint = fingerprint
+        return fingerprint
+    
+    def _embed_query(self, query: str) -> List[float]:
+        """Embed a query once for both the semantic cache and the retriever"""
+        return self.text_embedder.run(text=query)["embedding"]
+    
+    def _run_pipeline(self, pipeline: Pipeline, query: str, use_cache: bool = True) -> Dict[str, Any]:
+        """Run a pipeline with the given query, reusing the answer of a near-identical earlier query"""
         if pipeline is None:
             return {
                 "answer": f"Pipeline not available (Qdrant not connected). Query was: {query}",
                 "sources": []
             }
         
+        embedding = self._embed_query(query)
+        namespace = "rules" if pipeline is self.rules_pipeline else "general"
+        if use_cache and self.semantic_cache:
+            # Read first - a corpus change detected during retrieval clears the cache under us
+            generation = self.semantic_cache.generation
+            cached = self.semantic_cache.lookup(namespace, embedding)
+            if cached:
+                answer, similarity, cached_query = cached
+                if self.verbose:
+                    print(f"📦 Semantic cache hit ({similarity:.2f}): '{query}' ~ '{cached_query}'")
+                return answer
+        
+        result = self._run_retrieval_pipeline(pipeline, query, embedding)
+        if use_cache and self.semantic_cache:
+            self.semantic_cache.store(namespace, query, embedding, result, generation)
+        return result
+    
+    def _run_retrieval_pipeline(self, pipeline: Pipeline, query: str, embedding: List[float]) -> Dict[str, Any]:
+        """Run retrieval, reranking and (if available) the LLM for an embedded query"""
         if self.has_llm:
             result = pipeline.run({
-                "text_embedder": {"text": query},
+                "retriever": {"query_embedding": embedding},
                 "ranker": {"query": query},
                 "prompt_builder": {"query": query},
                 "answer_builder": {"query": query}
@@ -481,7 +546,7 @@ Make it engaging, appropriate for D&D, and keep the story moving forward natural
             }
         else:
             result = pipeline.run({
-                "text_embedder": {"text": query},
+                "retriever": {"query_embedding": embedding},
                 "ranker": {"query": query}
             })
             documents = result.get("ranker", {}).get("documents", [])
@@ -511,7 +576,7 @@ Make it engaging, appropriate for D&D, and keep the story moving forward natural
     def _run_npc_pipeline(self, query: str, game_state: str) -> Dict[str, Any]:
         """Run NPC-specific pipeline"""
         result = self.npc_pipeline.run({
-            "text_embedder": {"text": query},
+            "retriever": {"query_embedding": self._embed_query(query)},
             "ranker": {"query": query},
             "prompt_builder": {
                 "query": query,
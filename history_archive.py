@@ -0,0 +1,158 @@
+"""
+History Archive for DM Assistant
+Append-only, compressed segment files for scene and event history that has aged out of the
+game engine's in-memory window, with an index for looking old entries up by position
+"""
+import bisect
+import json
+import os
+import struct
+import threading
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class HistoryArchive:
+    """
+    Stores numbered entries per stream ("scenes", "events") in <stream>-<n>.seg files.
+    Each append is one zlib-compressed block behind a header (first seq, count, length, crc32);
+    the block index is rebuilt from the headers on open, and a torn last block is cut off.
+    """
+
+    BLOCK_HEADER = struct.Struct("!QIII")
+
+    def __init__(self, directory: str = "./game_history", segment_bytes: int = 4 * 1024 * 1024):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.lock = threading.Lock()
+        # stream -> [(first_seq, count, segment_path, offset, length)] in seq order
+        self.index: Dict[str, List[Tuple[int, int, str, int, int]]] = {}
+        self.block_starts: Dict[str, List[int]] = {}
+        self.segments: Dict[str, List[str]] = {}
+        # Most recently decoded block - lookups tend to walk neighbouring entries
+        self.cached_block: Optional[Tuple[str, int, List[Any]]] = None
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        """Scan block headers of every segment file"""
+        for filename in sorted(os.listdir(self.directory)):
+            if not filename.endswith(".seg"):
+                continue
+            stream = filename.rsplit("-", 1)[0]
+            self.segments.setdefault(stream, []).append(os.path.join(self.directory, filename))
+
+        for stream, paths in self.segments.items():
+            blocks = self.index.setdefault(stream, [])
+            for path in paths:
+                with open(path, "rb") as f:
+                    content = f.read()
+                offset = 0
+                while offset + self.BLOCK_HEADER.size <= len(content):
+                    first_seq, count, length, checksum = self.BLOCK_HEADER.unpack_from(content, offset)
+                    start = offset + self.BLOCK_HEADER.size
+                    payload = content[start:start + length]
+                    if len(payload) < length or zlib.crc32(payload) != checksum:
+                        break
+                    blocks.append((first_seq, count, path, start, length))
+                    offset = start + length
+                if offset < len(content):
+                    # Torn or corrupt tail from an interrupted append
+                    print(f"⚠️ Truncating damaged history segment {path} at byte {offset}")
+                    with open(path, "r+b") as f:
+                        f.truncate(offset)
+            self.block_starts[stream] = [block[0] for block in blocks]
+
+    def count(self, stream: str) -> int:
+        """Sequence number the next archived entry of stream gets"""
+        with self.lock:
+            return self._next_seq(stream)
+
+    def _next_seq(self, stream: str) -> int:
+        blocks = self.index.get(stream)
+        if not blocks:
+            return 0
+        first_seq, count = blocks[-1][0], blocks[-1][1]
+        return first_seq + count
+
+    def append(self, stream: str, first_seq: int, entries: List[Any]) -> int:
+        """Archive entries numbered from first_seq; entries already archived are skipped, so
+        repeating an append after a crash is harmless. Returns the number written."""
+        with self.lock:
+            already = self._next_seq(stream) - first_seq
+            if already > 0:
+                entries = entries[already:]
+                first_seq += already
+            if not entries:
+                return 0
+
+            payload = zlib.compress(json.dumps(entries, separators=(",", ":")).encode("utf-8"))
+            path = self._writable_segment(stream, len(payload))
+            with open(path, "ab") as f:
+                offset = f.tell()
+                f.write(self.BLOCK_HEADER.pack(first_seq, len(entries), len(payload), zlib.crc32(payload)))
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+
+            self.index.setdefault(stream, []).append(
+                (first_seq, len(entries), path, offset + self.BLOCK_HEADER.size, len(payload)))
+            self.block_starts.setdefault(stream, []).append(first_seq)
+            return len(entries)
+
+    def _writable_segment(self, stream: str, incoming: int) -> str:
+        paths = self.segments.setdefault(stream, [])
+        if paths:
+            size = os.path.getsize(paths[-1])
+            # An oversized block still goes into an empty segment rather than a new one
+            if size == 0 or size + incoming <= self.segment_bytes:
+                return paths[-1]
+        path = os.path.join(self.directory, f"{stream}-{len(paths):05d}.seg")
+        paths.append(path)
+        return path
+
+    def get(self, stream: str, seq: int) -> Any:
+        """Archived entry number seq of stream; raises KeyError if it was never archived"""
+        entries = self.get_range(stream, seq, seq + 1)
+        if not entries:
+            raise KeyError(f"{stream}[{seq}] is not archived")
+        return entries[0]
+
+    def get_range(self, stream: str, start: int, end: int) -> List[Any]:
+        """Archived entries start <= seq < end (as many as exist)"""
+        results = []
+        with self.lock:
+            starts = self.block_starts.get(stream, [])
+            position = max(bisect.bisect_right(starts, start) - 1, 0)
+            for block in self.index.get(stream, [])[position:]:
+                first_seq, count = block[0], block[1]
+                if first_seq >= end:
+                    break
+                if first_seq + count <= start:
+                    continue
+                entries = self._read_block(stream, block)
+                results.extend(entries[max(start - first_seq, 0):end - first_seq])
+        return results
+
+    def _read_block(self, stream: str, block: Tuple[int, int, str, int, int]) -> List[Any]:
+        first_seq, _, path, offset, length = block
+        if self.cached_block and self.cached_block[:2] == (stream, first_seq):
+            return self.cached_block[2]
+        with open(path, "rb") as f:
+            f.seek(offset)
+            entries = json.loads(zlib.decompress(f.read(length)))
+        self.cached_block = (stream, first_seq, entries)
+        return entries
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                stream: {
+                    "entries": self._next_seq(stream),
+                    "blocks": len(blocks),
+                    "segments": len(self.segments.get(stream, [])),
+                    "bytes": sum(os.path.getsize(path) for path in self.segments.get(stream, [])
+                                 if os.path.exists(path))
+                }
+                for stream, blocks in self.index.items()
+            }
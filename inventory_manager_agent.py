@@ -10,6 +10,13 @@ from agent_framework import BaseAgent
 class InventoryManagerAgent(BaseAgent):
     """Agent for managing D&D character inventories and equipment"""
     
+    # Purely reactive - no periodic process_tick needed
+    tick_period = 0
+    cacheable_actions = {"get_inventory", "get_equipped_items", "search_items", "get_item_info",
+                         "calculate_carrying_capacity", "get_armor_class", "get_carrying_capacity"}
+    mutating_actions = {"add_item", "remove_item", "equip_item", "unequip_item", "transfer_item",
+                        "create_custom_item", "initialize_inventory"}
+    
     def __init__(self, items_dir: str = "docs/items", inventory_dir: str = None, verbose: bool = False):
         super().__init__("inventory_manager", "inventory_manager")
         # Support both parameter names for compatibility
@@ -0,0 +1,88 @@
+"""
+Message Codec Micro-Benchmark
+Compares the to_dict/from_dict round trip with the wire codecs in agent_framework
+"""
+import pickle
+import sys
+import time
+import timeit
+from typing import Callable, List, Tuple
+
+from agent_framework import (AgentMessage, MessageType, MessagePriority, MessageCodec,
+                             CompactMessageCodec, MSGPACK_AVAILABLE, new_message_id)
+
+
+def make_sample_message() -> AgentMessage:
+    """A typical game-engine response carrying a small game state"""
+    return AgentMessage(
+        id=new_message_id(),
+        sender_id="game_engine",
+        receiver_id="orchestrator",
+        message_type=MessageType.RESPONSE,
+        action="get_game_state_response",
+        data={
+            "success": True,
+            "game_state": {
+                "players": {"Thorin": {"hp": 28, "max_hp": 34, "level": 4, "conditions": []},
+                            "Aria": {"hp": 19, "max_hp": 22, "level": 4, "conditions": ["blessed"]}},
+                "npcs": {"Grimble": {"location": "tavern", "attitude": "friendly"}},
+                "world": {"time_of_day": "evening", "weather": "rain"},
+                "story_arc": "The caravan never reached Kholinar",
+                "scene_history": [f"Scene {i}: the party pressed on" for i in range(5)],
+                "session": {"location": "Roshar outskirts", "turn": 12}
+            }
+        },
+        timestamp=time.time(),
+        response_to=new_message_id(),
+        priority=MessagePriority.INTERACTIVE
+    )
+
+
+def dict_round_trip(message: AgentMessage) -> AgentMessage:
+    return AgentMessage.from_dict(message.to_dict())
+
+
+def pickled_dict_round_trip(message: AgentMessage) -> AgentMessage:
+    # What a multiprocessing pipe does with a to_dict() payload
+    return AgentMessage.from_dict(pickle.loads(pickle.dumps(message.to_dict())))
+
+
+def codec_round_trip(codec: MessageCodec) -> Callable[[AgentMessage], AgentMessage]:
+    return lambda message: codec.decode(codec.encode(message))
+
+
+def run_benchmark(iterations: int = 20000) -> List[Tuple[str, float, int]]:
+    """Time each round trip; returns (name, microseconds per message, encoded bytes)"""
+    message = make_sample_message()
+    candidates = [
+        ("to_dict/from_dict (in memory)", dict_round_trip, None),
+        ("pickled to_dict", pickled_dict_round_trip, lambda m: pickle.dumps(m.to_dict())),
+        ("json codec", codec_round_trip(MessageCodec()), MessageCodec().encode),
+        ("compact codec (json data)", codec_round_trip(CompactMessageCodec(use_msgpack=False)),
+         CompactMessageCodec(use_msgpack=False).encode),
+    ]
+    if MSGPACK_AVAILABLE:
+        candidates.append(("compact codec (msgpack data)", codec_round_trip(CompactMessageCodec()),
+                           CompactMessageCodec().encode))
+
+    results = []
+    for name, round_trip, encode in candidates:
+        assert round_trip(message) == message
+        seconds = min(timeit.repeat(lambda: round_trip(message), number=iterations, repeat=3))
+        size = len(encode(message)) if encode else 0
+        results.append((name, seconds / iterations * 1e6, size))
+    return results
+
+
+def main():
+    """Print a comparison table"""
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"AgentMessage round trip, {iterations} iterations (msgpack: "
+          f"{'available' if MSGPACK_AVAILABLE else 'not installed'})\n")
+    print(f"{'Method':<32}{'us/msg':>10}{'bytes':>10}")
+    for name, micros, size in run_benchmark(iterations):
+        print(f"{name:<32}{micros:>10.2f}{(size or '-'):>10}")
+
+
+if __name__ == "__main__":
+    main()
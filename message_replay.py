@@ -0,0 +1,131 @@
+"""
+Message Journal Replay
+Re-injects a recorded bus session into a fresh AgentOrchestrator as a load test
+"""
+import sys
+import time
+from dataclasses import replace
+from typing import Any, Dict, Iterable, List, Optional
+
+from agent_framework import AgentOrchestrator, AgentMessage, MessageJournal, MessageType, new_message_id
+
+
+class JournalReplayer:
+    """
+    Replays the externally originated traffic of a journal - DM commands and other
+    requests/events from senders that are not agents in the target orchestrator.
+    Agent-to-agent messages and responses are regenerated by the agents themselves.
+    """
+
+    def __init__(self, orchestrator: AgentOrchestrator, speed: float = 1.0,
+                 receivers: Optional[Iterable[str]] = None, response_timeout: float = 5.0):
+        self.orchestrator = orchestrator
+        # 1.0 = original pacing, 10.0 = ten times faster, 0 = as fast as possible
+        self.speed = speed
+        self.receivers = set(receivers) if receivers is not None else None
+        self.response_timeout = response_timeout
+
+    def select(self, messages: Iterable[AgentMessage]) -> List[AgentMessage]:
+        """Pick the recorded messages that should be re-injected"""
+        agents = self.orchestrator.agents
+        receivers = self.receivers if self.receivers is not None else set(agents)
+        selected = []
+        for message in messages:
+            if message.message_type in (MessageType.RESPONSE, MessageType.ERROR):
+                continue
+            if message.sender_id in agents:
+                continue
+            if message.receiver_id != "broadcast" and message.receiver_id not in receivers:
+                continue
+            selected.append(message)
+        return selected
+
+    def replay(self, path: str) -> Dict[str, Any]:
+        """Replay a journal into the (running) orchestrator and report what happened"""
+        messages = self.select(MessageJournal.read(path))
+        bus = self.orchestrator.message_bus
+        futures = []
+        request_ids = []
+
+        start = time.perf_counter()
+        first_timestamp = messages[0].timestamp if messages else 0.0
+        for message in messages:
+            if self.speed > 0:
+                delay = (message.timestamp - first_timestamp) / self.speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+
+            # Fresh id and timestamp so correlation and queue-wait timing reflect this run
+            injected = replace(message, id=new_message_id(), timestamp=time.time())
+            if injected.message_type == MessageType.REQUEST:
+                request_ids.append(injected.id)
+                futures.append(bus.send_request(injected))
+            else:
+                bus.send_message(injected)
+
+        deadline = time.perf_counter() + self.response_timeout
+        answered = 0
+        for future in futures:
+            try:
+                future.result(timeout=max(deadline - time.perf_counter(), 0))
+                answered += 1
+            except Exception:
+                pass  # Timed out, dropped, or the handler sent no response
+        for message_id in request_ids:
+            bus.cancel_request(message_id)
+
+        return {
+            "messages": len(messages),
+            "requests": len(futures),
+            "responses": answered,
+            "unanswered": len(futures) - answered,
+            "duration": time.perf_counter() - start,
+            "performance": self.orchestrator.get_performance_report()
+        }
+
+
+def create_benchmark_orchestrator() -> AgentOrchestrator:
+    """Orchestrator with the self-contained rules agents (no RAG or LLM needed)"""
+    from dice_system import DiceSystemAgent
+    from combat_engine import CombatEngineAgent
+    from inventory_manager_agent import InventoryManagerAgent
+    from spell_manager_agent import SpellManagerAgent
+
+    orchestrator = AgentOrchestrator(dispatch_mode="mailbox")
+    dice_agent = DiceSystemAgent()
+    orchestrator.register_agent(dice_agent)
+    orchestrator.register_agent(CombatEngineAgent(dice_agent.dice_roller))
+    orchestrator.register_agent(InventoryManagerAgent())
+    orchestrator.register_agent(SpellManagerAgent())
+    return orchestrator
+
+
+def main():
+    """Replay a journal against the dice/combat/inventory/spell agents and print latency"""
+    if len(sys.argv) < 2:
+        print("Usage: python message_replay.py <journal file> [speed, default 1.0; 0 = flat out]")
+        return
+
+    path = sys.argv[1]
+    speed = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+
+    orchestrator = create_benchmark_orchestrator()
+    orchestrator.start()
+    try:
+        result = JournalReplayer(orchestrator, speed=speed).replay(path)
+    finally:
+        orchestrator.stop()
+
+    print(f"Replayed {result['messages']} messages ({result['requests']} requests) "
+          f"in {result['duration']:.2f}s at {speed}x")
+    print(f"Responses: {result['responses']}, unanswered: {result['unanswered']}\n")
+    print(f"{'Agent.action':<40}{'calls':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for target, metrics in result["performance"]["latency"].items():
+        handler = metrics.get("handler")
+        if handler:
+            print(f"{target:<40}{handler['count']:>8}{handler['p50_ms']:>10.2f}"
+                  f"{handler['p99_ms']:>10.2f}{handler['max_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,14 +5,17 @@ Enhanced with intelligent caching, async processing, and smart pipeline routing
 """
 import json
 import time
-import asyncio
 import os
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable
 from pathlib import Path
 from datetime import datetime
 
-from agent_framework import AgentOrchestrator, MessageType
+from agent_framework import (AgentOrchestrator, AgentMessage, MessageType, BATCH_ACTION, batch_request_data,
+                             is_success)
+from command_router import CommandRouter
+from response_cache import ResponseCache, PersistentResponseCache
 from game_engine import GameEngineAgent, JSONPersister
+from game_state import GameStateMirror
 from npc_controller import NPCControllerAgent
 from scenario_generator import ScenarioGeneratorAgent
 from campaign_management import CampaignManagerAgent
@@ -119,6 +122,46 @@ COMMAND_MAP = {
     'prepare spells': ('spell_manager', 'get_prepared_spells')
 }
 
+# D&D conditions recognised in rule questions
+CONDITIONS = ["blinded", "charmed", "deafened", "frightened", "grappled", "incapacitated",
+              "invisible", "paralyzed", "poisoned", "prone", "restrained", "stunned", "unconscious"]
+
+# Words that suggest a scenario request when no command pattern matched
+SCENARIO_KEYWORDS = [
+    'generate', 'scenario', 'create', 'encounter', 'adventure',
+    'story', 'quest', 'mission', 'situation', 'scene',
+    'tavern', 'dungeon', 'forest', 'cave', 'castle',
+    'bandits', 'goblins', 'dragon', 'combat', 'fight',
+    'mysterious', 'ancient', 'dark', 'haunted',
+    'village', 'town', 'city', 'crossroads'
+]
+SCENARIO_EXCLUDE_PATTERNS = [
+    'rule', 'how does', 'what happens when', 'explain',
+    'roll', 'dice', 'save game', 'load game', 'status'
+]
+
+# How often the persistent cache re-checks the Qdrant point count / ingestion version
+CACHE_FINGERPRINT_CHECK_SECONDS = 300.0
+
+
+def build_command_router(command_map: Dict[str, tuple] = COMMAND_MAP) -> CommandRouter:
+    """Compile the command map plus the condition and scenario fallbacks into one router.
+    Command map entries win in map order; the fallbacks rank below all of them."""
+    router = CommandRouter()
+    router.add_routes(command_map)
+    
+    # Condition questions: "<condition> ... condition" or "happens when <condition>"
+    rule_query = ('rule_enforcement', 'check_rule')
+    router.add_keyword_route(rule_query, any_of=CONDITIONS, all_of=["condition"])
+    router.add_keyword_route(rule_query, any_of=[f"happens when {condition}" for condition in CONDITIONS])
+    
+    router.add_keyword_route(('haystack_pipeline', 'query_scenario'), any_of=SCENARIO_KEYWORDS,
+                             none_of=SCENARIO_EXCLUDE_PATTERNS)
+    
+    router.compile()
+    return router
+
+
 def get_command_help() -> str:
     """Return formatted help text for all available commands"""
     help_text = "🎮 AVAILABLE COMMANDS:\n\n"
@@ -325,86 +368,6 @@ class NarrativeContinuityTracker:
 # These were over-engineered components that added unnecessary complexity
 
 
-class SimpleInlineCache:
-    """Simple TTL-based in-memory cache for basic caching needs"""
-    
-    def __init__(self):
-        self.cache = {}
-        self.timestamps = {}
-    
-    def get(self, key: str, default_ttl_hours: float = 1.0):
-        """Get value from cache if not expired"""
-        if key not in self.cache:
-            return None
-        
-        # Check if expired
-        import time
-        current_time = time.time()
-        if key in self.timestamps:
-            cache_time, ttl_seconds = self.timestamps[key]
-            if current_time - cache_time > ttl_seconds:
-                # Expired, remove from cache
-                del self.cache[key]
-                del self.timestamps[key]
-                return None
-        
-        return self.cache[key]
-    
-    def set(self, key: str, value, ttl_hours: float = 1.0):
-        """Set value in cache with TTL"""
-        import time
-        self.cache[key] = value
-        self.timestamps[key] = (time.time(), ttl_hours * 3600)  # Convert hours to seconds
-    
-    def delete(self, key: str):
-        """Delete specific key from cache"""
-        if key in self.cache:
-            del self.cache[key]
-        if key in self.timestamps:
-            del self.timestamps[key]
-    
-    def clear(self):
-        """Clear all cached items"""
-        self.cache.clear()
-        self.timestamps.clear()
-    
-    def cleanup_expired(self):
-        """Remove all expired items from cache"""
-        import time
-        current_time = time.time()
-        expired_keys = []
-        
-        for key, (cache_time, ttl_seconds) in self.timestamps.items():
-            if current_time - cache_time > ttl_seconds:
-                expired_keys.append(key)
-        
-        for key in expired_keys:
-            if key in self.cache:
-                del self.cache[key]
-            del self.timestamps[key]
-    
-    def get_stats(self) -> dict:
-        """Get cache statistics"""
-        # Clean up expired items first
-        self.cleanup_expired()
-        
-        return {
-            'total_items': len(self.cache),
-            'memory_usage_estimate': sum(len(str(k)) + len(str(v)) for k, v in self.cache.items()),
-            'oldest_item_age_seconds': self._get_oldest_item_age()
-        }
-    
-    def _get_oldest_item_age(self) -> float:
-        """Get age of oldest cached item in seconds"""
-        if not self.timestamps:
-            return 0.0
-        
-        import time
-        current_time = time.time()
-        oldest_time = min(cache_time for cache_time, _ in self.timestamps.values())
-        return current_time - oldest_time
-
-
 class ModularDMAssistant:
     """
     Enhanced Modular DM Assistant with intelligent caching, async processing, and smart routing
@@ -420,7 +383,13 @@ class ModularDMAssistant:
                  tick_seconds: float = 0.8,
                  enable_caching: bool = True,
                  enable_async: bool = True,
-                 game_save_file: Optional[str] = None):
+                 game_save_file: Optional[str] = None,
+                 dispatch_mode: str = "mailbox",
+                 agent_placement: Optional[Dict[str, str]] = None,
+                 journal_path: Optional[str] = None,
+                 cache_max_items: int = 1000,
+                 cache_max_bytes: int = 32 * 1024 * 1024,
+                 persistent_cache_path: Optional[str] = "cache/response_cache.db"):
         """Initialize the enhanced modular DM assistant"""
         
         self.collection_name = collection_name
@@ -441,11 +410,27 @@ class ModularDMAssistant:
         # Ensure game saves directory exists
         os.makedirs(self.game_saves_dir, exist_ok=True)
         
-        # Simple caching only - removed complex pipeline management
-        self.inline_cache = SimpleInlineCache() if enable_caching else None
-        
-        # Agent orchestrator
-        self.orchestrator = AgentOrchestrator()
+        # Bounded LRU + TTL response cache
+        self.inline_cache = ResponseCache(cache_max_items, cache_max_bytes) if enable_caching else None
+        # Rule, RAG and campaign answers also go to disk so they survive restarts
+        self.persistent_cache: Optional[PersistentResponseCache] = None
+        if enable_caching and persistent_cache_path:
+            try:
+                self.persistent_cache = PersistentResponseCache(persistent_cache_path)
+            except Exception as e:
+                print(f"⚠️ Persistent cache unavailable: {e}")
+        self._fingerprint_checked_at = 0.0
+        
+        # Agent orchestrator - mailbox dispatch keeps slow RAG/LLM handlers from
+        # blocking dice, combat and inventory agents. agent_placement maps agent ids to
+        # "process" to host CPU-heavy agents (e.g. "haystack_pipeline") in worker processes;
+        # agents that call them directly still use the in-process object
+        self.orchestrator = AgentOrchestrator(dispatch_mode=dispatch_mode, placement=agent_placement)
+        if journal_path:
+            # Record the session for replay with message_replay.py
+            self.orchestrator.message_bus.start_journal(journal_path)
+        # Agents publish state changes before answering, so cached reads never outlive their data
+        self.orchestrator.message_bus.add_state_listener(self._on_state_changed)
         
         # Agents
         self.haystack_agent: Optional[HaystackPipelineAgent] = None
@@ -468,6 +453,8 @@ class ModularDMAssistant:
         
         # Game state tracking
         self.game_state = {}
+        # Local copy of the engine's state, refreshed with deltas from get_game_state_since
+        self.game_state_mirror = GameStateMirror()
         self.last_command = ""
         self.last_scenario_options = []  # Store last generated options for choice selection
         
@@ -476,11 +463,15 @@ class ModularDMAssistant:
         
         # Removed over-engineered components: AdaptiveErrorRecovery and PerformanceMonitoringDashboard
         
-        # Simple command mapping - no complex class needed
+        # Command patterns compiled into a single-pass router
         self.command_map = COMMAND_MAP
+        self.command_router = build_command_router(self.command_map)
+        # Called with (command, seconds) after every routed command
+        self.command_latency_hook: Callable[[str, float], None] = self._record_command_latency
         
         # Initialize all components
         self._initialize_agents()
+        self._refresh_cache_fingerprint()
         
         # Load game save if specified
         if self.current_save_file:
@@ -603,9 +594,10 @@ class ModularDMAssistant:
         print(f"  • Async Processing: {'✅ Enabled' if self.enable_async else '❌ Disabled'}")
         
         # Show cache statistics
-        if self.enable_caching and self.inline_cache:
+        if self.enable_caching and self.inline_cache is not None:
             inline_stats = self.inline_cache.get_stats()
-            print(f"  • Inline Cache: {inline_stats['total_items']} items cached")
+            print(f"  • Inline Cache: {inline_stats['total_items']} items cached "
+                  f"({inline_stats['memory_bytes'] / 1024:.1f} KB)")
         print()
     
     def _print_agent_status(self):
@@ -643,6 +635,9 @@ class ModularDMAssistant:
         """Stop the orchestrator and all agents"""
         try:
             self.orchestrator.stop()
+            self.orchestrator.message_bus.stop_journal()
+            if self.persistent_cache:
+                self.persistent_cache.close()
             if self.verbose:
                 print("⏹️ Agent orchestrator stopped")
         except Exception as e:
@@ -671,26 +666,23 @@ class ModularDMAssistant:
             else:
                 return f"❌ {response.get('error', 'Failed to select campaign')}"
         
-        # Check for direct command matches
-        for pattern, (agent, action) in self.command_map.items():
-            if pattern in instruction_lower:
-                return self._route_command(agent, action, instruction)
-        
-        # Handle special patterns with parameters
-        if instruction_lower.startswith('roll '):
-            return self._handle_dice_roll(instruction)
-        elif instruction_lower.startswith('rule ') or 'how does' in instruction_lower or self._is_condition_query(instruction_lower):
-            return self._handle_rule_query(instruction)
-        elif self._is_scenario_request(instruction_lower):
-            return self._generate_scenario(instruction)
-        elif instruction_lower.startswith('select option'):
-            import re
-            match = re.search(r'select option (\d+)', instruction_lower)
-            if match:
-                return self._select_player_option(int(match.group(1)))
-        
-        # Fallback to general query
-        return self._handle_general_query(instruction)
+        # One scan finds the highest-precedence command, condition or scenario pattern
+        route = self.command_router.match(instruction_lower)
+        command = f"{route.target[0]}.{route.target[1]}" if route else "general_query"
+        start_time = time.perf_counter()
+        try:
+            if route:
+                return self._route_command(route.target[0], route.target[1], instruction)
+            
+            # Fallback to general query
+            return self._handle_general_query(instruction)
+        finally:
+            if self.command_latency_hook:
+                self.command_latency_hook(command, time.perf_counter() - start_time)
+    
+    def _record_command_latency(self, command: str, seconds: float):
+        """Default latency hook - record per-command timing in the bus performance report"""
+        self.orchestrator.message_bus.performance.record("command", "dm_assistant", command, seconds)
     
     def _route_command(self, agent_id: str, action: str, instruction: str) -> str:
         """Route command to appropriate agent"""
@@ -903,9 +895,9 @@ class ModularDMAssistant:
     def _handle_game_state(self, instruction: str, params: dict) -> str:
         """Handle game state command"""
         if self.game_engine_agent:
-            response = self._send_message_and_wait("game_engine", "get_game_state", {})
-            if response and response.get("game_state"):
-                return f"📊 GAME STATE:\n{json.dumps(response['game_state'], indent=2)}"
+            game_state = self._sync_game_state()
+            if game_state:
+                return f"📊 GAME STATE:\n{json.dumps(game_state, indent=2)}"
         return "❌ Game state not available"
     
     def _handle_system_status(self, instruction: str, params: dict) -> str:
@@ -1156,23 +1148,19 @@ class ModularDMAssistant:
                 return {"success": False, "error": f"Agent {agent_id} not available"}
 
             # Simple caching for cacheable queries
-            cache_key = None
-            if self.enable_caching and self.inline_cache and self._should_cache_simple(agent_id, action, data):
-                cache_key = f"{agent_id}_{action}_{json.dumps(data, sort_keys=True)}"
-                cached_result = self.inline_cache.get(cache_key)
-                if cached_result:
-                    if self.verbose:
-                        print(f"📦 Cache hit for {agent_id}:{action}")
-                    return cached_result
+            cache_key, cached_result = self._lookup_cached_response(agent_id, action, data)
+            if cached_result:
+                return cached_result
             
-            # Send message through orchestrator with retry mechanism
-            message_id = None
+            # Send request through orchestrator with retry mechanism; the message bus
+            # wakes us as soon as the correlated response is delivered
+            start_time = time.time()
+            result = None
             max_retries = 3
             for attempt in range(max_retries):
                 try:
-                    message_id = self.orchestrator.send_message_to_agent(agent_id, action, data)
-                    if message_id:
-                        break
+                    result = self.orchestrator.send_and_wait(agent_id, action, data, timeout=timeout)
+                    break
                 except Exception as e:
                     if self.verbose:
                         print(f"⚠️ Message send attempt {attempt + 1} failed: {e}")
@@ -1180,101 +1168,172 @@ class ModularDMAssistant:
                         raise
                     time.sleep(0.2)  # Brief pause between retries
             
-            if not message_id:
-                if self.verbose:
-                    print(f"❌ Failed to send message to {agent_id} after {max_retries} attempts")
-                return {"success": False, "error": "Failed to send message"}
-            
-            # Wait for response in message history with improved polling
-            start_time = time.time()
-            result = None
-            poll_interval = 0.1
-            last_poll_time = 0
+            return self._finish_response(agent_id, action, result, cache_key, start_time, data)
             
-            while time.time() - start_time < timeout:
-                current_time = time.time()
-                
-                # Adaptive polling - increase interval slightly over time to reduce CPU usage
-                if current_time - last_poll_time >= poll_interval:
-                    try:
-                        history = self.orchestrator.message_bus.get_message_history(limit=50)
-                        for msg in reversed(history):
-                            if (msg.get("response_to") == message_id and
-                                msg.get("message_type") == "response"):
-                                result = msg.get("data", {})
-                                break
-                        
-                        if result:
-                            break
-                        
-                        last_poll_time = current_time
-                        # Gradually increase poll interval to reduce CPU usage
-                        poll_interval = min(0.3, poll_interval * 1.05)
-                        
-                    except Exception as e:
-                        if self.verbose:
-                            print(f"⚠️ Error checking message history: {e}")
-                        
-                time.sleep(0.05)  # Small sleep to prevent busy waiting
-            
-            # Simple caching of successful results
-            if result and cache_key and self.inline_cache:
-                # Set appropriate TTL based on query type
-                ttl_hours = self._get_simple_cache_ttl(agent_id, action)
-                self.inline_cache.set(cache_key, result, ttl_hours)
-                
-                if self.verbose:
-                    print(f"💾 Cached result for {agent_id}:{action} (TTL: {ttl_hours}h)")
-            
-            # Enhanced timeout handling with detailed error reporting
-            if not result:
-                elapsed_time = time.time() - start_time
+        except Exception as e:
+            return self._communication_error(agent_id, action, e)
+    
+    def send_batch_and_wait(self, agent_id: str, requests: List[tuple], timeout: float = 5.0,
+                            stop_on_error: bool = False) -> List[Dict[str, Any]]:
+        """Send several (action, data) requests to one agent in a single round-trip.
+        Returns one result per request; batches are never cached."""
+        try:
+            if not self._check_agent_availability(agent_id, "batch"):
                 if self.verbose:
-                    print(f"⚠️ Timeout waiting for response from {agent_id}:{action} (waited {elapsed_time:.2f}s)")
-                    print(f"📊 Agent status: {self._get_agent_quick_status(agent_id)}")
-                
-                # Return a structured timeout error instead of None
-                return {
-                    "success": False,
-                    "error": f"Agent communication timeout after {elapsed_time:.2f}s",
-                    "agent_id": agent_id,
-                    "action": action,
-                    "timeout_duration": elapsed_time
-                }
+                    print(f"⚠️ Agent {agent_id} not available for batch requests")
+                return [{"success": False, "error": f"Agent {agent_id} not available"} for _ in requests]
             
-            return result
+            start_time = time.time()
+            results = self.orchestrator.send_batch_and_wait(agent_id, requests, timeout=timeout,
+                                                            stop_on_error=stop_on_error)
+            if results is None:
+                error = self._finish_response(agent_id, "batch", None, None, start_time)
+                return [error for _ in requests]
+            return [result if result else {"success": False, "error": "No result"} for result in results]
             
         except Exception as e:
+            error = self._communication_error(agent_id, "batch", e)
+            return [error for _ in requests]
+    
+    def _scatter_gather(self, requests: Dict[str, tuple], timeout: float = 5.0) -> Dict[str, Dict[str, Any]]:
+        """Send {key: (agent_id, action, data)} requests to several agents at once and wait for all
+        of them under one deadline; cached answers are served without a round-trip"""
+        results = {}
+        pending = []
+        for key, (agent_id, action, data) in requests.items():
+            if not self._check_agent_availability(agent_id, action):
+                results[key] = {"success": False, "error": f"Agent {agent_id} not available"}
+                continue
+            cache_key, cached_result = self._lookup_cached_response(agent_id, action, data)
+            if cached_result:
+                results[key] = cached_result
+                continue
+            pending.append((key, agent_id, action, data, cache_key))
+        
+        if not pending:
+            return results
+        
+        start_time = time.time()
+        try:
+            responses = self.orchestrator.scatter_gather(
+                [(agent_id, action, data) for _, agent_id, action, data, _ in pending], timeout=timeout)
+        except Exception as e:
+            for key, agent_id, action, _, _ in pending:
+                results[key] = self._communication_error(agent_id, action, e)
+            return results
+        
+        for (key, agent_id, action, data, cache_key), response in zip(pending, responses):
+            results[key] = self._finish_response(agent_id, action, response, cache_key, start_time, data)
+        return results
+    
+    def _lookup_cached_response(self, agent_id: str, action: str, data: Dict[str, Any]):
+        """Return (cache_key, cached_result) for a request; cache_key is None if not cacheable"""
+        if not (self.enable_caching and self.inline_cache is not None and self._should_cache_simple(agent_id, action, data)):
+            return None, None
+        
+        self._refresh_cache_fingerprint()
+        cache_key = f"{agent_id}_{action}_{json.dumps(data, sort_keys=True)}"
+        cached_result = self.inline_cache.get(cache_key)
+        
+        # Fall back to the on-disk tier and promote hits into memory for their remaining TTL
+        if cached_result is None and self.persistent_cache and self._should_persist(agent_id, action):
+            persisted = self.persistent_cache.get(agent_id, action, data)
+            if persisted:
+                cached_result, remaining_seconds = persisted
+                self.inline_cache.set(cache_key, cached_result, remaining_seconds / 3600, tags=[agent_id])
+        
+        if cached_result and self.verbose:
+            print(f"📦 Cache hit for {agent_id}:{action}")
+        return cache_key, cached_result
+    
+    def _should_persist(self, agent_id: str, action: str) -> bool:
+        """Rule answers, RAG rule lookups and campaign data loaded from disk are stable across restarts.
+        The selected campaign lives in memory only, so answers about it are not persisted."""
+        if agent_id == 'rule_enforcement':
+            return True
+        if agent_id == 'haystack_pipeline':
+            return action == 'query_rules'
+        if agent_id == 'campaign_manager':
+            return action in ('list_campaigns', 'list_players', 'get_player_info')
+        return False
+    
+    def _refresh_cache_fingerprint(self, force: bool = False):
+        """Drop persisted answers when the Qdrant collection's point count or ingestion version changed.
+        Reading the fingerprint also clears the haystack agent's semantic cache on a change."""
+        if not self.haystack_agent:
+            return
+        now = time.time()
+        if not force and now - self._fingerprint_checked_at < CACHE_FINGERPRINT_CHECK_SECONDS:
+            return
+        self._fingerprint_checked_at = now
+        fingerprint = self.haystack_agent.get_collection_fingerprint()
+        if fingerprint is None:
+            return  # Qdrant unreachable so far - keep what is stored
+        if self.persistent_cache and self.persistent_cache.set_fingerprint(fingerprint) and self.verbose:
+            print("🗑️ Document collection changed - persistent response cache cleared")
+    
+    def _finish_response(self, agent_id: str, action: str, result: Optional[Dict[str, Any]],
+                         cache_key: Optional[str], start_time: float,
+                         data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Cache a successful result or build a structured timeout error"""
+        # Cache successful results, tagged with the agent whose state they reflect
+        if cache_key and self.inline_cache is not None and is_success(result):
+            # TTL is a backstop - state changes invalidate entries as they happen
+            ttl_hours = self._get_simple_cache_ttl(agent_id, action)
+            self.inline_cache.set(cache_key, result, ttl_hours, tags=[agent_id])
+            if self.persistent_cache and data is not None and self._should_persist(agent_id, action):
+                self.persistent_cache.set(agent_id, action, data, result, ttl_hours, tags=[agent_id])
+            
             if self.verbose:
-                print(f"❌ Error sending message to {agent_id}:{action}: {e}")
-                import traceback
-                print(f"🔍 Stack trace: {traceback.format_exc()}")
+                print(f"💾 Cached result for {agent_id}:{action} (TTL: {ttl_hours}h)")
+        
+        # Enhanced timeout handling with detailed error reporting
+        if not result:
+            elapsed_time = time.time() - start_time
+            if self.verbose:
+                print(f"⚠️ Timeout waiting for response from {agent_id}:{action} (waited {elapsed_time:.2f}s)")
+                print(f"📊 Agent status: {self._get_agent_quick_status(agent_id)}")
             
-            # Return a structured error instead of None
+            # Return a structured timeout error instead of None
             return {
                 "success": False,
-                "error": f"Communication error: {str(e)}",
+                "error": f"Agent communication timeout after {elapsed_time:.2f}s",
                 "agent_id": agent_id,
-                "action": action
+                "action": action,
+                "timeout_duration": elapsed_time
             }
-    
-    def _should_cache_simple(self, agent_id: str, action: str, data: Dict[str, Any]) -> bool:
-        """Determine if a query should be cached using simple rules"""
-        # Don't cache dice rolls or random content
-        if agent_id == 'dice_system':
-            return False
         
-        # Don't cache scenario generation (creative content)
-        if agent_id == 'haystack_pipeline' and action == 'query_scenario':
-            return False
-        
-        # Don't cache if data contains random/time-sensitive elements
-        query_text = json.dumps(data).lower()
-        if any(keyword in query_text for keyword in ['roll', 'random', 'dice', 'turn', 'timestamp']):
-            return False
+        return result
+    
+    def _communication_error(self, agent_id: str, action: str, error: Exception) -> Dict[str, Any]:
+        """Build a structured error for a failed agent request"""
+        if self.verbose:
+            print(f"❌ Error sending message to {agent_id}:{action}: {error}")
+            import traceback
+            print(f"🔍 Stack trace: {traceback.format_exc()}")
         
-        # Cache rule queries, campaign info, and other static content
-        return True
+        # Return a structured error instead of None
+        return {
+            "success": False,
+            "error": f"Communication error: {str(error)}",
+            "agent_id": agent_id,
+            "action": action
+        }
+    
+    def _should_cache_simple(self, agent_id: str, action: str, data: Dict[str, Any]) -> bool:
+        """Only actions an agent declares cacheable - reads that stay valid until it publishes a
+        state change. Dice rolls, scenarios, batches and tick-driven state never qualify."""
+        agent = self.orchestrator.agents.get(agent_id)
+        return agent is not None and action in agent.cacheable_actions
+    
+    def _on_state_changed(self, message: AgentMessage):
+        """Drop cached responses that depend on state an agent just changed"""
+        tags = message.data.get("tags") or [message.sender_id]
+        removed = self.inline_cache.invalidate_tags(tags) if self.inline_cache is not None else 0
+        if self.persistent_cache:
+            removed += self.persistent_cache.invalidate_tags(tags)
+        if removed and self.verbose:
+            print(f"🗑️ {message.sender_id}:{message.data.get('action')} invalidated {removed} cached responses")
     
     def _get_simple_cache_ttl(self, agent_id: str, action: str) -> float:
         """Get cache TTL (time-to-live) in hours for different agent/action combinations"""
@@ -1413,41 +1472,8 @@ class ModularDMAssistant:
     
     def _generate_scenario_optimized_async(self, user_query: str) -> str:
         """Optimized scenario generation with parallel processing and smart context reduction"""
-        import asyncio
-        
-        async def gather_context_async():
-            """Gather context data in parallel for faster processing"""
-            tasks = []
-            
-            # Task 1: Get campaign context
-            if self.campaign_agent:
-                tasks.append(self._get_campaign_context_async())
-            
-            # Task 2: Get game state
-            if self.game_engine_agent:
-                tasks.append(self._get_game_state_async())
-            
-            # Execute tasks in parallel
-            if tasks:
-                try:
-                    results = await asyncio.gather(*tasks, return_exceptions=True)
-                    campaign_context = results[0] if len(results) > 0 and not isinstance(results[0], Exception) else {}
-                    game_state = results[1] if len(results) > 1 and not isinstance(results[1], Exception) else {}
-                    return campaign_context, game_state
-                except Exception as e:
-                    if self.verbose:
-                        print(f"⚠️ Parallel context gathering failed: {e}")
-                    return {}, {}
-            
-            return {}, {}
-        
-        # Run async context gathering
-        try:
-            campaign_context, game_state_dict = asyncio.run(gather_context_async())
-        except Exception as e:
-            if self.verbose:
-                print(f"⚠️ Async context gathering failed, using sequential: {e}")
-            return self._generate_scenario_standard(user_query)
+        # Gather campaign context and game state in parallel
+        campaign_context, game_state_dict = self._gather_scenario_context()
         
         # Smart context reduction - keep only essential information
         optimized_context = self._create_optimized_context(campaign_context, game_state_dict, user_query)
@@ -1495,19 +1521,34 @@ class ModularDMAssistant:
             error_msg = response.get('error', 'Unknown error') if response else 'Agent communication timeout'
             return f"❌ Failed to generate scenario: {error_msg}"
     
-    async def _get_campaign_context_async(self):
-        """Async campaign context retrieval"""
-        response = self._send_message_and_wait("campaign_manager", "get_campaign_context", {}, timeout=5.0)
-        if response and response.get("success"):
-            return response["context"]
-        return {}
-    
-    async def _get_game_state_async(self):
-        """Async game state retrieval"""
-        response = self._send_message_and_wait("game_engine", "get_game_state", {}, timeout=5.0)
-        if response and response.get("game_state"):
-            return response["game_state"]
-        return {}
+    def _gather_scenario_context(self) -> tuple:
+        """Fetch (campaign_context, game_state) from the campaign manager and game engine at once"""
+        requests = {}
+        if self.campaign_agent:
+            requests["campaign"] = ("campaign_manager", "get_campaign_context", {})
+        if self.game_engine_agent:
+            requests["game_state"] = self._game_state_sync_request()
+        responses = self._scatter_gather(requests, timeout=5.0)
+        
+        campaign_response = responses.get("campaign", {})
+        campaign_context = campaign_response["context"] if campaign_response.get("success") else {}
+        game_state = self._sync_game_state(responses.get("game_state")) if self.game_engine_agent else {}
+        return campaign_context, game_state
+    
+    def _game_state_sync_request(self) -> tuple:
+        """(agent, action, data) asking the game engine for what changed since the mirror's version"""
+        return ("game_engine", "get_game_state_since", {"version": self.game_state_mirror.version})
+    
+    def _sync_game_state(self, response: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Apply a sync response (fetching one if not given) and return a shallow copy of the mirror.
+        Callers may replace top-level keys of the copy but must not edit nested values in place."""
+        if not (response and self.game_state_mirror.apply(response)):
+            # No response yet, or one that doesn't follow the mirror's version - fetch it directly
+            response = self._send_message_and_wait(*self._game_state_sync_request())
+            if response and not self.game_state_mirror.apply(response):
+                self.game_state_mirror.reset()
+                self.game_state_mirror.apply(self._send_message_and_wait(*self._game_state_sync_request()))
+        return dict(self.game_state_mirror.state)
     
     def _create_optimized_context(self, campaign_context: dict, game_state_dict: dict, user_query: str) -> dict:
         """Create optimized context with smart size reduction"""
@@ -1597,46 +1638,32 @@ class ModularDMAssistant:
             if not game_state_dict:
                 game_state_dict = {}
             
-            # Initialize required fields if missing
-            if "story_progression" not in game_state_dict:
-                game_state_dict["story_progression"] = []
-            if "scenario_count" not in game_state_dict:
-                game_state_dict["scenario_count"] = 0
-            if "location" not in game_state_dict:
-                game_state_dict["location"] = "Unknown Location"
+            # Only the keys set here are sent - the engine already holds the rest of the state
+            updates = {key: default for key, default in (("story_progression", []), ("location", "Unknown Location"))
+                       if key not in game_state_dict}
             
             # Update with new scenario information
-            game_state_dict["last_scenario_query"] = user_query
-            game_state_dict["last_scenario_text"] = scenario_text
-            game_state_dict["scenario_count"] = game_state_dict.get("scenario_count", 0) + 1
-            game_state_dict["last_updated"] = __import__('time').time()
-            
-            # Validate that we have meaningful updates to send
-            required_updates = ["last_scenario_query", "last_scenario_text", "scenario_count"]
-            has_updates = any(game_state_dict.get(key) for key in required_updates)
-            
-            if not has_updates:
-                if self.verbose:
-                    print("⚠️ Async game state update skipped: No meaningful updates to send")
-                # Still try to send basic update to prevent "No updates provided" error
-                game_state_dict["last_updated"] = __import__('time').time()
-                game_state_dict["status"] = "active"
+            updates["last_scenario_query"] = user_query
+            updates["last_scenario_text"] = scenario_text
+            updates["scenario_count"] = game_state_dict.get("scenario_count", 0) + 1
+            updates["last_updated"] = time.time()
+            game_state_dict.update(updates)
             
             # Use adequate timeout for non-blocking update
             response = self._send_message_and_wait("game_engine", "update_game_state", {
-                "updates": game_state_dict,
+                "updates": updates,
                 "async_update": True  # Flag to indicate this is an async update
             }, timeout=15.0)  # Increased timeout for reliability
             
             if response and response.get("success"):
                 if self.verbose:
-                    print(f"✅ Async game state updated successfully (scenario #{game_state_dict['scenario_count']})")
+                    print(f"✅ Async game state updated successfully (scenario #{updates['scenario_count']})")
             else:
                 error_msg = response.get('error', 'Unknown error') if response else 'Timeout'
                 if self.verbose:
                     print(f"⚠️ Async game state update failed: {error_msg}")
-                    print(f"🔍 Game state dict keys: {list(game_state_dict.keys())}")
-                    print(f"🔍 Scenario count: {game_state_dict.get('scenario_count', 0)}")
+                    print(f"🔍 Updated keys: {list(updates.keys())}")
+                    print(f"🔍 Scenario count: {updates['scenario_count']}")
                     
         except Exception as e:
             if self.verbose:
@@ -1646,20 +1673,10 @@ class ModularDMAssistant:
     
     def _generate_scenario_standard(self, user_query: str) -> str:
         """Standard scenario generation (fallback method)"""
-        # Get campaign context if available
-        campaign_context = ""
-        campaign_response = self._send_message_and_wait("campaign_manager", "get_campaign_context", {})
-        if campaign_response and campaign_response.get("success"):
-            campaign_context = json.dumps(campaign_response["context"])
-        
-        # Get current game state if available
-        game_state_dict = {}
-        game_state = ""
-        if self.game_engine_agent:
-            state_response = self._send_message_and_wait("game_engine", "get_game_state", {})
-            if state_response and state_response.get("game_state"):
-                game_state_dict = state_response["game_state"]
-                game_state = json.dumps(game_state_dict)
+        # Get campaign context and current game state, if available, in parallel
+        campaign_dict, game_state_dict = self._gather_scenario_context()
+        campaign_context = json.dumps(campaign_dict) if campaign_dict else ""
+        game_state = json.dumps(game_state_dict) if game_state_dict else ""
         
         # Build enhanced query that includes story progression context
         enhanced_query = user_query
@@ -1708,12 +1725,15 @@ class ModularDMAssistant:
                 
                 # Update game state to track scenario generation
                 if self.game_engine_agent and game_state_dict:
-                    game_state_dict["last_scenario_query"] = user_query
-                    game_state_dict["last_scenario_text"] = scenario_text
-                    game_state_dict["scenario_count"] = game_state_dict.get("scenario_count", 0) + 1
+                    updates = {
+                        "last_scenario_query": user_query,
+                        "last_scenario_text": scenario_text,
+                        "scenario_count": game_state_dict.get("scenario_count", 0) + 1
+                    }
+                    game_state_dict.update(updates)
                     
                     response = self._send_message_and_wait("game_engine", "update_game_state", {
-                        "updates": game_state_dict
+                        "updates": updates
                     }, timeout=15.0)  # Increased timeout for better reliability
                     
                     if not (response and response.get("success")) and self.verbose:
@@ -1761,9 +1781,7 @@ class ModularDMAssistant:
         # Get current game state for context
         game_state = {"current_options": "\n".join(self.last_scenario_options)}
         if self.game_engine_agent:
-            state_response = self._send_message_and_wait("game_engine", "get_game_state", {})
-            if state_response and state_response.get("game_state"):
-                game_state.update(state_response["game_state"])
+            game_state.update(self._sync_game_state())
         
         # DETECT SKILL CHECK OPTIONS
         skill_check_result = self._handle_skill_check_option(selected_option)
@@ -1814,7 +1832,8 @@ class ModularDMAssistant:
         updated_game_state = game_state.copy()
         updated_game_state["last_player_choice"] = selected_option
         updated_game_state["last_consequence"] = continuation
-        updated_game_state["story_progression"] = updated_game_state.get("story_progression", [])
+        # A new list - the old one belongs to the game state mirror
+        updated_game_state["story_progression"] = list(updated_game_state.get("story_progression", []))
         
         # Add skill check and combat results to progression
         progression_entry = {
@@ -1834,7 +1853,8 @@ class ModularDMAssistant:
         if self.game_engine_agent:
             try:
                 update_response = self._send_message_and_wait("game_engine", "update_game_state", {
-                    "updates": updated_game_state
+                    "updates": {key: updated_game_state[key] for key in
+                                ("last_player_choice", "last_consequence", "story_progression")}
                 }, timeout=15.0)  # Increased timeout and fixed key name
                 
                 if not (update_response and update_response.get("success")):
@@ -1849,7 +1869,7 @@ class ModularDMAssistant:
             print("📝 Updated game state with player choice progression")
         
         # Clear simple cache entries related to scenarios to force new generation
-        if self.enable_caching and self.inline_cache:
+        if self.enable_caching and self.inline_cache is not None:
             # Clean up expired entries to keep cache fresh
             self.inline_cache.cleanup_expired()
         
@@ -1922,12 +1942,15 @@ class ModularDMAssistant:
                 
                 # Update game state to track the new scenario generation
                 if self.game_engine_agent:
-                    game_state["last_scenario_query"] = continuation_prompt
-                    game_state["last_scenario_text"] = scenario_text
-                    game_state["scenario_count"] = game_state.get("scenario_count", 0) + 1
+                    updates = {
+                        "last_scenario_query": continuation_prompt,
+                        "last_scenario_text": scenario_text,
+                        "scenario_count": game_state.get("scenario_count", 0) + 1
+                    }
+                    game_state.update(updates)
                     
                     response = self._send_message_and_wait("game_engine", "update_game_state", {
-                        "updates": game_state
+                        "updates": updates
                     }, timeout=15.0)  # Increased timeout for reliability
                     
                     if not (response and response.get("success")) and self.verbose:
@@ -2078,36 +2101,33 @@ class ModularDMAssistant:
     def _setup_combat_with_players_and_enemies(self, enemies: List[Dict], game_state: dict):
         """Setup combat by adding all players and enemies to the combat engine"""
         try:
-            # Clear any cached combat failures to ensure fresh start
-            if self.enable_caching and self.inline_cache:
-                self.inline_cache.delete("combat_engine_start_combat_{}")
-            
-            # FIRST: Add all players from campaign
+            # Players from the campaign, then enemies, then start combat - all in one batch
             players_response = self._send_message_and_wait("campaign_manager", "list_players", {})
-            if players_response and players_response.get("players"):
-                for player in players_response["players"]:
-                    add_response = self._send_message_and_wait("combat_engine", "add_combatant", {
-                        "name": player["name"],
-                        "max_hp": player.get("hp", 20),
-                        "armor_class": player.get("combat_stats", {}).get("armor_class", 12),
-                        "is_player": True
-                    })
-                    if self.verbose and add_response and add_response.get("success"):
-                        print(f"📝 Added player {player['name']} to combat")
-            
-            # SECOND: Add all enemies
-            for enemy in enemies:
-                add_response = self._send_message_and_wait("combat_engine", "add_combatant", {
-                    "name": enemy["name"],
-                    "max_hp": enemy["max_hp"],
-                    "armor_class": enemy["armor_class"],
-                    "is_player": False
-                })
-                if self.verbose and add_response and add_response.get("success"):
-                    print(f"📝 Added enemy {enemy['name']} to combat")
+            players = (players_response.get("players") or []) if players_response else []
+            combatants = [{
+                "name": player["name"],
+                "max_hp": player.get("hp", 20),
+                "armor_class": player.get("combat_stats", {}).get("armor_class", 12),
+                "is_player": True
+            } for player in players] + [{
+                "name": enemy["name"],
+                "max_hp": enemy["max_hp"],
+                "armor_class": enemy["armor_class"],
+                "is_player": False
+            } for enemy in enemies]
+            
+            requests = [("add_combatant", combatant) for combatant in combatants]
+            requests.append(("start_combat", {}))
+            results = self.send_batch_and_wait("combat_engine", requests,
+                                               timeout=5.0 + 0.1 * len(requests))
+            
+            if self.verbose:
+                for combatant, add_response in zip(combatants, results):
+                    if add_response.get("success"):
+                        kind = "player" if combatant["is_player"] else "enemy"
+                        print(f"📝 Added {kind} {combatant['name']} to combat")
             
-            # THIRD: Now start combat (after combatants are added)
-            start_response = self._send_message_and_wait("combat_engine", "start_combat", {})
+            start_response = results[-1] if len(results) == len(requests) else None
             if not (start_response and start_response.get("success")):
                 if self.verbose:
                     error_msg = start_response.get('error', 'Unknown error') if start_response else 'Timeout'
@@ -2115,8 +2135,7 @@ class ModularDMAssistant:
                 return
             
             if self.verbose:
-                player_count = len(players_response.get("players", [])) if players_response else 0
-                print(f"⚔️ Combat successfully initialized with {player_count} players and {len(enemies)} enemies")
+                print(f"⚔️ Combat successfully initialized with {len(players)} players and {len(enemies)} enemies")
                 
         except Exception as e:
             if self.verbose:
@@ -2177,44 +2196,6 @@ class ModularDMAssistant:
             else:
                 print(f"📝 Stored {len(options)} scenario options for selection")
     
-    def _is_condition_query(self, instruction_lower: str) -> bool:
-        """Determine if the instruction is asking about D&D conditions"""
-        conditions = ["blinded", "charmed", "deafened", "frightened", "grappled", "incapacitated",
-                     "invisible", "paralyzed", "poisoned", "prone", "restrained", "stunned", "unconscious"]
-        
-        # Check for condition queries
-        for condition in conditions:
-            if (f"{condition} condition" in instruction_lower or
-                f"what happens when {condition}" in instruction_lower or
-                f"happens when {condition}" in instruction_lower or
-                (condition in instruction_lower and "condition" in instruction_lower)):
-                return True
-        
-        return False
-    
-    def _is_scenario_request(self, instruction_lower: str) -> bool:
-        """Determine if the instruction is requesting scenario generation"""
-        scenario_keywords = [
-            'generate', 'scenario', 'create', 'encounter', 'adventure',
-            'story', 'quest', 'mission', 'situation', 'scene',
-            'tavern', 'dungeon', 'forest', 'cave', 'castle',
-            'bandits', 'goblins', 'dragon', 'combat', 'fight',
-            'mysterious', 'ancient', 'dark', 'haunted',
-            'village', 'town', 'city', 'crossroads'
-        ]
-        
-        # Check if any scenario keywords are present
-        if any(keyword in instruction_lower for keyword in scenario_keywords):
-            # But exclude if it's clearly a rule query or other command
-            exclude_patterns = [
-                'rule', 'how does', 'what happens when', 'explain',
-                'roll', 'dice', 'save game', 'load game', 'status'
-            ]
-            if not any(pattern in instruction_lower for pattern in exclude_patterns):
-                return True
-        
-        return False
-    
     def _get_system_status(self) -> str:
         """Get comprehensive system status"""
         status = "🤖 MODULAR DM ASSISTANT STATUS:\n\n"
@@ -2237,10 +2218,61 @@ class ModularDMAssistant:
         status += f"  • Total Messages: {stats['total_messages']}\n"
         status += f"  • Queue Size: {stats['queue_size']}\n"
         status += f"  • Registered Agents: {stats['registered_agents']}\n"
+        status += f"  • Dispatch Mode: {stats['dispatch_mode']}\n"
+        busy_mailboxes = {agent_id: size for agent_id, size in stats.get('mailbox_sizes', {}).items() if size}
+        if busy_mailboxes:
+            status += f"  • Busy Mailboxes: {', '.join(f'{a} ({n})' for a, n in busy_mailboxes.items())}\n"
+        queue_metrics = stats.get('queue_metrics', {})
+        queues = [queue_metrics.get('main', {})] + list(queue_metrics.get('mailboxes', {}).values())
+        dropped = sum(q.get('dropped', 0) for q in queues)
+        coalesced = sum(q.get('coalesced', 0) for q in queues)
+        if dropped or coalesced:
+            status += f"  • Overflow: {dropped} dropped, {coalesced} coalesced\n"
+        
+        # Slowest agent handlers by total time, with queue wait and end-to-end latency
+        performance = self.orchestrator.get_performance_report()
+        if performance["bottlenecks"]:
+            status += f"\n⏱️ PERFORMANCE (by total handler time):\n"
+            for entry in performance["bottlenecks"]:
+                latency = performance["latency"].get(entry["target"], {})
+                queue_wait = latency.get("queue_wait", {})
+                end_to_end = latency.get("end_to_end", {})
+                status += (f"  • {entry['target']}: {entry['count']} calls, "
+                           f"p50 {entry['p50_ms']:.1f}ms, p99 {entry['p99_ms']:.1f}ms")
+                if queue_wait:
+                    status += f", queue p99 {queue_wait['p99_ms']:.1f}ms"
+                if end_to_end:
+                    status += f", end-to-end p99 {end_to_end['p99_ms']:.1f}ms"
+                status += "\n"
+        
+        # Response cache counters
+        if self.enable_caching and self.inline_cache is not None:
+            cache_stats = self.inline_cache.get_stats()
+            status += f"\n📦 RESPONSE CACHE:\n"
+            status += (f"  • Items: {cache_stats['total_items']}/{cache_stats['max_items']}, "
+                       f"{cache_stats['memory_bytes'] / 1024:.1f}/{cache_stats['max_bytes'] / 1024:.0f} KB\n")
+            status += (f"  • Hits: {cache_stats['hits']}, Misses: {cache_stats['misses']} "
+                       f"({cache_stats['hit_rate']:.0%} hit rate)\n")
+            status += (f"  • Evictions: {cache_stats['evictions']}, Expirations: {cache_stats['expirations']}, "
+                       f"Invalidations: {cache_stats['invalidations']}\n")
+            if self.persistent_cache:
+                disk_stats = self.persistent_cache.get_stats()
+                status += (f"  • On Disk: {disk_stats['total_items']} items, {disk_stats['hits']} hits "
+                           f"({disk_stats['hit_rate']:.0%}), {disk_stats['invalidations']} invalidations\n")
+        
+        # Query the RAG, combat and dice agents at once
+        requests = {}
+        if self.haystack_agent:
+            requests["rag"] = ("haystack_pipeline", "get_pipeline_status", {})
+        if self.combat_agent:
+            requests["combat"] = ("combat_engine", "get_combat_status", {})
+        if self.dice_agent:
+            requests["dice"] = ("dice_system", "get_roll_history", {"limit": 1})
+        responses = self._scatter_gather(requests)
         
         # RAG system status
         if self.haystack_agent:
-            rag_response = self._send_message_and_wait("haystack_pipeline", "get_pipeline_status", {})
+            rag_response = responses["rag"]
             if rag_response:
                 status += f"\n🔍 RAG SYSTEM:\n"
                 status += f"  • LLM Available: {'✅' if rag_response.get('has_llm') else '❌'}\n"
@@ -2248,10 +2280,15 @@ class ModularDMAssistant:
                 pipelines = rag_response.get('pipelines', {})
                 for name, available in pipelines.items():
                     status += f"  • {name.title()} Pipeline: {'✅' if available else '❌'}\n"
+                semantic = rag_response.get('semantic_cache')
+                if semantic:
+                    status += (f"  • Semantic Cache: {semantic['hits']}/{semantic['lookups']} hits "
+                               f"({semantic['hit_rate']:.0%}), {semantic['entries']} entries, "
+                               f"threshold {semantic['threshold']}\n")
         
         # Combat system status
         if self.combat_agent:
-            combat_response = self._send_message_and_wait("combat_engine", "get_combat_status", {})
+            combat_response = responses["combat"]
             if combat_response and combat_response.get("success"):
                 combat_status = combat_response["status"]
                 status += f"\n⚔️ COMBAT SYSTEM:\n"
@@ -2265,7 +2302,7 @@ class ModularDMAssistant:
         
         # Dice system status
         if self.dice_agent:
-            history_response = self._send_message_and_wait("dice_system", "get_roll_history", {"limit": 1})
+            history_response = responses["dice"]
             if history_response and history_response.get("success"):
                 history = history_response.get("history", [])
                 status += f"\n🎲 DICE SYSTEM:\n"
@@ -2780,31 +2817,34 @@ class ModularDMAssistant:
             
             filepath = os.path.join(self.game_saves_dir, filename)
             
-            # Gather current game state
+            # Gather game state, campaign/players info and combat state from all agents at once
+            requests = {
+                "campaign": ("campaign_manager", BATCH_ACTION,
+                             batch_request_data([("get_campaign_info", {}), ("list_players", {})]))
+            }
+            if self.game_engine_agent:
+                requests["game_state"] = self._game_state_sync_request()
+            if self.combat_agent:
+                requests["combat"] = ("combat_engine", "get_combat_status", {})
+            responses = self._scatter_gather(requests)
+            
             current_game_state = {}
             if self.game_engine_agent:
-                state_response = self._send_message_and_wait("game_engine", "get_game_state", {})
-                if state_response and state_response.get("game_state"):
-                    current_game_state = state_response["game_state"]
+                current_game_state = self._sync_game_state(responses.get("game_state"))
             
-            # Gather campaign info
             campaign_info = {}
-            campaign_response = self._send_message_and_wait("campaign_manager", "get_campaign_info", {})
-            if campaign_response and campaign_response.get("success"):
-                campaign_info = campaign_response["campaign"]
-            
-            # Gather players info
             players_info = []
-            players_response = self._send_message_and_wait("campaign_manager", "list_players", {})
-            if players_response and players_response.get("players"):
+            campaign_results = responses["campaign"].get("results") or [{}, {}]
+            campaign_response, players_response = campaign_results
+            if campaign_response.get("success"):
+                campaign_info = campaign_response["campaign"]
+            if players_response.get("players"):
                 players_info = players_response["players"]
             
-            # Gather combat state if active
             combat_state = {}
-            if self.combat_agent:
-                combat_response = self._send_message_and_wait("combat_engine", "get_combat_status", {})
-                if combat_response and combat_response.get("success"):
-                    combat_state = combat_response["status"]
+            combat_response = responses.get("combat", {})
+            if combat_response.get("success"):
+                combat_state = combat_response["status"]
             
             # Create save data structure
             save_data = {
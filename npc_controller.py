@@ -3,6 +3,7 @@ NPC Controller for DM Assistant
 Manages NPC behavior and decision-making using RAG and rule-based systems
 """
 import random
+from collections.abc import Mapping
 from typing import Dict, List, Any, Optional
 
 from agent_framework import BaseAgent, MessageType, AgentMessage
@@ -12,6 +13,11 @@ from haystack_pipeline_agent import HaystackPipelineAgent
 class NPCControllerAgent(BaseAgent):
     """NPC Controller as an agent that manages NPC behavior and decisions"""
     
+    # Purely reactive - no periodic process_tick needed
+    tick_period = 0
+    # Only the latest game state matters - a newer tick request replaces a queued one
+    coalesce_actions = {"make_decisions"}
+    
     def __init__(self, haystack_agent: Optional[HaystackPipelineAgent] = None, mode: str = "hybrid"):
         super().__init__("npc_controller", "NPCController")
         self.haystack_agent = haystack_agent
@@ -66,7 +72,7 @@ class NPCControllerAgent(BaseAgent):
         
         for npc_name, npc in game_state.get("npcs", {}).items():
             # Normalize NPC structure
-            npc_obj = npc if isinstance(npc, dict) else {"name": npc}
+            npc_obj = dict(npc) if isinstance(npc, Mapping) else {"name": npc}
             npc_obj["name"] = npc_name  # Ensure name is set
             
             decision = self._make_npc_decision(npc_obj, game_state)
@@ -232,7 +238,7 @@ class NPCController:
         
         for npc_name, npc in game_state.get("npcs", {}).items():
             # Normalize NPC structure
-            npc_obj = npc if isinstance(npc, dict) else {"name": npc}
+            npc_obj = dict(npc) if isinstance(npc, Mapping) else {"name": npc}
             
             if npc_obj.get("type") == "simple":
                 action = self._rule_based(npc_obj, game_state)
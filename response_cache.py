@@ -0,0 +1,516 @@
+"""
+Response Cache for DM Assistant
+Bounded in-memory cache for agent responses with LRU eviction, TTL expiry and byte accounting,
+plus a persistent SQLite tier for rule, RAG and campaign answers and an embedding-similarity
+cache for RAG pipelines
+"""
+import hashlib
+import heapq
+import json
+import math
+import operator
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Per-collection ingestion counters, bumped by batch_pdf_processor after each ingestion run
+INGESTION_VERSIONS_FILE = "cache/ingestion_versions.json"
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory footprint in bytes of a response (containers walked recursively)"""
+    seen = set()
+    size = 0
+    stack = [value]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+    return size
+
+
+@dataclass
+class CacheEntry:
+    """A cached value with its size, absolute expiry time (time.monotonic) and dependency tags"""
+    value: Any
+    size: int
+    expires_at: float
+    created_at: float
+    tags: FrozenSet[str] = frozenset()
+
+
+class ResponseCache:
+    """
+    LRU cache bounded by item count and total bytes, with per-entry TTL.
+    Expiry times live in a min-heap, so expired entries are dropped in O(log n) each
+    instead of scanning the whole cache. Entries can carry dependency tags (the agents whose
+    state they were computed from); invalidate_tags drops every entry carrying one of them.
+    """
+
+    def __init__(self, max_items: int = 1000, max_bytes: int = 32 * 1024 * 1024,
+                 default_ttl_hours: float = 1.0):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.default_ttl_hours = default_ttl_hours
+        self.entries: "OrderedDict[str, CacheEntry]" = OrderedDict()  # least recently used first
+        self.expiry_heap: List[Tuple[float, str]] = []
+        # tag -> keys of the entries depending on it
+        self.tag_index: Dict[str, Set[str]] = {}
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get value from cache if present and not expired"""
+        now = time.monotonic()
+        with self.lock:
+            self._expire(now)
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def set(self, key: str, value: Any, ttl_hours: Optional[float] = None, tags: Iterable[str] = ()):
+        """Set value in cache with TTL, evicting least recently used entries to stay in bounds"""
+        size = estimate_size(key) + estimate_size(value)
+        now = time.monotonic()
+        ttl_seconds = (self.default_ttl_hours if ttl_hours is None else ttl_hours) * 3600
+        with self.lock:
+            self._remove(key)
+            if size > self.max_bytes:
+                return  # Would evict everything else and still not fit
+
+            entry = CacheEntry(value, size, now + ttl_seconds, now, frozenset(tags))
+            self.entries[key] = entry
+            self.total_bytes += size
+            for tag in entry.tags:
+                self.tag_index.setdefault(tag, set()).add(key)
+            heapq.heappush(self.expiry_heap, (entry.expires_at, key))
+
+            while len(self.entries) > self.max_items or self.total_bytes > self.max_bytes:
+                evicted_key, evicted = self.entries.popitem(last=False)
+                self._forget(evicted_key, evicted)
+                self.evictions += 1
+
+            # Replaced and evicted entries leave stale heap items behind; rebuild occasionally
+            if len(self.expiry_heap) > 2 * len(self.entries) + 64:
+                self.expiry_heap = [(e.expires_at, k) for k, e in self.entries.items()]
+                heapq.heapify(self.expiry_heap)
+
+    def delete(self, key: str):
+        """Delete specific key from cache"""
+        with self.lock:
+            self._remove(key)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Drop every entry depending on any of the tags; returns how many were dropped"""
+        removed = 0
+        with self.lock:
+            for tag in tags:
+                for key in self.tag_index.pop(tag, ()):
+                    if key in self.entries:
+                        self._remove(key)
+                        removed += 1
+            self.invalidations += removed
+        return removed
+
+    def clear(self):
+        """Clear all cached items (counters are kept)"""
+        with self.lock:
+            self.entries.clear()
+            self.expiry_heap.clear()
+            self.tag_index.clear()
+            self.total_bytes = 0
+
+    def cleanup_expired(self):
+        """Remove all expired items from cache"""
+        with self.lock:
+            self._expire(time.monotonic())
+
+    def _remove(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self._forget(key, entry)
+
+    def _forget(self, key: str, entry: CacheEntry):
+        """Release the bytes and tag index slots of an entry already removed from entries"""
+        self.total_bytes -= entry.size
+        for tag in entry.tags:
+            keys = self.tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tag_index[tag]
+
+    def _expire(self, now: float):
+        """Pop expired heap items; items whose entry was replaced or removed are skipped"""
+        heap = self.expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, key = heapq.heappop(heap)
+            entry = self.entries.get(key)
+            if entry is not None and entry.expires_at == expires_at:
+                del self.entries[key]
+                self._forget(key, entry)
+                self.expirations += 1
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        now = time.monotonic()
+        with self.lock:
+            self._expire(now)
+            lookups = self.hits + self.misses
+            oldest = min((entry.created_at for entry in self.entries.values()), default=now)
+            return {
+                'total_items': len(self.entries),
+                'max_items': self.max_items,
+                'memory_bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'oldest_item_age_seconds': now - oldest
+            }
+
+
+def read_ingestion_version(collection_name: str, path: str = INGESTION_VERSIONS_FILE) -> int:
+    """How many ingestion runs have written to a collection (0 if unknown)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return int(json.load(f).get(collection_name, 0))
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def bump_ingestion_version(collection_name: str, path: str = INGESTION_VERSIONS_FILE) -> int:
+    """Record that documents were (re-)ingested into a collection; returns the new version"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            versions = json.load(f)
+    except (OSError, ValueError):
+        versions = {}
+    versions[collection_name] = int(versions.get(collection_name, 0)) + 1
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(versions, f, indent=2)
+    os.replace(temp_path, path)
+    return versions[collection_name]
+
+
+def normalise_query(value: Any) -> Any:
+    """Case-fold and collapse whitespace/trailing punctuation in string values so equivalent
+    questions share a cache entry"""
+    if isinstance(value, str):
+        return re.sub(r"\s+", " ", value.strip().lower()).rstrip("?!. ")
+    if isinstance(value, dict):
+        return {key: normalise_query(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalise_query(item) for item in value]
+    return value
+
+
+def query_hash(agent_id: str, action: str, data: Dict[str, Any]) -> str:
+    """Stable key for an agent request with normalised query data"""
+    payload = json.dumps([agent_id, action, normalise_query(data)], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class PersistentResponseCache:
+    """
+    SQLite-backed response cache that survives restarts, for rule, RAG and campaign answers.
+    Entries belong to a corpus fingerprint (Qdrant point count + ingestion version); when the
+    fingerprint changes every entry is dropped, since answers may cite documents that changed.
+    """
+
+    def __init__(self, path: str = "cache/response_cache.db"):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, agent_id TEXT, action TEXT, "
+            "value TEXT NOT NULL, expires_at REAL NOT NULL, created_at REAL NOT NULL)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS response_tags (tag TEXT NOT NULL, key TEXT NOT NULL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS response_tags_by_tag ON response_tags (tag)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS response_tags_by_key ON response_tags (key)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self.connection.commit()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def fingerprint(self) -> Optional[str]:
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM meta WHERE name = 'fingerprint'").fetchone()
+        return row[0] if row else None
+
+    def set_fingerprint(self, fingerprint: str) -> bool:
+        """Bind the cache to a corpus fingerprint; returns True if a change invalidated it"""
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM meta WHERE name = 'fingerprint'").fetchone()
+            if row and row[0] == fingerprint:
+                return False
+            changed = row is not None
+            if changed:
+                self.invalidations += self.connection.execute("DELETE FROM responses").rowcount
+                self.connection.execute("DELETE FROM response_tags")
+            self.connection.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('fingerprint', ?)",
+                                    (fingerprint,))
+            self.connection.commit()
+            return changed
+
+    def get(self, agent_id: str, action: str, data: Dict[str, Any]) -> Optional[Tuple[Any, float]]:
+        """Return (value, remaining TTL in seconds) for a request, or None"""
+        key = query_hash(agent_id, action, data)
+        now = time.time()
+        with self.lock:
+            row = self.connection.execute("SELECT value, expires_at FROM responses WHERE key = ?",
+                                          (key,)).fetchone()
+            if row and row[1] <= now:
+                self.connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.connection.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0]), row[1] - now
+
+    def set(self, agent_id: str, action: str, data: Dict[str, Any], value: Any, ttl_hours: float,
+            tags: Iterable[str] = ()):
+        """Store a JSON-serialisable response, dropped early if one of its tags is invalidated"""
+        try:
+            encoded = json.dumps(value)
+        except (TypeError, ValueError):
+            return  # Not representable on disk; the in-memory tier still has it
+        key = query_hash(agent_id, action, data)
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses (key, agent_id, action, value, expires_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, agent_id, action, encoded, now + ttl_hours * 3600, now))
+            self.connection.execute("DELETE FROM response_tags WHERE key = ?", (key,))
+            self.connection.executemany("INSERT INTO response_tags (tag, key) VALUES (?, ?)",
+                                        [(tag, key) for tag in set(tags)])
+            self.connection.commit()
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Drop every stored response depending on any of the tags; returns how many were dropped"""
+        tags = list(tags)
+        if not tags:
+            return 0
+        placeholders = ", ".join("?" * len(tags))
+        with self.lock:
+            keys = [(row[0],) for row in self.connection.execute(
+                f"SELECT DISTINCT key FROM response_tags WHERE tag IN ({placeholders})", tags)]
+            if not keys:
+                return 0
+            removed = self.connection.executemany("DELETE FROM responses WHERE key = ?", keys).rowcount
+            self.connection.executemany("DELETE FROM response_tags WHERE key = ?", keys)
+            self.connection.commit()
+            self.invalidations += removed
+            return removed
+
+    def cleanup_expired(self):
+        """Remove all expired rows"""
+        with self.lock:
+            self.connection.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+            self.connection.execute("DELETE FROM response_tags WHERE key NOT IN (SELECT key FROM responses)")
+            self.connection.commit()
+
+    def clear(self):
+        with self.lock:
+            self.connection.execute("DELETE FROM responses")
+            self.connection.execute("DELETE FROM response_tags")
+            self.connection.commit()
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        with self.lock:
+            items = self.connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'total_items': items,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'invalidations': self.invalidations,
+            'fingerprint': self.fingerprint
+        }
+
+
+@dataclass
+class SemanticEntry:
+    """A cached pipeline answer with the unit-length embedding of the query that produced it"""
+    query: str
+    vector: Any
+    answer: Any
+    expires_at: float
+
+
+class SemanticCache:
+    """
+    Answers a query from a previous one whose embedding is close enough (cosine similarity at or
+    above threshold), so paraphrases skip retrieval, reranking and the LLM.
+    Entries are kept per namespace (one per pipeline), oldest evicted first.
+    """
+
+    def __init__(self, threshold: float = 0.9, max_entries: int = 512, ttl_hours: float = 6.0):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_hours * 3600
+        self.namespaces: Dict[str, "OrderedDict[int, SemanticEntry]"] = {}
+        # Stacked vectors per namespace for one matrix-vector product per lookup (numpy only)
+        self._matrices: Dict[str, Tuple[List[int], Any]] = {}
+        self._next_id = 0
+        # Bumped by clear(); a store carrying an older generation was computed before the clear
+        self.generation = 0
+        self.lock = threading.Lock()
+
+        self.lookups = 0
+        self.hits = 0
+        self.similarity_total = 0.0
+
+    @staticmethod
+    def _normalise(embedding: Sequence[float]):
+        if NUMPY_AVAILABLE:
+            vector = np.asarray(embedding, dtype=np.float32)
+            norm = float(np.linalg.norm(vector))
+        else:
+            vector = [float(x) for x in embedding]
+            norm = math.sqrt(sum(x * x for x in vector))
+        if norm == 0:
+            return None
+        return vector / norm if NUMPY_AVAILABLE else [x / norm for x in vector]
+
+    def lookup(self, namespace: str, embedding: Sequence[float]) -> Optional[Tuple[Any, float, str]]:
+        """Return (answer, similarity, original query) for the closest cached query, or None"""
+        vector = self._normalise(embedding)
+        now = time.time()
+        with self.lock:
+            self.lookups += 1
+            entries = self.namespaces.get(namespace)
+            if not entries or vector is None:
+                return None
+            self._expire(namespace, entries, now)
+
+            best_id, best_similarity = None, -1.0
+            if NUMPY_AVAILABLE:
+                matrix = self._matrix(namespace, entries)
+                if matrix is not None:
+                    ids, vectors = matrix
+                    similarities = vectors @ vector
+                    index = int(np.argmax(similarities))
+                    best_id, best_similarity = ids[index], float(similarities[index])
+            else:
+                for entry_id, entry in entries.items():
+                    similarity = sum(map(operator.mul, entry.vector, vector))
+                    if similarity > best_similarity:
+                        best_id, best_similarity = entry_id, similarity
+
+            if best_id is None or best_similarity < self.threshold:
+                return None
+            self.hits += 1
+            self.similarity_total += best_similarity
+            entry = entries[best_id]
+            return entry.answer, best_similarity, entry.query
+
+    def store(self, namespace: str, query: str, embedding: Sequence[float], answer: Any,
+              generation: Optional[int] = None):
+        """Remember the answer produced for a query embedding. Pass the generation read before the
+        answer was computed; the answer is dropped if the cache was cleared in the meantime."""
+        vector = self._normalise(embedding)
+        if vector is None:
+            return
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return
+            entries = self.namespaces.setdefault(namespace, OrderedDict())
+            entries[self._next_id] = SemanticEntry(query, vector, answer, time.time() + self.ttl_seconds)
+            self._next_id += 1
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+            self._matrices.pop(namespace, None)
+
+    def clear(self):
+        with self.lock:
+            self.namespaces.clear()
+            self._matrices.clear()
+            self.generation += 1
+
+    def _expire(self, namespace: str, entries: "OrderedDict[int, SemanticEntry]", now: float):
+        # Insertion order is expiry order (fixed TTL), so expired entries are at the front
+        expired = False
+        while entries and next(iter(entries.values())).expires_at <= now:
+            entries.popitem(last=False)
+            expired = True
+        if expired:
+            self._matrices.pop(namespace, None)
+
+    def _matrix(self, namespace: str, entries: "OrderedDict[int, SemanticEntry]"):
+        if not entries:
+            return None
+        matrix = self._matrices.get(namespace)
+        if matrix is None:
+            matrix = (list(entries.keys()), np.stack([entry.vector for entry in entries.values()]))
+            self._matrices[namespace] = matrix
+        return matrix
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit-rate report"""
+        with self.lock:
+            return {
+                'entries': sum(len(entries) for entries in self.namespaces.values()),
+                'lookups': self.lookups,
+                'hits': self.hits,
+                'hit_rate': self.hits / self.lookups if self.lookups else 0.0,
+                'mean_hit_similarity': self.similarity_total / self.hits if self.hits else 0.0,
+                'threshold': self.threshold
+            }
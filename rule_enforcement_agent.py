@@ -56,6 +56,10 @@ class ActionValidation:
 class RuleEnforcementAgent(BaseAgent):
     """Rule Enforcement Agent that validates actions and provides rule guidance"""
     
+    # Purely reactive - no periodic process_tick needed
+    tick_period = 0
+    cacheable_actions = {"check_rule", "get_condition_effects", "get_rule_summary"}
+    
     def __init__(self, rag_agent=None, strict_mode: bool = False):
         super().__init__("rule_enforcement", "RuleEnforcement")
         self.rag_agent = rag_agent
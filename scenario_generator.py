@@ -17,6 +17,11 @@ CLAUDE_AVAILABLE = True
 class ScenarioGeneratorAgent(BaseAgent):
     """Scenario Generator as an agent that creates dynamic scenarios and handles player choices"""
     
+    # Purely reactive - no periodic process_tick needed
+    tick_period = 0
+    # Only the latest game state matters - a newer tick request replaces a queued one
+    coalesce_actions = {"generate_scenario"}
+    
     def __init__(self, haystack_agent: Optional[HaystackPipelineAgent] = None, verbose: bool = False):
         super().__init__("scenario_generator", "ScenarioGenerator")
         self.haystack_agent = haystack_agent
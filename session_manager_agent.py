@@ -11,6 +11,12 @@ from agent_framework import BaseAgent
 class SessionManagerAgent(BaseAgent):
     """Agent for managing D&D game sessions, rests, and time tracking"""
     
+    # Purely reactive - no periodic process_tick needed
+    tick_period = 0
+    cacheable_actions = {"get_game_time"}
+    mutating_actions = {"start_session", "end_session", "take_short_rest", "take_long_rest", "advance_time",
+                        "set_game_time", "add_time"}
+    
     def __init__(self, sessions_dir: str = "docs/sessions", verbose: bool = False):
         super().__init__("session_manager", "session_manager")
         self.sessions_dir = sessions_dir
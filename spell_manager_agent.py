@@ -4,18 +4,27 @@ Handles spell casting, preparation, spell slots, and magic-related D&D mechanics
 """
 import json
 import os
+import re
 import time
 from typing import Dict, List, Any, Optional
-from agent_framework import BaseAgent
+from agent_framework import BaseAgent, MessageType
 
 class SpellManagerAgent(BaseAgent):
     """Agent for managing D&D spellcasting and magic"""
     
+    # Concentration expiry uses scheduler timers instead of periodic ticks
+    tick_period = 0
+    cacheable_actions = {"get_prepared_spells", "get_spell_slots", "get_known_spells", "search_spells",
+                         "get_spell_info", "get_spell_save_dc", "get_spell_attack_bonus"}
+    mutating_actions = {"prepare_spells", "cast_spell", "restore_spell_slots", "learn_spell",
+                        "initialize_spellcaster", "upcast_spell"}
+    
     def __init__(self, spells_dir: str = "docs/spells", verbose: bool = False):
         super().__init__("spell_manager", "spell_manager")
         self.spells_dir = spells_dir
         self.spell_database = {}
         self.character_spellcasting = {}
+        self.concentration_timers: Dict[str, int] = {}
         self.verbose = verbose
         
         # Ensure spells directory exists
@@ -43,21 +52,55 @@ class SpellManagerAgent(BaseAgent):
         self.register_handler("upcast_spell", self._handle_upcast_spell)
         self.register_handler("get_spell_save_dc", self._handle_get_spell_save_dc)
         self.register_handler("get_spell_attack_bonus", self._handle_get_spell_attack_bonus)
+        self.register_handler("expire_concentration", lambda message: self._expire_concentration())
     
     def process_tick(self):
         """Process one tick/cycle of the agent's main loop"""
-        # Check for concentration spell durations and effects
+        self._expire_concentration()
+    
+    def _expire_concentration(self):
+        """End concentration spells whose duration has elapsed"""
         current_time = time.time()
+        expired = False
         for character_name, spell_data in self.character_spellcasting.items():
             concentration_spell = spell_data.get("concentration_spell")
             if concentration_spell:
-                duration = concentration_spell.get("duration", 0)
-                start_time = concentration_spell.get("start_time", 0)
+                duration = spell_data.get("concentration_duration", 0)
+                start_time = spell_data.get("concentration_started", 0)
                 if duration > 0 and current_time - start_time >= duration:
                     # Concentration spell expired
                     spell_data["concentration_spell"] = None
+                    self.concentration_timers.pop(character_name, None)
+                    expired = True
                     if self.verbose:
-                        print(f"⏰ {character_name}'s concentration on {concentration_spell.get('name', 'spell')} ended")
+                        print(f"⏰ {character_name}'s concentration on {concentration_spell} ended")
+        if expired:
+            self.publish_state_change("expire_concentration")
+    
+    def _start_concentration(self, character_name: str, spellcasting: Dict[str, Any], spell_data: Dict[str, Any]):
+        """Track a concentration spell and schedule a timer for its expiry"""
+        duration = self._parse_duration_seconds(spell_data.get("duration", ""))
+        spellcasting["concentration_spell"] = spell_data["name"]
+        spellcasting["concentration_started"] = time.time()
+        spellcasting["concentration_duration"] = duration
+        
+        previous_timer = self.concentration_timers.pop(character_name, None)
+        if previous_timer is not None:
+            self.cancel_timer(previous_timer)
+        if duration > 0 and self.scheduler:
+            self.concentration_timers[character_name] = self.schedule_timer(duration, self._queue_expiry)
+    
+    def _queue_expiry(self):
+        """Timer callback - runs on the scheduler thread, so expiry goes through this agent's own mailbox"""
+        self.send_message(self.agent_id, "expire_concentration", {}, message_type=MessageType.EVENT)
+    
+    def _parse_duration_seconds(self, duration: str) -> float:
+        """Convert a spell duration like 'Concentration, up to 10 minutes' to seconds"""
+        match = re.search(r"(\d+)\s*(round|minute|hour|day)", duration.lower())
+        if not match:
+            return 0
+        unit_seconds = {"round": 6, "minute": 60, "hour": 3600, "day": 86400}
+        return int(match.group(1)) * unit_seconds[match.group(2)]
     
     def handle_message(self, message):
         """Handle message - supports both AgentMessage objects and dict for testing"""
@@ -234,7 +277,7 @@ class SpellManagerAgent(BaseAgent):
                         if self.verbose:
                             print(f"⚠️ Ending concentration on {spellcasting['concentration_spell']}")
                     
-                    spellcasting["concentration_spell"] = spell_data["name"]
+                    self._start_concentration(character_name, spellcasting, spell_data)
                 
                 result = {
                     "success": True,
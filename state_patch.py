@@ -0,0 +1,88 @@
+"""
+JSON Patch helpers for game state
+Computes and applies RFC 6902 style patches (add / replace / remove) between game-state dicts
+"""
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, List
+
+
+def escape_pointer_token(token: str) -> str:
+    """Escape a dict key for use in a JSON pointer (RFC 6901)"""
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+def unescape_pointer_token(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def diff_state(old: Any, new: Any, path: str = "") -> List[Dict[str, Any]]:
+    """Operations turning old into new. Lists that only grew become "add .../-" appends,
+    so long histories cost one operation per new entry rather than a full copy.
+    Accepts any mappings/sequences; subtrees shared by identity (immutable game state) are skipped."""
+    ops: List[Dict[str, Any]] = []
+    _diff(old, new, path, ops)
+    return ops
+
+
+def _is_list(value: Any) -> bool:
+    return isinstance(value, Sequence) and not isinstance(value, (str, bytes))
+
+
+def _diff(old: Any, new: Any, path: str, ops: List[Dict[str, Any]]):
+    if old is new:
+        return
+    if isinstance(old, Mapping) and isinstance(new, Mapping):
+        for key in old.keys() - new.keys():
+            ops.append({"op": "remove", "path": f"{path}/{escape_pointer_token(str(key))}"})
+        for key, value in new.items():
+            child_path = f"{path}/{escape_pointer_token(str(key))}"
+            if key not in old:
+                ops.append({"op": "add", "path": child_path, "value": value})
+            elif old[key] is not value and old[key] != value:
+                _diff(old[key], value, child_path, ops)
+    elif (_is_list(old) and _is_list(new) and len(new) >= len(old)
+          and new[:len(old)] == old):
+        for value in new[len(old):]:
+            ops.append({"op": "add", "path": f"{path}/-", "value": value})
+    elif old != new:
+        ops.append({"op": "replace", "path": path, "value": new})
+
+
+def apply_patch(document: Any, ops: List[Dict[str, Any]]) -> Any:
+    """Apply operations in place and return the (possibly replaced) document.
+    Values are inserted as-is - copy them first if the caller keeps using them."""
+    for op in ops:
+        path = op["path"]
+        if path == "":
+            if op["op"] == "remove":
+                document = None
+            else:
+                document = op["value"]
+            continue
+
+        tokens = [unescape_pointer_token(token) for token in path.split("/")[1:]]
+        parent = document
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        last = tokens[-1]
+
+        if isinstance(parent, list):
+            if op["op"] == "add":
+                if last == "-":
+                    parent.append(op["value"])
+                else:
+                    parent.insert(int(last), op["value"])
+            elif op["op"] == "replace":
+                parent[int(last)] = op["value"]
+            elif op["op"] == "remove":
+                del parent[int(last)]
+            else:
+                raise ValueError(f"Unsupported patch operation: {op['op']}")
+        else:
+            if op["op"] in ("add", "replace"):
+                parent[last] = op["value"]
+            elif op["op"] == "remove":
+                parent.pop(last, None)
+            else:
+                raise ValueError(f"Unsupported patch operation: {op['op']}")
+    return document
@@ -8,6 +8,7 @@ import shutil
 import os
 import sys
 import json
+import time
 from unittest.mock import MagicMock, patch
 
 # Add the project root to Python path
@@ -547,6 +548,32 @@ class TestAgentInteractions:
         finally:
             orchestrator.stop()
 
+    
+    def test_concentration_expiry_runs_on_the_agent(self, orchestrator_with_agents):
+        """Test that an expiry timer hands the work to the spell agent instead of mutating state itself"""
+        orchestrator, agents = orchestrator_with_agents
+        spell_agent = agents['spell']
+        spell_agent.character_spellcasting["testwizard"] = {
+            "concentration_spell": "Bless",
+            "concentration_started": time.time() - 60,
+            "concentration_duration": 6
+        }
+        orchestrator.start()
+        
+        try:
+            expiry_timer = spell_agent.schedule_timer(0.01, spell_agent._queue_expiry)
+            time.sleep(0.5)
+            assert spell_agent.character_spellcasting["testwizard"]["concentration_spell"] is None
+            
+            history = orchestrator.message_bus.get_message_history(limit=50)
+            assert any(m["action"] == "expire_concentration" and m["sender_id"] == "spell_manager"
+                       for m in history)
+            # The timer already fired, so cancelling it leaves nothing behind
+            spell_agent.cancel_timer(expiry_timer)
+            assert expiry_timer not in orchestrator.scheduler.cancelled_timers
+        finally:
+            orchestrator.stop()
+
 
 if __name__ == "__main__":
     # Run the tests
@@ -0,0 +1,871 @@
+"""
+Unit tests for the agent framework message bus and orchestrator
+"""
+import pytest
+import os
+import sys
+import time
+import asyncio
+import queue
+
+# Add the project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+sys.path.insert(0, project_root)
+
+from agent_framework import (AgentOrchestrator, AsyncAgentOrchestrator, BaseAgent,
+                             AgentMessage, DispatchMode, MessageHistory, MessageType,
+                             MessagePriority, OverflowPolicy, PriorityMessageQueue,
+                             AgentPlacement, RemoteAgentProxy, MessageCodec,
+                             CompactMessageCodec, new_message_id, LatencyHistogram,
+                             MessageJournal)
+from message_replay import JournalReplayer
+
+
+class EchoAgent(BaseAgent):
+    """Minimal agent that echoes request data back to the sender"""
+
+    def __init__(self, agent_id: str = "echo", delay: float = 0.0):
+        self.delay = delay
+        super().__init__(agent_id, "Echo")
+
+    def _setup_handlers(self):
+        self.register_handler("echo", self._handle_echo)
+
+    def _handle_echo(self, message: AgentMessage):
+        if self.delay:
+            time.sleep(self.delay)
+        return {"success": True, "echo": message.data}
+
+    def process_tick(self):
+        pass
+
+
+class TestMessageBus:
+    """Test MessageBus request/response handling"""
+
+    @pytest.fixture
+    def orchestrator(self):
+        """Create a running orchestrator with an echo agent"""
+        orchestrator = AgentOrchestrator()
+        orchestrator.register_agent(EchoAgent())
+        orchestrator.start()
+        yield orchestrator
+        orchestrator.stop()
+
+    def test_send_and_wait_returns_response(self, orchestrator):
+        """Test that send_and_wait returns the correlated response data"""
+        result = orchestrator.send_and_wait("echo", "echo", {"value": 42}, timeout=2.0)
+
+        assert result["success"]
+        assert result["echo"] == {"value": 42}
+        assert orchestrator.message_bus.pending_responses == {}
+
+    def test_send_and_wait_times_out(self, orchestrator):
+        """Test that unknown receivers time out and release the pending future"""
+        result = orchestrator.send_and_wait("missing_agent", "echo", {}, timeout=0.2)
+
+        assert result is None
+        assert orchestrator.message_bus.pending_responses == {}
+
+    def test_send_and_wait_survives_busy_bus(self, orchestrator):
+        """Test that responses are found even when history is flooded"""
+        for i in range(200):
+            orchestrator.send_message_to_agent("echo", "echo", {"i": i})
+
+        result = orchestrator.send_and_wait("echo", "echo", {"value": "late"}, timeout=5.0)
+
+        assert result["echo"] == {"value": "late"}
+
+
+class TestMailboxDispatch:
+    """Test per-agent mailbox dispatch"""
+
+    def test_slow_agent_does_not_block_fast_agent(self):
+        """Test that a slow handler does not delay other agents"""
+        orchestrator = AgentOrchestrator(dispatch_mode=DispatchMode.MAILBOX)
+        orchestrator.register_agent(EchoAgent("slow", delay=1.0))
+        orchestrator.register_agent(EchoAgent("fast"))
+        orchestrator.start()
+
+        try:
+            orchestrator.send_message_to_agent("slow", "echo", {})
+            time.sleep(0.05)
+
+            start = time.time()
+            result = orchestrator.send_and_wait("fast", "echo", {"value": 1}, timeout=2.0)
+
+            assert result["echo"] == {"value": 1}
+            assert time.time() - start < 0.5
+        finally:
+            orchestrator.stop()
+
+    def test_registration_unchanged(self):
+        """Test that agents registered after start get a running mailbox"""
+        orchestrator = AgentOrchestrator(dispatch_mode="mailbox")
+        orchestrator.start()
+
+        try:
+            orchestrator.register_agent(EchoAgent())
+            orchestrator.agents["echo"].start()
+
+            result = orchestrator.send_and_wait("echo", "echo", {"value": 2}, timeout=2.0)
+
+            assert result["echo"] == {"value": 2}
+            assert "echo" in orchestrator.get_message_statistics()["mailbox_sizes"]
+        finally:
+            orchestrator.stop()
+
+
+class AsyncEchoAgent(BaseAgent):
+    """Agent with a coroutine handler"""
+
+    def __init__(self, agent_id: str = "async_echo", delay: float = 0.2):
+        self.delay = delay
+        super().__init__(agent_id, "AsyncEcho")
+
+    def _setup_handlers(self):
+        self.register_handler("echo", self._handle_echo)
+
+    async def _handle_echo(self, message: AgentMessage):
+        await asyncio.sleep(self.delay)
+        return {"success": True, "echo": message.data}
+
+    def process_tick(self):
+        pass
+
+
+class TestAsyncOrchestrator:
+    """Test the asyncio-based bus and orchestrator"""
+
+    def test_coroutine_handlers_fan_out_concurrently(self):
+        """Test that awaiting several requests at once overlaps their handlers"""
+        async def scenario():
+            orchestrator = AsyncAgentOrchestrator()
+            orchestrator.register_agent(AsyncEchoAgent())
+            orchestrator.register_agent(EchoAgent())
+            await orchestrator.start()
+            try:
+                start = time.time()
+                results = await asyncio.gather(*(
+                    orchestrator.send_and_wait("async_echo", "echo", {"i": i}, timeout=2.0)
+                    for i in range(5)
+                ), orchestrator.send_and_wait("echo", "echo", {"sync": True}, timeout=2.0))
+                return results, time.time() - start
+            finally:
+                await orchestrator.stop()
+
+        results, elapsed = asyncio.run(scenario())
+
+        assert [r["echo"] for r in results[:5]] == [{"i": i} for i in range(5)]
+        assert results[5]["echo"] == {"sync": True}
+        assert elapsed < 0.8
+
+    def test_send_and_wait_times_out(self):
+        """Test that the async bus returns None when nobody answers"""
+        async def scenario():
+            orchestrator = AsyncAgentOrchestrator()
+            await orchestrator.start()
+            try:
+                return await orchestrator.send_and_wait("missing_agent", "echo", {}, timeout=0.1)
+            finally:
+                await orchestrator.stop()
+
+        assert asyncio.run(scenario()) is None
+
+    def test_priority_lanes_and_overflow(self):
+        """Test that the async bus delivers by priority and releases dropped requests"""
+        async def scenario():
+            orchestrator = AsyncAgentOrchestrator(max_queue_size=1)
+            listener = ListenerAgent("listener")
+            orchestrator.register_agent(listener)
+            orchestrator.register_agent(EchoAgent())
+            bus = orchestrator.message_bus
+
+            # Queued before start, so delivery order is decided by the lanes
+            bus.send_message(_make_message(0, receiver="listener", action="later",
+                                           priority=MessagePriority.BACKGROUND))
+            bus.send_message(_make_message(1, receiver="listener", action="first",
+                                           priority=MessagePriority.INTERACTIVE))
+            waiter = asyncio.create_task(bus.send_and_wait(
+                _make_message(2, receiver="echo", action="echo", priority=MessagePriority.NORMAL), timeout=2.0))
+            await asyncio.sleep(0)
+            bus.send_message(_make_message(3, receiver="echo", action="echo"))  # Evicts the waiter's request
+
+            start = time.time()
+            await orchestrator.start()
+            try:
+                dropped = await waiter
+                await asyncio.sleep(0.2)
+            finally:
+                await orchestrator.stop()
+            return dropped, time.time() - start, listener.received, bus.get_queue_metrics()["main"]
+
+        dropped, elapsed, received, metrics = asyncio.run(scenario())
+
+        assert dropped is None and elapsed < 1.0
+        assert received == ["raw:first", "raw:later"]
+        assert metrics["dropped"] == 1
+
+    def test_coroutine_handler_inside_batch(self):
+        """Test that a sync code path reaching a coroutine handler runs it on the bus loop"""
+        async def scenario():
+            orchestrator = AsyncAgentOrchestrator()
+            orchestrator.register_agent(AsyncEchoAgent(delay=0.01))
+            await orchestrator.start()
+            try:
+                return await orchestrator.send_batch_and_wait("async_echo", [("echo", {"i": 1})], timeout=2.0)
+            finally:
+                await orchestrator.stop()
+
+        assert asyncio.run(scenario()) == [{"success": True, "echo": {"i": 1}}]
+
+
+def _make_message(i: int, sender: str = "a", receiver: str = "b", action: str = "ping",
+                  response_to: str = None,
+                  priority: MessagePriority = MessagePriority.NORMAL) -> AgentMessage:
+    return AgentMessage(id=f"m{i}", sender_id=sender, receiver_id=receiver,
+                        message_type=MessageType.RESPONSE if response_to else MessageType.REQUEST,
+                        action=action, data={"i": i}, timestamp=time.time(),
+                        response_to=response_to, priority=priority)
+
+
+class TestMessageHistory:
+    """Test the ring-buffer message history"""
+
+    def test_evicts_oldest_and_keeps_indexes_consistent(self):
+        """Test that old messages leave both the buffer and the indexes"""
+        history = MessageHistory(capacity=3)
+        history.append(_make_message(0, sender="a", receiver="b"))
+        history.append(_make_message(1, sender="c", receiver="d", action="pong"))
+        history.append(_make_message(2, sender="b", receiver="a", response_to="m0"))
+        history.append(_make_message(3, sender="c", receiver="d", action="pong"))
+
+        assert len(history) == 3
+        assert [m.id for m in history.recent()] == ["m1", "m2", "m3"]
+        assert [m.id for m in history.recent(agent_id="a")] == ["m2"]
+        assert [m.id for m in history.recent(action="pong", limit=1)] == ["m3"]
+        assert history.find_response("m0").id == "m2"
+
+        history.append(_make_message(4))
+        history.append(_make_message(5))
+        assert history.find_response("m0") is None
+        assert len(history.by_agent["d"]) == 1
+        assert "pong" in history.by_action and "ping" in history.by_action
+
+    def test_indexed_tail_is_oldest_first(self):
+        """Test that per-agent lookups return the last `limit` entries in order"""
+        history = MessageHistory(capacity=100)
+        for i in range(10):
+            history.append(_make_message(i, sender="a", receiver="b" if i % 2 else "c"))
+
+        assert [m.id for m in history.recent(agent_id="b", limit=3)] == ["m5", "m7", "m9"]
+        assert [m.id for m in history.recent(agent_id="c", limit=50)] == ["m0", "m2", "m4", "m6", "m8"]
+        assert history.recent(agent_id="a", limit=0) == []
+
+    def test_bus_stores_each_message_once(self):
+        """Test that delivery does not store messages a second time"""
+        orchestrator = AgentOrchestrator()
+        orchestrator.register_agent(EchoAgent())
+        orchestrator.start()
+
+        try:
+            orchestrator.send_and_wait("echo", "echo", {}, timeout=2.0)
+            time.sleep(0.2)
+            history = orchestrator.message_bus.get_message_history(agent_id="echo")
+
+            assert len(history) == 2
+            assert history[1]["response_to"] == history[0]["id"]
+        finally:
+            orchestrator.stop()
+
+
+class CountingAgent(BaseAgent):
+    """Agent that counts its ticks"""
+
+    def __init__(self, agent_id: str, tick_period=None):
+        super().__init__(agent_id, "Counting")
+        self.tick_period = tick_period
+        self.ticks = 0
+
+    def _setup_handlers(self):
+        pass
+
+    def process_tick(self):
+        self.ticks += 1
+
+
+class TestScheduler:
+    """Test the deadline-based orchestrator scheduler"""
+
+    def test_agents_tick_at_declared_period(self):
+        """Test that tick_period controls how often process_tick runs"""
+        orchestrator = AgentOrchestrator()
+        fast = CountingAgent("fast", tick_period=0.05)
+        reactive = CountingAgent("reactive", tick_period=0)
+        legacy = CountingAgent("legacy")
+        for agent in (fast, reactive, legacy):
+            orchestrator.register_agent(agent)
+        orchestrator.tick_interval = 0.2
+        orchestrator.start()
+
+        try:
+            time.sleep(0.5)
+        finally:
+            orchestrator.stop()
+
+        assert fast.ticks >= 6
+        assert reactive.ticks == 0
+        assert 2 <= legacy.ticks <= 4
+
+    def test_timers_fire_once_and_can_be_cancelled(self):
+        """Test that agent timers wake the orchestrator at their deadline"""
+        orchestrator = AgentOrchestrator()
+        agent = CountingAgent("timers", tick_period=0)
+        orchestrator.register_agent(agent)
+        orchestrator.start()
+        fired = []
+
+        try:
+            agent.schedule_timer(0.1, lambda: fired.append(time.time()))
+            cancelled = agent.schedule_timer(0.1, lambda: fired.append("cancelled"))
+            agent.cancel_timer(cancelled)
+            start = time.time()
+            time.sleep(0.3)
+        finally:
+            orchestrator.stop()
+
+        assert len(fired) == 1
+        assert 0.05 <= fired[0] - start <= 0.25
+
+
+class ListenerAgent(BaseAgent):
+    """Agent that records broadcasts it receives"""
+
+    def __init__(self, agent_id: str):
+        super().__init__(agent_id, "Listener")
+        self.received = []
+        self.tick_period = 0
+
+    def _setup_handlers(self):
+        self.register_handler("state_changed", lambda message: self.received.append(message.action))
+
+    def handle_message(self, message: AgentMessage):
+        self.received.append(f"raw:{message.action}")
+        return super().handle_message(message)
+
+    def process_tick(self):
+        pass
+
+
+class TestSubscriptions:
+    """Test topic-based broadcast delivery"""
+
+    def test_broadcasts_only_reach_subscribers(self):
+        """Test that broadcast fan-out skips agents without a handler or subscription"""
+        orchestrator = AgentOrchestrator()
+        listener = ListenerAgent("listener")
+        wildcard = ListenerAgent("wildcard")
+        wildcard.subscribe("*")
+        bystander = EchoAgent("bystander")
+        bystander.handle_message = lambda message: pytest.fail("bystander got a broadcast")
+        for agent in (listener, wildcard, bystander):
+            orchestrator.register_agent(agent)
+        orchestrator.start()
+
+        try:
+            orchestrator.broadcast_event("state_changed", {})
+            orchestrator.broadcast_event("other_event", {})
+            time.sleep(0.3)
+        finally:
+            orchestrator.stop()
+
+        assert listener.received == ["raw:state_changed", "state_changed"]
+        assert "raw:other_event" in wildcard.received
+
+    def test_broadcast_skipped_without_subscribers(self):
+        """Test that nothing is sent when no agent subscribes to the action"""
+        orchestrator = AgentOrchestrator()
+        orchestrator.register_agent(EchoAgent())
+
+        assert not orchestrator.agents["echo"].has_subscribers("state_changed")
+        orchestrator.agents["echo"].broadcast_event("state_changed", {"big": "payload"})
+        assert len(orchestrator.message_bus.message_history) == 0
+
+
+class TestPriorityMessageQueue:
+    """Test bounded per-priority queues and overflow policies"""
+
+    def test_higher_priority_delivered_first(self):
+        """Test that interactive traffic overtakes queued background traffic"""
+        message_queue = PriorityMessageQueue()
+        message_queue.put(_make_message(0, priority=MessagePriority.BACKGROUND))
+        message_queue.put(_make_message(1, priority=MessagePriority.NORMAL))
+        message_queue.put(_make_message(2, priority=MessagePriority.INTERACTIVE))
+
+        assert [message_queue.get(timeout=0).id for _ in range(3)] == ["m2", "m1", "m0"]
+
+    def test_drop_oldest(self):
+        """Test that a full lane evicts its oldest message and reports it"""
+        message_queue = PriorityMessageQueue(max_size=2)
+        discarded = []
+        message_queue.on_discard = discarded.append
+        for i in range(3):
+            message_queue.put(_make_message(i))
+
+        assert [m.id for m in discarded] == ["m0"]
+        assert message_queue.get_metrics()["dropped"] == 1
+        assert message_queue.qsize() == 2
+
+    def test_drop_oldest_keeps_responses(self):
+        """Test that queued responses are never evicted to make room for a request"""
+        message_queue = PriorityMessageQueue(max_size=2)
+        discarded = []
+        message_queue.on_discard = discarded.append
+        message_queue.put(_make_message(0, response_to="r0"))
+        message_queue.put(_make_message(1))
+        message_queue.put(_make_message(2))
+        assert [m.id for m in discarded] == ["m1"]
+        assert [message_queue.get(timeout=0).id for _ in range(2)] == ["m0", "m2"]
+
+        # A lane holding only responses refuses the request
+        message_queue.put(_make_message(3, response_to="r3"))
+        message_queue.put(_make_message(4, response_to="r4"))
+        message_queue.put(_make_message(5))
+        assert [m.id for m in discarded] == ["m1", "m5"]
+        assert [message_queue.get(timeout=0).id for _ in range(2)] == ["m3", "m4"]
+        assert message_queue.qsize() == 0
+
+    def test_coalesce_replaces_matching_message(self):
+        """Test that a duplicate receiver/action replaces the queued message in place"""
+        message_queue = PriorityMessageQueue(max_size=2, overflow_policy=OverflowPolicy.COALESCE)
+        message_queue.put(_make_message(0, action="generate_scenario"))
+        message_queue.put(_make_message(1, action="roll_dice"))
+        message_queue.put(_make_message(2, action="generate_scenario"))
+
+        assert [message_queue.get(timeout=0).id for _ in range(2)] == ["m2", "m1"]
+        assert message_queue.get_metrics()["coalesced"] == 1
+
+    def test_block_raises_when_still_full(self):
+        """Test that a blocked sender gives up after block_timeout"""
+        message_queue = PriorityMessageQueue(max_size=1, overflow_policy="block", block_timeout=0.05)
+        message_queue.put(_make_message(0))
+
+        with pytest.raises(queue.Full):
+            message_queue.put(_make_message(1))
+
+    def test_dropped_request_releases_waiter(self):
+        """Test that send_and_wait returns promptly when its request is dropped"""
+        orchestrator = AgentOrchestrator(max_queue_size=1)
+        orchestrator.register_agent(EchoAgent())
+
+        start = time.time()
+        future = orchestrator.message_bus.send_request(_make_message(0, receiver="echo", action="echo",
+                                                                     priority=MessagePriority.INTERACTIVE))
+        orchestrator.send_message_to_agent("echo", "echo", {})
+
+        assert future.cancelled()
+        assert time.time() - start < 1.0
+
+
+class TestCoalescing:
+    """Test always-on coalescing for declared (receiver, action) pairs"""
+
+    def test_newer_request_replaces_queued_one(self):
+        """Test that only the latest queued request per receiver/action survives"""
+        message_queue = PriorityMessageQueue()
+        message_queue.coalesce_keys.add(("b", "generate_scenario"))
+        discarded = []
+        message_queue.on_discard = discarded.append
+        message_queue.put(_make_message(0, action="generate_scenario"))
+        message_queue.put(_make_message(1, action="roll_dice"))
+        message_queue.put(_make_message(2, action="generate_scenario"))
+
+        assert [message_queue.get(timeout=0).id for _ in range(2)] == ["m2", "m1"]
+        assert [m.id for m in discarded] == ["m0"]
+
+        # Once delivered, the next request is queued normally again
+        message_queue.put(_make_message(3, action="generate_scenario"))
+        assert message_queue.get(timeout=0).id == "m3"
+
+    def test_only_same_sender_and_lane_coalesce(self):
+        """Test that a request never replaces another caller's or another lane's request"""
+        message_queue = PriorityMessageQueue()
+        message_queue.coalesce_keys.add(("b", "generate_scenario"))
+        discarded = []
+        message_queue.on_discard = discarded.append
+        message_queue.put(_make_message(0, action="generate_scenario", priority=MessagePriority.INTERACTIVE))
+        message_queue.put(_make_message(1, action="generate_scenario", priority=MessagePriority.BACKGROUND))
+        message_queue.put(_make_message(2, sender="c", action="generate_scenario",
+                                        priority=MessagePriority.INTERACTIVE))
+
+        assert [message_queue.get(timeout=0).id for _ in range(3)] == ["m0", "m2", "m1"]
+        assert discarded == []
+
+    def test_agent_declares_coalesced_actions(self):
+        """Test that only one expensive request is processed per burst"""
+        class SlowScenarioAgent(EchoAgent):
+            coalesce_actions = {"echo"}
+
+        orchestrator = AgentOrchestrator(dispatch_mode="mailbox")
+        agent = SlowScenarioAgent("scenario", delay=0.2)
+        handled = []
+        original = agent._handle_echo
+        agent.register_handler("echo", lambda message: handled.append(message.data["i"]) or original(message))
+        orchestrator.register_agent(agent)
+        orchestrator.start()
+
+        try:
+            for i in range(10):
+                agent.send_message("scenario", "echo", {"i": i}, priority=MessagePriority.BACKGROUND)
+            time.sleep(0.6)
+        finally:
+            orchestrator.stop()
+
+        assert handled[-1] == 9
+        assert len(handled) <= 2
+
+
+class PidAgent(EchoAgent):
+    """Echo agent that reports its process id and broadcasts on its first tick"""
+
+    tick_period = 0.05
+
+    def _setup_handlers(self):
+        super()._setup_handlers()
+        self.register_handler("pid", lambda message: {"success": True, "pid": os.getpid()})
+        self.announced = False
+
+    def process_tick(self):
+        if not self.announced:
+            self.announced = True
+            self.broadcast_event("state_changed", {"pid": os.getpid()})
+
+
+class TestProcessPlacement:
+    """Test hosting agents in worker processes"""
+
+    def test_process_agent_round_trip(self):
+        """Test that requests, responses and broadcasts cross the process boundary"""
+        orchestrator = AgentOrchestrator(placement={"worker": "process"})
+        listener = ListenerAgent("listener")
+        orchestrator.register_agent(PidAgent("worker"))
+        orchestrator.register_agent(listener)
+        orchestrator.start()
+
+        try:
+            echo = orchestrator.send_and_wait("worker", "echo", {"value": 7}, timeout=5.0)
+            pid = orchestrator.send_and_wait("worker", "pid", {}, timeout=5.0)
+            time.sleep(0.3)
+            status = orchestrator.get_agent_status()["worker"]
+        finally:
+            orchestrator.stop()
+
+        assert isinstance(orchestrator.agents["worker"], RemoteAgentProxy)
+        assert echo["echo"] == {"value": 7}
+        assert pid["pid"] != os.getpid()
+        assert "state_changed" in listener.received
+        assert status["placement"] == AgentPlacement.PROCESS.value
+        assert not orchestrator.agents["worker"].process.is_alive()
+
+
+class TestMessageCodec:
+    """Test message ids and wire codecs"""
+
+    def test_message_ids_are_unique_and_monotonic(self):
+        """Test that ids share a per-process prefix and count upwards"""
+        first, second = new_message_id(), new_message_id()
+        prefix, number = first.rsplit("-", 1)
+
+        assert first != second
+        assert second == f"{prefix}-{int(number) + 1}"
+
+    @pytest.mark.parametrize("codec", [MessageCodec(), CompactMessageCodec(),
+                                       CompactMessageCodec(use_msgpack=False)])
+    def test_round_trip(self, codec):
+        """Test that every codec reproduces the message, including unicode and response_to"""
+        messages = [_make_message(0), _make_message(1, action="föö", response_to="m0",
+                                                    priority=MessagePriority.BACKGROUND)]
+        messages[1].data = {"nested": {"list": [1, 2.5, None, True]}, "text": "dé"}
+
+        assert [codec.decode(codec.encode(m)) for m in messages] == messages
+        assert codec.decode_stream(codec.encode_stream(messages)) == messages
+
+    def test_compact_codec_is_smaller(self):
+        """Test that the binary codec beats JSON of to_dict on size"""
+        message = _make_message(0, response_to="m1")
+
+        assert len(CompactMessageCodec().encode(message)) < len(MessageCodec().encode(message))
+
+    def test_export_history(self):
+        """Test that bus history exports in the bus codec"""
+        orchestrator = AgentOrchestrator()
+        orchestrator.register_agent(EchoAgent())
+        orchestrator.start()
+
+        try:
+            orchestrator.send_and_wait("echo", "echo", {"value": 3}, timeout=2.0)
+            time.sleep(0.1)
+        finally:
+            orchestrator.stop()
+
+        bus = orchestrator.message_bus
+        exported = bus.codec.decode_stream(bus.export_history(agent_id="echo"))
+        assert [m.to_dict() for m in exported] == bus.get_message_history(agent_id="echo")
+
+
+class TestRoutingTable:
+    """Test copy-on-write routing and lock-free delivery"""
+
+    def test_registration_does_not_wait_for_handlers(self):
+        """Test that registering an agent while a slow handler runs returns immediately"""
+        orchestrator = AgentOrchestrator()
+        orchestrator.register_agent(EchoAgent("slow", delay=1.0))
+        orchestrator.start()
+
+        try:
+            orchestrator.send_message_to_agent("slow", "echo", {})
+            time.sleep(0.1)
+
+            start = time.time()
+            orchestrator.register_agent(EchoAgent("late"))
+            assert time.time() - start < 0.2
+        finally:
+            orchestrator.stop()
+
+    def test_published_tables_are_never_mutated(self):
+        """Test that a snapshot taken before a change still routes the old way"""
+        orchestrator = AgentOrchestrator()
+        orchestrator.register_agent(ListenerAgent("listener"))
+        bus = orchestrator.message_bus
+        before = bus.routing
+
+        bus.unregister_agent("listener")
+        broadcast = _make_message(0, sender="engine", receiver="broadcast", action="state_changed")
+
+        assert before.target_ids(broadcast) == ["listener"]
+        assert "listener" in before.agents
+        assert bus.routing.target_ids(broadcast) == []
+        assert not bus.has_subscribers("state_changed")
+
+
+class TestPerformanceMonitor:
+    """Test latency histograms and the performance report"""
+
+    def test_histogram_percentiles_within_precision(self):
+        """Test that percentiles land within the histogram's ~6% bucket precision"""
+        histogram = LatencyHistogram()
+        for ms in range(1, 1001):
+            histogram.record(ms / 1000.0)
+
+        assert histogram.count == 1000
+        assert histogram.percentile(50) == pytest.approx(500, rel=0.07)
+        assert histogram.percentile(99) == pytest.approx(990, rel=0.07)
+        assert histogram.percentile(100) == 1000
+
+    def test_report_shows_slow_agent_as_bottleneck(self):
+        """Test that handler, queue wait and end-to-end latency are recorded per agent/action"""
+        orchestrator = AgentOrchestrator(dispatch_mode="mailbox")
+        orchestrator.register_agent(EchoAgent("slow", delay=0.05))
+        orchestrator.register_agent(EchoAgent("fast"))
+        orchestrator.start()
+
+        try:
+            for _ in range(3):
+                orchestrator.send_and_wait("slow", "echo", {}, timeout=2.0)
+                orchestrator.send_and_wait("fast", "echo", {}, timeout=2.0)
+            report = orchestrator.get_performance_report()
+        finally:
+            orchestrator.stop()
+
+        slow = report["latency"]["slow.echo"]
+        assert set(slow) == {"queue_wait", "handler", "end_to_end"}
+        assert slow["handler"]["count"] == 3
+        assert slow["handler"]["p50_ms"] >= 45
+        assert slow["end_to_end"]["p50_ms"] >= slow["handler"]["p50_ms"] * 0.9
+        assert report["bottlenecks"][0]["target"] == "slow.echo"
+
+
+class TestMessageJournal:
+    """Test the on-disk message journal and replay driver"""
+
+    def test_append_read_and_reopen(self, tmp_path):
+        """Test that records survive reopening and a torn trailing record is ignored"""
+        path = str(tmp_path / "session.journal")
+        journal = MessageJournal(path, codec=MessageCodec(), fsync_every=2)
+        journal.append(_make_message(0))
+        journal.append(_make_message(1))
+        journal.close()
+
+        # Reopening keeps the original codec
+        journal = MessageJournal(path, codec=CompactMessageCodec())
+        assert journal.codec.name == "json"
+        journal.append(_make_message(2))
+        journal.close()
+        with open(path, "ab") as f:
+            f.write(b"\x00\x00\x01\x00partial")
+
+        assert [m.id for m in MessageJournal.read(path)] == ["m0", "m1", "m2"]
+
+    def test_replay_recorded_session(self, tmp_path):
+        """Test that a recorded session is re-injected into a fresh orchestrator"""
+        path = str(tmp_path / "session.journal")
+        recording = AgentOrchestrator()
+        recording.register_agent(EchoAgent())
+        recording.message_bus.start_journal(path)
+        recording.start()
+        try:
+            for i in range(3):
+                recording.send_and_wait("echo", "echo", {"i": i}, timeout=2.0)
+                time.sleep(0.1)
+        finally:
+            recording.stop()
+            recording.message_bus.stop_journal()
+
+        replaying = AgentOrchestrator()
+        replaying.register_agent(EchoAgent())
+        replaying.start()
+        try:
+            start = time.time()
+            result = JournalReplayer(replaying, speed=10.0).replay(path)
+            elapsed = time.time() - start
+        finally:
+            replaying.stop()
+
+        assert len(list(MessageJournal.read(path))) == 6
+        assert result["requests"] == 3 and result["responses"] == 3
+        assert result["performance"]["latency"]["echo.echo"]["handler"]["count"] == 3
+        assert elapsed < 0.15
+
+
+class TestBatchRequests:
+    """Test batch messages carrying several sub-requests"""
+
+    @pytest.fixture
+    def orchestrator(self):
+        orchestrator = AgentOrchestrator()
+        orchestrator.register_agent(EchoAgent())
+        orchestrator.start()
+        yield orchestrator
+        orchestrator.stop()
+
+    def test_batch_returns_results_in_order(self, orchestrator):
+        """Test that one round-trip answers every sub-request"""
+        results = orchestrator.send_batch_and_wait("echo", [("echo", {"i": 0}), ("missing", {}),
+                                                            ("echo", {"i": 2})], timeout=2.0)
+
+        assert results[0]["echo"] == {"i": 0}
+        assert results[1] == {"error": "Unknown action: missing"}
+        assert results[2]["echo"] == {"i": 2}
+        assert "batch" in orchestrator.get_agent_status()["echo"]["handlers"]
+        assert len(orchestrator.message_bus.get_message_history(agent_id="echo")) == 2
+
+    def test_stop_on_error(self, orchestrator):
+        """Test that a failing sub-request ends the batch when asked to"""
+        results = orchestrator.send_batch_and_wait("echo", [("missing", {}), ("echo", {})],
+                                                   timeout=2.0, stop_on_error=True)
+
+        assert len(results) == 1
+
+    def test_combat_setup_in_one_batch(self):
+        """Test adding combatants and starting combat with a single combat engine request"""
+        from combat_engine import CombatEngineAgent
+
+        orchestrator = AgentOrchestrator()
+        orchestrator.register_agent(CombatEngineAgent())
+        orchestrator.start()
+        try:
+            results = orchestrator.send_batch_and_wait("combat_engine", [
+                ("add_combatant", {"name": "Thorin", "max_hp": 30, "armor_class": 16, "is_player": True}),
+                ("add_combatant", {"name": "Goblin", "max_hp": 7, "armor_class": 13, "is_player": False}),
+                ("start_combat", {})
+            ], timeout=2.0)
+        finally:
+            orchestrator.stop()
+
+        assert all(result["success"] for result in results)
+
+
+class TestScatterGather:
+    """Test concurrent requests to several agents"""
+
+    def test_requests_overlap_and_share_deadline(self):
+        """Test that replies arrive in order, run in parallel, and missing ones come back as None"""
+        orchestrator = AgentOrchestrator(dispatch_mode="mailbox")
+        for agent_id in ("a", "b", "c"):
+            orchestrator.register_agent(EchoAgent(agent_id, delay=0.2))
+        orchestrator.start()
+
+        try:
+            start = time.time()
+            results = orchestrator.scatter_gather([("a", "echo", {"n": 1}), ("b", "echo", {"n": 2}),
+                                                   ("c", "echo", {"n": 3}), ("missing", "echo", {})],
+                                                  timeout=0.5)
+            elapsed = time.time() - start
+        finally:
+            orchestrator.stop()
+
+        assert [r["echo"]["n"] for r in results[:3]] == [1, 2, 3]
+        assert results[3] is None
+        assert elapsed < 0.6
+        assert orchestrator.message_bus.pending_responses == {}
+
+
+class CounterAgent(BaseAgent):
+    """Agent with one cacheable read and one mutating action"""
+
+    cacheable_actions = {"get"}
+    mutating_actions = {"increment"}
+
+    def __init__(self):
+        self.value = 0
+        super().__init__("counter", "Counter")
+
+    def _setup_handlers(self):
+        self.register_handler("get", lambda message: {"success": True, "value": self.value})
+        self.register_handler("increment", self._handle_increment)
+
+    def _handle_increment(self, message: AgentMessage):
+        if message.data.get("fail"):
+            return {"success": False, "error": "refused"}
+        self.value += 1
+        return {"success": True, "value": self.value}
+
+    def process_tick(self):
+        pass
+
+
+class TestStateChangeEvents:
+    """Test invalidation events published by mutating handlers"""
+
+    @pytest.fixture
+    def orchestrator(self):
+        orchestrator = AgentOrchestrator(dispatch_mode="mailbox")
+        orchestrator.register_agent(CounterAgent())
+        orchestrator.start()
+        yield orchestrator
+        orchestrator.stop()
+
+    def test_listener_runs_before_response(self, orchestrator):
+        """Test that a successful mutation notifies listeners before its caller sees the response"""
+        events = []
+        orchestrator.message_bus.add_state_listener(lambda message: events.append(message.data))
+
+        orchestrator.send_and_wait("counter", "get", {}, timeout=2.0)
+        assert events == []
+
+        result = orchestrator.send_and_wait("counter", "increment", {}, timeout=2.0)
+        assert result["value"] == 1
+        assert events == [{"agent_id": "counter", "action": "increment", "tags": ["counter"]}]
+
+        orchestrator.send_and_wait("counter", "increment", {"fail": True}, timeout=2.0)
+        assert len(events) == 1
+
+    def test_batch_publishes_once(self, orchestrator):
+        """Test that a batch with several mutations publishes a single state change"""
+        events = []
+        orchestrator.message_bus.add_state_listener(lambda message: events.append(message.data))
+
+        orchestrator.send_batch_and_wait("counter", [("increment", {}), ("get", {}), ("increment", {})],
+                                         timeout=2.0)
+
+        assert events == [{"agent_id": "counter", "action": "batch", "tags": ["counter"]}]
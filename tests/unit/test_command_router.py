@@ -0,0 +1,62 @@
+"""
+Unit tests for the Aho-Corasick command router
+"""
+import pytest
+import os
+import sys
+
+# Add the project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+sys.path.insert(0, project_root)
+
+from command_router import CommandRouter
+
+
+class TestCommandRouter:
+    """Test pattern discovery and route precedence"""
+
+    @pytest.fixture
+    def router(self):
+        router = CommandRouter()
+        router.add_routes({
+            'roll initiative': ('combat', 'roll_initiative'),
+            'roll': ('dice', 'roll_dice'),
+            'initiative': ('combat', 'get_combat_status'),
+        })
+        router.add_keyword_route(('rules', 'check_rule'), any_of=['prone', 'stunned'], all_of=['condition'])
+        router.add_keyword_route(('scenario', 'generate'), any_of=['tavern', 'dragon'],
+                                 none_of=['rule', 'status'])
+        return router
+
+    def test_finds_overlapping_patterns(self, router):
+        assert router.find_patterns("roll initiative") == {'roll initiative', 'roll', 'initiative'}
+        assert router.find_patterns("xyz") == set()
+
+        overlapping = CommandRouter()
+        overlapping.add_routes({'he': 'he', 'she': 'she', 'hers': 'hers'})
+        assert overlapping.find_patterns("ushers") == {'he', 'she', 'hers'}
+        assert overlapping.find_patterns("nothing here") == {'he'}
+        assert overlapping.match("ushers").target == 'he'
+
+    def test_earlier_routes_take_precedence(self, router):
+        assert router.match("roll initiative now").target == ('combat', 'roll_initiative')
+        assert router.match("initiative then roll").target == ('dice', 'roll_dice')
+
+    def test_explicit_priority_overrides_insertion_order(self):
+        router = CommandRouter()
+        router.add_route('roll', 'dice')
+        router.add_route('save', 'save', priority=-1)
+        assert router.match("roll then save").target == 'save'
+
+    def test_keyword_routes(self, router):
+        assert router.match("what does the stunned condition do").target == ('rules', 'check_rule')
+        assert router.match("stunned again") is None
+        assert router.match("a dragon in the tavern").target == ('scenario', 'generate')
+        assert router.match("dragon status") is None
+        # Keyword routes rank below the pattern routes added before them
+        assert router.match("roll for the dragon").target == ('dice', 'roll_dice')
+
+    def test_routes_added_after_compile(self, router):
+        assert router.match("cast fireball") is None
+        router.add_route('cast', ('spell', 'cast_spell'))
+        assert router.match("cast fireball").target == ('spell', 'cast_spell')
@@ -0,0 +1,290 @@
+"""
+Unit tests for game state checkpointing
+"""
+import pytest
+import json
+import os
+import sys
+
+# Add the project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+sys.path.insert(0, project_root)
+
+from agent_framework import MessageBus
+from game_engine import JSONPersister, GameEngineAgent, ActionQueue
+from game_state import GameStateMirror, thaw
+from state_patch import diff_state, apply_patch
+
+
+def sample_state():
+    return {
+        "players": {"Aria": {"location": "tavern", "hp": 12}},
+        "scene_history": [],
+        "session": {"location": "tavern", "events": []},
+        "action_queue": []
+    }
+
+
+class TestStatePatch:
+    """Test JSON patch diffing and application"""
+
+    def test_round_trip(self):
+        old = sample_state()
+        new = sample_state()
+        new["players"]["Aria"]["hp"] = 7
+        new["players"]["Bran/the~bold"] = {"location": "road"}
+        new["scene_history"].append({"scene_text": "A storm rolls in"})
+        del new["action_queue"]
+
+        ops = diff_state(old, new)
+        assert apply_patch(json.loads(json.dumps(old)), ops) == new
+
+    def test_grown_list_is_appended(self):
+        old = {"events": ["a", "b"]}
+        new = {"events": ["a", "b", "c"]}
+        assert diff_state(old, new) == [{"op": "add", "path": "/events/-", "value": "c"}]
+        assert diff_state(new, new) == []
+
+    def test_shrunk_list_is_replaced(self):
+        ops = diff_state({"events": ["a", "b"]}, {"events": ["b"]})
+        assert ops == [{"op": "replace", "path": "/events", "value": ["b"]}]
+
+
+class TestJSONPersister:
+    """Test the write-ahead log, snapshot compaction and crash recovery"""
+
+    @pytest.fixture
+    def path(self, tmp_path):
+        return str(tmp_path / "checkpoint.json")
+
+    def test_deltas_go_to_the_log(self, path):
+        persister = JSONPersister(path, background=False)
+        state = sample_state()
+        assert persister.save(state) is True  # First save writes the snapshot
+        assert persister.save(state) is False  # Nothing changed, nothing written
+
+        state["players"]["Aria"]["hp"] = 5
+        state["session"]["events"].append("Aria was hit")
+        assert persister.save(state) is True
+        with open(persister.wal_path) as f:
+            assert len(f.readlines()) == 1
+
+        assert JSONPersister(path).load() == state
+
+    def test_snapshot_compaction(self, path):
+        persister = JSONPersister(path, snapshot_every=3, background=False)
+        state = sample_state()
+        persister.save(state)
+        for i in range(3):
+            state["session"]["events"].append(f"event {i}")
+            persister.save(state)
+
+        # The third delta compacted the log into the snapshot
+        assert os.path.getsize(persister.wal_path) == 0
+        assert not os.path.exists(f"{path}.tmp")
+        with open(path) as f:
+            snapshot = json.load(f)
+        assert snapshot["seq"] == 4
+        assert snapshot["state"] == state
+
+    def test_torn_log_tail_is_discarded(self, path):
+        persister = JSONPersister(path, background=False)
+        state = sample_state()
+        persister.save(state)
+        state["players"]["Aria"]["hp"] = 3
+        persister.save(state)
+        with open(persister.wal_path, "a") as f:
+            f.write('{"seq": 3, "ops": [{"op": "repl')
+
+        restored = JSONPersister(path)
+        assert restored.load() == state
+        with open(persister.wal_path) as f:
+            assert f.read().endswith("\n")
+
+    def test_legacy_plain_state_file(self, path):
+        with open(path, "w") as f:
+            json.dump(sample_state(), f)
+
+        persister = JSONPersister(path, background=False)
+        state = persister.load()
+        assert state == sample_state()
+
+        state["story_arc"] = "The storm"
+        persister.save(state)
+        with open(path) as f:
+            assert json.load(f)["format"] == JSONPersister.SNAPSHOT_FORMAT
+        assert JSONPersister(path).load() == state
+
+    def test_background_writer(self, path):
+        persister = JSONPersister(path)
+        state = sample_state()
+        for hp in range(10):
+            state["players"]["Aria"]["hp"] = hp
+            persister.save(state)
+        persister.close()
+
+        assert persister.last_error is None
+        assert os.path.getsize(persister.wal_path) == 0
+        assert JSONPersister(path).load() == state
+
+
+class TestGameEngineCheckpointing:
+    """Test that the engine only checkpoints changed state"""
+
+    def test_clean_ticks_do_not_save(self, tmp_path):
+        persister = JSONPersister(str(tmp_path / "checkpoint.json"), background=False)
+        engine = GameEngineAgent(persister=persister)
+        MessageBus().register_agent(engine)
+
+        engine.process_tick()
+        seq = persister.seq
+        engine.process_tick()
+        assert persister.seq == seq
+
+        engine.enqueue_action({"type": "raw_event", "actor": "Aria", "args": {"text": "Aria lights a torch"}})
+        engine.process_tick()
+        assert persister.seq == seq + 1
+        assert JSONPersister(persister.path).load()["session"]["events"] == engine.game_state["session"]["events"]
+
+    def test_unchanged_state_is_not_resent(self, tmp_path):
+        engine = GameEngineAgent(initial_state={**sample_state(), "npcs": {"Gorn": {"type": "simple"}}},
+                                 persister=JSONPersister(str(tmp_path / "checkpoint.json"), background=False))
+        MessageBus().register_agent(engine)
+        sent = []
+        engine.send_message = lambda receiver_id, action, data, priority=None: sent.append(receiver_id)
+
+        engine.process_tick()
+        engine.process_tick()
+        assert sorted(sent) == ["npc_controller", "scenario_generator"]
+
+        engine.enqueue_action({"type": "raw_event", "actor": "DM", "args": {"text": "Thunder"}})
+        engine.process_tick()
+        assert sent.count("npc_controller") == 2
+
+
+class TestGameStateSync:
+    """Test delta sync with get_game_state_since and game_state_updated"""
+
+    @pytest.fixture
+    def engine(self, tmp_path):
+        engine = GameEngineAgent(persister=JSONPersister(str(tmp_path / "checkpoint.json"), background=False))
+        MessageBus().register_agent(engine)
+        return engine
+
+    def test_state_since(self, engine):
+        version = engine.game_state.version
+        assert engine.get_state_since(version)["patch"] == []
+
+        engine.enqueue_action({"type": "raw_event", "actor": "DM", "args": {"text": "Thunder"}})
+        engine.process_tick()
+        delta = engine.get_state_since(version)
+        assert delta["base_version"] == version
+        assert delta["version"] == engine.game_state.version
+        assert thaw(delta["patch"][-1]) == {"op": "add", "path": "/session/events/-", "value": "Thunder"}
+
+        full = engine.get_state_since(None)
+        assert full["full"] is True and full["game_state"] is engine.game_state
+        assert engine.get_state_since(-5)["full"] is True
+
+    def test_mirror_follows_deltas(self, engine):
+        mirror = GameStateMirror()
+        assert mirror.apply(engine.get_state_since(mirror.version))
+        for text in ("Thunder", "Rain"):
+            engine.enqueue_action({"type": "raw_event", "actor": "DM", "args": {"text": text}})
+            engine.process_tick()
+            assert mirror.apply(engine.get_state_since(mirror.version))
+        assert mirror.state == thaw(engine.game_state)
+        assert mirror.version == engine.game_state.version
+
+        # A delta that doesn't start at the mirror's version is refused
+        stale = {"version": 999, "base_version": 3, "patch": []}
+        assert mirror.apply(stale) is False
+
+    def test_broadcasts_carry_deltas(self, engine):
+        updates = []
+        engine.has_subscribers = lambda action: True
+        engine.broadcast_event = lambda action, data, priority=None: updates.append(data)
+        mirror = GameStateMirror()
+
+        engine.process_tick()
+        engine.process_tick()  # Nothing changed - no second broadcast
+        engine.enqueue_action({"type": "raw_event", "actor": "DM", "args": {"text": "Thunder"}})
+        engine.process_tick()
+
+        assert [update["base_version"] is None for update in updates] == [True, False]
+        for update in updates:
+            assert mirror.apply(update)
+        assert mirror.state == thaw(engine.game_state)
+
+
+class TestHistoryWindow:
+    """Test that old scenes and events move to the archive but stay reachable"""
+
+    def test_history_is_bounded_and_archived(self, tmp_path):
+        engine = GameEngineAgent(persister=JSONPersister(str(tmp_path / "checkpoint.json"), background=False),
+                                 hot_events=10, archive_batch=5)
+        MessageBus().register_agent(engine)
+
+        for i in range(40):
+            engine.enqueue_action({"type": "raw_event", "actor": "DM", "args": {"text": f"event {i}"}})
+            engine.process_tick()
+
+        events = engine.game_state["session"]["events"]
+        assert 10 <= len(events) <= 15
+        assert events[-1] == "event 39"
+        assert engine.game_state["archived"]["events"] + len(events) == 40
+
+        entries, total = engine.get_history("events", 0, 40)
+        assert total == 40
+        assert entries == [f"event {i}" for i in range(40)]
+        assert engine.get_history("events", 38)[0] == ["event 38", "event 39"]
+
+        # The trimmed state is what gets checkpointed
+        assert JSONPersister(engine.persister.path).load()["archived"]["events"] == engine.game_state["archived"]["events"]
+
+
+class TestActionQueue:
+    """Test initiative order, per-actor ordering and the per-tick budget"""
+
+    def test_initiative_and_per_actor_order(self):
+        queue = ActionQueue()
+        queue.push({"actor": "Goblin", "initiative": 8, "id": "g1"})
+        queue.push({"actor": "Aria", "initiative": 15, "id": "a1"})
+        queue.push({"actor": "Goblin", "initiative": 20, "id": "g2"})
+        queue.push({"actor": "Bran", "id": "b1"})
+        queue.push({"actor": "Aria", "initiative": 15, "id": "a2"})
+
+        # g2 has the highest initiative but waits behind the Goblin's earlier action
+        assert [action["id"] for action in queue.pop_batch()] == ["a1", "a2", "g1", "g2", "b1"]
+        assert len(queue) == 0
+
+    def test_batches_respect_limit(self):
+        queue = ActionQueue()
+        for i in range(5):
+            queue.push({"actor": "DM", "id": i})
+        assert [action["id"] for action in queue.pop_batch(3)] == [0, 1, 2]
+        assert queue.pending_by_actor() == {"DM": 2}
+        assert [action["id"] for action in queue.pop_batch(3)] == [3, 4]
+
+    def test_engine_tick_budget(self, tmp_path):
+        engine = GameEngineAgent(persister=JSONPersister(str(tmp_path / "checkpoint.json"), background=False),
+                                 max_actions_per_tick=4)
+        MessageBus().register_agent(engine)
+        for i in range(10):
+            engine.enqueue_action({"type": "raw_event", "actor": "DM", "args": {"text": f"event {i}"}})
+        assert "action_queue" not in engine.game_state
+
+        engine.process_tick()
+        assert len(engine.action_queue) == 6
+        engine.process_tick()
+        engine.process_tick()
+        assert len(engine.action_queue) == 0
+        assert list(engine.game_state["session"]["events"])[-10:] == [f"event {i}" for i in range(10)]
+
+    def test_legacy_queue_is_adopted(self, tmp_path):
+        state = {"session": {"location": "tavern", "events": []},
+                 "action_queue": [{"type": "raw_event", "actor": "DM", "args": {"text": "Thunder"}}]}
+        engine = GameEngineAgent(initial_state=state,
+                                 persister=JSONPersister(str(tmp_path / "checkpoint.json"), background=False))
+        assert len(engine.action_queue) == 1
+        assert "action_queue" not in engine.game_state
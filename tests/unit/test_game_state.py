@@ -0,0 +1,89 @@
+"""
+Unit tests for the immutable, versioned game state
+"""
+import pytest
+import json
+import os
+import sys
+
+# Add the project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+sys.path.insert(0, project_root)
+
+from game_state import PersistentVector, FrozenMap, GameState, EMPTY_VECTOR, thaw
+from state_patch import diff_state
+
+
+class TestPersistentVector:
+    """Test the 32-way trie across level boundaries"""
+
+    @pytest.mark.parametrize("size", [0, 1, 32, 33, 1024, 1057, 40000])
+    def test_build_and_index(self, size):
+        vector = PersistentVector(range(size))
+        assert len(vector) == size
+        assert list(vector) == list(range(size))
+        assert vector[-3:] == list(range(size))[-3:]
+        if size:
+            assert vector[size // 2] == size // 2
+            assert vector[-1] == size - 1
+
+    def test_append_shares_previous_version(self):
+        vectors = [EMPTY_VECTOR]
+        for i in range(1100):
+            vectors.append(vectors[-1].append(i))
+        assert list(vectors[40]) == list(range(40))
+        assert list(vectors[-1]) == list(range(1100))
+        with pytest.raises(IndexError):
+            vectors[40][40]
+
+    def test_set_is_path_copy(self):
+        vector = PersistentVector(range(2000))
+        changed = vector.set(5, "x").set(-1, "y")
+        assert changed[5] == "x" and changed[-1] == "y"
+        assert vector[5] == 5 and vector[-1] == 1999
+        assert changed == ["x" if i == 5 else "y" if i == 1999 else i for i in range(2000)]
+
+
+class TestGameState:
+    """Test versioned snapshots and structural sharing"""
+
+    @pytest.fixture
+    def state(self):
+        return GameState({
+            "players": {"Aria": {"location": "tavern"}},
+            "session": {"location": "tavern", "events": ["arrived"]},
+            "story_arc": ""
+        })
+
+    def test_values_are_frozen(self, state):
+        assert isinstance(state["players"], FrozenMap)
+        assert isinstance(state["session"]["events"], PersistentVector)
+        assert not hasattr(state["players"], "__setitem__")
+        assert state.version == 0
+
+    def test_changes_bump_version_and_share_untouched_branches(self, state):
+        moved = state.set_in(("players", "Aria", "location"), "forest")
+        assert moved.version == state.version + 1
+        assert moved["players"]["Aria"]["location"] == "forest"
+        assert state["players"]["Aria"]["location"] == "tavern"
+        assert moved["session"] is state["session"]
+
+        logged = moved.append_in(("session", "events"), "Aria moved")
+        assert logged["session"]["events"][-1] == "Aria moved"
+        assert len(moved["session"]["events"]) == 1
+
+        merged = logged.merge({"story_arc": "The storm", "npcs": {"Gorn": {"type": "simple"}}})
+        assert merged.version == logged.version + 1
+        assert merged["npcs"]["Gorn"]["type"] == "simple"
+
+    def test_thaw_gives_plain_containers(self, state):
+        plain = thaw(state)
+        assert type(plain) is dict and type(plain["session"]["events"]) is list
+        plain["players"]["Aria"]["location"] = "moon"
+        assert state["players"]["Aria"]["location"] == "tavern"
+        assert json.loads(json.dumps(plain)) == plain
+
+    def test_diff_skips_shared_subtrees(self, state):
+        changed = state.append_in(("session", "events"), "storm")
+        assert diff_state(state, changed) == [{"op": "add", "path": "/session/events/-", "value": "storm"}]
+        assert diff_state(changed, changed) == []
@@ -0,0 +1,64 @@
+"""
+Unit tests for the compressed history archive
+"""
+import pytest
+import os
+import sys
+
+# Add the project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+sys.path.insert(0, project_root)
+
+from history_archive import HistoryArchive
+
+
+class TestHistoryArchive:
+    """Test appends, indexed lookups, segment rotation and crash recovery"""
+
+    @pytest.fixture
+    def directory(self, tmp_path):
+        return str(tmp_path / "history")
+
+    def test_append_and_lookup(self, directory):
+        archive = HistoryArchive(directory)
+        archive.append("events", 0, [f"event {i}" for i in range(50)])
+        archive.append("events", 50, [f"event {i}" for i in range(50, 80)])
+        archive.append("scenes", 0, [{"scene_text": "A storm"}])
+
+        assert archive.count("events") == 80
+        assert archive.get("events", 57) == "event 57"
+        assert archive.get_range("events", 45, 55) == [f"event {i}" for i in range(45, 55)]
+        assert archive.get("scenes", 0) == {"scene_text": "A storm"}
+        with pytest.raises(KeyError):
+            archive.get("events", 80)
+
+    def test_repeated_append_is_skipped(self, directory):
+        archive = HistoryArchive(directory)
+        archive.append("events", 0, ["a", "b"])
+        # Replaying an append after a crash only writes the entries not archived yet
+        assert archive.append("events", 0, ["a", "b", "c"]) == 1
+        assert archive.get_range("events", 0, 10) == ["a", "b", "c"]
+
+    def test_index_rebuilt_on_reopen_and_segments_rotate(self, directory):
+        archive = HistoryArchive(directory, segment_bytes=200)
+        for block in range(10):
+            archive.append("events", block * 20, [f"event {block}-{i} " * 5 for i in range(20)])
+        assert archive.get_stats()["events"]["segments"] > 1
+
+        reopened = HistoryArchive(directory, segment_bytes=200)
+        assert reopened.count("events") == 200
+        assert reopened.get("events", 133) == "event 6-13 " * 5
+
+    def test_torn_block_is_truncated(self, directory):
+        archive = HistoryArchive(directory)
+        archive.append("events", 0, ["a", "b"])
+        archive.append("events", 2, ["c"])
+        path = archive.segments["events"][-1]
+        size = os.path.getsize(path)
+        with open(path, "r+b") as f:
+            f.truncate(size - 3)
+
+        reopened = HistoryArchive(directory)
+        assert reopened.count("events") == 2
+        assert reopened.append("events", 2, ["c", "d"]) == 2
+        assert HistoryArchive(directory).get_range("events", 0, 4) == ["a", "b", "c", "d"]
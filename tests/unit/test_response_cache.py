@@ -0,0 +1,294 @@
+"""
+Unit tests for the bounded response cache
+"""
+import pytest
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+# Add the project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+sys.path.insert(0, project_root)
+
+from response_cache import (ResponseCache, PersistentResponseCache, SemanticCache, estimate_size,
+                            query_hash, bump_ingestion_version, read_ingestion_version)
+
+
+class TestResponseCache:
+    """Test LRU eviction, TTL expiry and size accounting"""
+
+    def test_get_and_set(self):
+        cache = ResponseCache()
+        assert cache.get("missing") is None
+        cache.set("key", {"success": True})
+        assert cache.get("key") == {"success": True}
+
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["total_items"] == 1
+
+    def test_lru_eviction_by_count(self):
+        cache = ResponseCache(max_items=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # b is now least recently used
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_byte_bound(self):
+        value = {"text": "x" * 1000}
+        entry_size = estimate_size("k0") + estimate_size(value)
+        cache = ResponseCache(max_bytes=entry_size * 3)
+        for i in range(5):
+            cache.set(f"k{i}", {"text": "x" * 1000})
+
+        stats = cache.get_stats()
+        assert stats["memory_bytes"] <= stats["max_bytes"]
+        assert len(cache) == 3
+        assert cache.get("k0") is None
+        assert cache.get("k4") is not None
+
+    def test_oversized_value_is_not_cached(self):
+        cache = ResponseCache(max_bytes=100)
+        cache.set("big", "x" * 1000)
+        assert cache.get("big") is None
+        assert cache.get_stats()["memory_bytes"] == 0
+
+    def test_ttl_expiry(self):
+        cache = ResponseCache()
+        cache.set("short", 1, ttl_hours=0.05 / 3600)
+        cache.set("long", 2, ttl_hours=1)
+        time.sleep(0.1)
+        cache.cleanup_expired()
+
+        assert cache.get("short") is None
+        assert cache.get("long") == 2
+        assert cache.get_stats()["expirations"] == 1
+
+    def test_replace_and_delete_keep_bytes_consistent(self):
+        cache = ResponseCache()
+        cache.set("key", "x" * 100, ttl_hours=0.05 / 3600)
+        cache.set("key", "y", ttl_hours=1)  # The old expiry must not remove the new value
+        time.sleep(0.1)
+        assert cache.get("key") == "y"
+        assert cache.total_bytes == estimate_size("key") + estimate_size("y")
+
+        cache.delete("key")
+        assert cache.total_bytes == 0
+        assert len(cache) == 0
+
+
+class TestPersistentResponseCache:
+    """Test the SQLite tier: persistence, normalised keys and fingerprint invalidation"""
+
+    @pytest.fixture
+    def db_path(self, tmp_path):
+        return str(tmp_path / "cache" / "responses.db")
+
+    def test_survives_reopen(self, db_path):
+        cache = PersistentResponseCache(db_path)
+        cache.set("rule_enforcement", "check_rule", {"query": "prone"}, {"success": True, "rule": "..."}, 24)
+        cache.close()
+
+        reopened = PersistentResponseCache(db_path)
+        value, remaining = reopened.get("rule_enforcement", "check_rule", {"query": "prone"})
+        assert value == {"success": True, "rule": "..."}
+        assert 23 * 3600 < remaining <= 24 * 3600
+        reopened.close()
+
+    def test_normalised_query_key(self):
+        assert query_hash("rule_enforcement", "check_rule", {"query": "How does  Grappling work?"}) == \
+            query_hash("rule_enforcement", "check_rule", {"query": "how does grappling work"})
+        assert query_hash("rule_enforcement", "check_rule", {"query": "prone"}) != \
+            query_hash("campaign_manager", "check_rule", {"query": "prone"})
+
+    def test_expired_rows_are_not_returned(self, db_path):
+        cache = PersistentResponseCache(db_path)
+        cache.set("campaign_manager", "get_campaign_info", {}, {"success": True}, ttl_hours=-1)
+        assert cache.get("campaign_manager", "get_campaign_info", {}) is None
+        assert cache.get_stats()["total_items"] == 0
+        cache.close()
+
+    def test_fingerprint_change_invalidates(self, db_path):
+        cache = PersistentResponseCache(db_path)
+        assert cache.set_fingerprint("dnd_documents:100:1") is False
+        cache.set("haystack_pipeline", "query_rules", {"query": "stealth"}, {"success": True}, 6)
+
+        assert cache.set_fingerprint("dnd_documents:100:1") is False
+        assert cache.get("haystack_pipeline", "query_rules", {"query": "stealth"}) is not None
+
+        assert cache.set_fingerprint("dnd_documents:140:2") is True
+        assert cache.get("haystack_pipeline", "query_rules", {"query": "stealth"}) is None
+        assert cache.get_stats()["invalidations"] == 1
+        cache.close()
+
+    def test_ingestion_version(self, tmp_path):
+        path = str(tmp_path / "versions.json")
+        assert read_ingestion_version("dnd_documents", path) == 0
+        assert bump_ingestion_version("dnd_documents", path) == 1
+        assert bump_ingestion_version("dnd_documents", path) == 2
+        assert read_ingestion_version("dnd_documents", path) == 2
+        assert read_ingestion_version("other", path) == 0
+
+
+class TestSemanticCache:
+    """Test embedding-similarity lookups"""
+
+    def test_similar_query_hits(self):
+        cache = SemanticCache(threshold=0.9)
+        cache.store("rules", "how does grappling work", [1.0, 0.0, 0.2], {"answer": "Grapple rules"})
+
+        answer, similarity, original = cache.lookup("rules", [0.95, 0.05, 0.25])
+        assert answer == {"answer": "Grapple rules"}
+        assert similarity > 0.9
+        assert original == "how does grappling work"
+
+        assert cache.lookup("rules", [0.0, 1.0, 0.0]) is None
+        stats = cache.get_stats()
+        assert stats["lookups"] == 2
+        assert stats["hits"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_namespaces_are_separate(self):
+        cache = SemanticCache(threshold=0.9)
+        cache.store("rules", "stealth", [1.0, 0.0], "rules answer")
+        assert cache.lookup("general", [1.0, 0.0]) is None
+        assert cache.lookup("rules", [2.0, 0.0])[0] == "rules answer"
+
+    def test_picks_closest_and_evicts_oldest(self):
+        cache = SemanticCache(threshold=0.5, max_entries=2)
+        cache.store("general", "a", [1.0, 0.0], "a")
+        cache.store("general", "b", [0.7, 0.7], "b")
+        assert cache.lookup("general", [0.6, 0.8])[0] == "b"
+
+        cache.store("general", "c", [0.0, 1.0], "c")
+        assert cache.get_stats()["entries"] == 2
+        assert cache.lookup("general", [1.0, -0.3]) is None  # "a" was evicted
+
+    def test_expired_entries_are_ignored(self):
+        cache = SemanticCache(threshold=0.9, ttl_hours=0.05 / 3600)
+        cache.store("general", "a", [1.0, 0.0], "a")
+        time.sleep(0.1)
+        assert cache.lookup("general", [1.0, 0.0]) is None
+        assert cache.get_stats()["entries"] == 0
+
+    def test_store_after_clear_is_dropped(self):
+        cache = SemanticCache(threshold=0.9)
+        generation = cache.generation  # Read before "retrieval"
+        cache.clear()  # Corpus changed while the answer was being built
+        cache.store("rules", "stealth", [1.0, 0.0], "stale answer", generation)
+        assert cache.lookup("rules", [1.0, 0.0]) is None
+
+        cache.store("rules", "stealth", [1.0, 0.0], "fresh answer", cache.generation)
+        assert cache.lookup("rules", [1.0, 0.0])[0] == "fresh answer"
+
+    @pytest.fixture
+    def pipeline_agent(self, monkeypatch):
+        haystack_pipeline_agent = pytest.importorskip("haystack_pipeline_agent")
+        monkeypatch.setattr(haystack_pipeline_agent, "read_ingestion_version", lambda name: 1)
+        agent = haystack_pipeline_agent.HaystackPipelineAgent.__new__(haystack_pipeline_agent.HaystackPipelineAgent)
+        agent.collection_name, agent.verbose = "dnd_documents", False
+        agent.semantic_cache = SemanticCache(threshold=0.9)
+        agent.collection_fingerprint = None
+        agent.points_count = 10
+        agent.qdrant_client = SimpleNamespace(
+            get_collection=lambda name: SimpleNamespace(points_count=agent.points_count))
+        agent.semantic_cache.store("rules", "stealth", [1.0, 0.0], "rules answer")
+        return agent
+
+    def test_cleared_when_collection_changes(self, pipeline_agent):
+        assert pipeline_agent.get_collection_fingerprint() == "dnd_documents:10:1"
+        assert pipeline_agent.get_collection_fingerprint() == "dnd_documents:10:1"
+        assert pipeline_agent.semantic_cache.get_stats()["entries"] == 1  # Same corpus
+        pipeline_agent.points_count = 12
+        pipeline_agent.get_collection_fingerprint()
+        assert pipeline_agent.semantic_cache.get_stats()["entries"] == 0  # Documents added
+
+    def test_unreadable_count_keeps_last_fingerprint(self, pipeline_agent):
+        assert pipeline_agent.get_collection_fingerprint() == "dnd_documents:10:1"
+
+        def unavailable(name):
+            raise ConnectionError("Qdrant is down")
+        pipeline_agent.qdrant_client = SimpleNamespace(get_collection=unavailable)
+        assert pipeline_agent.get_collection_fingerprint() == "dnd_documents:10:1"
+        assert pipeline_agent.semantic_cache.get_stats()["entries"] == 1
+
+        pipeline_agent.qdrant_client = None
+        pipeline_agent.collection_fingerprint = None
+        assert pipeline_agent.get_collection_fingerprint() is None
+
+
+class TestCacheInvalidation:
+    """Test dependency-tagged invalidation in both cache tiers"""
+
+    def test_memory_tier(self):
+        cache = ResponseCache()
+        cache.set("inventory", {"items": []}, tags=["inventory_manager"])
+        cache.set("spells", {"spells": []}, tags=["spell_manager"])
+
+        assert cache.invalidate_tags(["inventory_manager"]) == 1
+        assert cache.get("inventory") is None
+        assert cache.get("spells") is not None
+        assert cache.invalidate_tags(["inventory_manager"]) == 0
+        assert cache.get_stats()["invalidations"] == 1
+        assert cache.tag_index == {"spell_manager": {"spells"}}
+
+    def test_persistent_tier(self, tmp_path):
+        cache = PersistentResponseCache(str(tmp_path / "responses.db"))
+        cache.set("campaign_manager", "list_players", {}, {"success": True}, 12, tags=["campaign_manager"])
+        cache.set("rule_enforcement", "check_rule", {"query": "prone"}, {"success": True}, 24,
+                  tags=["rule_enforcement"])
+
+        assert cache.invalidate_tags(["campaign_manager"]) == 1
+        assert cache.get("campaign_manager", "list_players", {}) is None
+        assert cache.get("rule_enforcement", "check_rule", {"query": "prone"}) is not None
+        cache.close()
+
+    def test_promoted_entry_is_invalidated(self, tmp_path):
+        modular_dm_assistant = pytest.importorskip("modular_dm_assistant")
+        from agent_framework import AgentMessage, MessageType, STATE_CHANGED_ACTION
+
+        assistant = modular_dm_assistant.ModularDMAssistant.__new__(modular_dm_assistant.ModularDMAssistant)
+        assistant.enable_caching = True
+        assistant.verbose = False
+        assistant.haystack_agent = None
+        assistant.inline_cache = ResponseCache()
+        assistant.persistent_cache = PersistentResponseCache(str(tmp_path / "responses.db"))
+        assistant.orchestrator = SimpleNamespace(
+            agents={"rule_enforcement": SimpleNamespace(cacheable_actions={"check_rule"})})
+
+        data = {"query": "prone"}
+        assistant.persistent_cache.set("rule_enforcement", "check_rule", data, {"success": True}, 24,
+                                       tags=["rule_enforcement"])
+        cache_key, cached = assistant._lookup_cached_response("rule_enforcement", "check_rule", data)
+        assert cached == {"success": True}
+        assert assistant.inline_cache.get(cache_key) is not None  # Promoted into memory
+
+        assistant._on_state_changed(AgentMessage(
+            id="1", sender_id="rule_enforcement", receiver_id="broadcast", message_type=MessageType.BROADCAST,
+            action=STATE_CHANGED_ACTION, data={"action": "add_rule", "tags": ["rule_enforcement"]},
+            timestamp=time.time()))
+        assert assistant.inline_cache.get(cache_key) is None
+        assistant.persistent_cache.close()
+
+    def test_unknown_fingerprint_keeps_persisted_rows(self, tmp_path):
+        modular_dm_assistant = pytest.importorskip("modular_dm_assistant")
+
+        assistant = modular_dm_assistant.ModularDMAssistant.__new__(modular_dm_assistant.ModularDMAssistant)
+        assistant.verbose = False
+        assistant._fingerprint_checked_at = 0.0
+        assistant.haystack_agent = SimpleNamespace(get_collection_fingerprint=lambda: None)  # Qdrant down
+        assistant.persistent_cache = PersistentResponseCache(str(tmp_path / "responses.db"))
+        assistant.persistent_cache.set_fingerprint("dnd_documents:10:1")
+        assistant.persistent_cache.set("rule_enforcement", "check_rule", {"query": "prone"}, {"success": True}, 24)
+
+        assistant._refresh_cache_fingerprint(force=True)
+        assert assistant.persistent_cache.fingerprint == "dnd_documents:10:1"
+        assert assistant.persistent_cache.get("rule_enforcement", "check_rule", {"query": "prone"}) is not None
+        assistant.persistent_cache.close()